@@ -0,0 +1,71 @@
+"""
+Throughput of normalize_timestamps against per-item adjust_timestamp_to_location.
+
+Rows are (user_time, location) pairs like the time blocks of stored cascade_schema
+outputs, drawn from a pool of --unique-fraction * rows distinct pairs (replayed outputs
+repeat the same times and places a lot). Locations are gazetteer cities and inline
+abbreviations, so nothing is geocoded over the network. The per-item path is timed on a
+--sample of rows and reported as a rate.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/bulk_normalize.py --rows 10000 1000000
+    python benchmarks/bulk_normalize.py --rows 10000 --unique-fraction 1
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from refiner.timeparse import adjust_timestamp_to_location, normalize_timestamps
+
+LOCATIONS = ["Islamabad", "Lahore, Pakistan", "New York", "London", "Tokyo", "Sydney", "unknown"]
+ZONES = ["", " PKT", " EST", " CEST", " AEST"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August",
+          "September", "October", "November", "December"]
+
+def build_pool(size, rng):
+    pool = set()
+    while len(pool) < size:
+        hour, minute = rng.randrange(1, 13), rng.choice((0, 15, 30, 45))
+        if rng.random() < 0.5:
+            user_time = f"{rng.choice(MONTHS)} {rng.randrange(1, 29)}, {rng.choice((2024, 2025))} " \
+                        f"{hour}:{minute:02d} {rng.choice(('AM', 'PM'))}"
+        else:
+            user_time = f"{rng.choice((2024, 2025))}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d} " \
+                        f"{rng.randrange(24):02d}:{minute:02d}"
+        pool.add((user_time + rng.choice(ZONES), rng.choice(LOCATIONS)))
+    return sorted(pool)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Bulk timestamp normalization benchmark")
+    arg_parser.add_argument("--rows", type=int, nargs="+", default=[10000, 1000000])
+    arg_parser.add_argument("--unique-fraction", type=float, default=0.02,
+                            help="distinct (user_time, location) pairs per row")
+    arg_parser.add_argument("--sample", type=int, default=2000, help="rows timed on the per-item path")
+    arg_parser.add_argument("--seed", type=int, default=7)
+    args = arg_parser.parse_args()
+
+    print(f"{'rows':>9} {'unique':>8} {'per-item':>14} {'bulk':>14} {'speedup':>8}")
+    for rows in args.rows:
+        rng = random.Random(args.seed)
+        pool = build_pool(max(1, int(rows * args.unique_fraction)), rng)
+        items = [rng.choice(pool) for _ in range(rows)]
+
+        sample = items[:args.sample]
+        started = time.perf_counter()
+        expected = [adjust_timestamp_to_location(user_time, location) for user_time, location in sample]
+        per_item = len(sample) / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        epochs, zones = normalize_timestamps(items)
+        bulk = rows / (time.perf_counter() - started)
+
+        mismatches = sum((int(epoch), zone) != result for epoch, zone, result in zip(epochs, zones, expected))
+        print(f"{rows:>9} {len(pool):>8} {per_item:>9,.0f} it/s {bulk:>9,.0f} it/s {bulk / per_item:>7.0f}x"
+              + (f"  {mismatches} rows differ from the per-item result" if mismatches else ""))
+
+if __name__ == "__main__":
+    main()
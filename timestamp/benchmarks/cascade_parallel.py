@@ -0,0 +1,73 @@
+"""
+Cascade normalization wall time with a slow fake geocoder.
+
+Shows that with the shared worker pool and in-flight lookup coalescing, wall time
+follows the number of unique locations rather than the number of operations.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/cascade_parallel.py --geocode-delay 0.2
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from refiner.cascade import normalize_cascade_schema
+from refiner.timezones import LocationTimezoneCache, TokenBucket, set_location_tz_cache
+
+Location = namedtuple("Location", ["latitude", "longitude"])
+
+class SlowGeocoder:
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+
+    def geocode(self, query, timeout=10):
+        self.calls += 1
+        time.sleep(self.delay)
+        return Location(33.7, 73.0)
+
+class FixedFinder:
+    def timezone_at(self, lat, lng):
+        return "Asia/Karachi"
+
+def build_result(operations, unique_locations):
+    return {"cascade_schema": [
+        {
+            "time": {"user_time": "April 25, 2025 3:00 PM"},
+            "description": f"Swap {n} ETH to USDC",
+            # Made-up names so the offline gazetteer cannot answer them
+            "location": f"Sector {n % unique_locations} Township",
+        }
+        for n in range(operations)
+    ]}
+
+def run(operations, unique_locations, workers, delay, rate):
+    geocoder = SlowGeocoder(delay)
+    set_location_tz_cache(LocationTimezoneCache(geocoder, FixedFinder(), rate_limiter=TokenBucket(rate, capacity=rate)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        started = time.perf_counter()
+        normalize_cascade_schema(build_result(operations, unique_locations), executor=executor)
+        return time.perf_counter() - started, geocoder.calls
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Parallel cascade normalization benchmark")
+    arg_parser.add_argument("--geocode-delay", type=float, default=0.2)
+    arg_parser.add_argument("--rate", type=float, default=20, help="geocoder requests per second")
+    arg_parser.add_argument("--workers", type=int, default=8)
+    args = arg_parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{'ops':>4} {'unique':>7} {'sequential':>11} {'parallel':>9} {'geocodes':>9}")
+    for operations, unique_locations in [(5, 1), (5, 5), (20, 2), (20, 10), (40, 4)]:
+        sequential, _ = run(operations, unique_locations, 1, args.geocode_delay, args.rate)
+        parallel, calls = run(operations, unique_locations, args.workers, args.geocode_delay, args.rate)
+        print(f"{operations:>4} {unique_locations:>7} {sequential:>10.2f}s {parallel:>8.2f}s {calls:>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Per-turn payload size over a long synthetic session, with and without compaction.
+
+Each simulated turn adds a user request, a clarification, a "yes" and a full
+structured JSON reply, like the Streamlit chat does.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/context_compaction.py --turns 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from refiner.context import compact_conversation, context_metrics, estimate_tokens
+from stub_llm_server import DEFAULT_REPLY
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Conversation compaction benchmark")
+    arg_parser.add_argument("--turns", type=int, default=200)
+    arg_parser.add_argument("--report-every", type=int, default=25)
+    args = arg_parser.parse_args()
+
+    reply = json.dumps(json.loads(DEFAULT_REPLY), indent=2)
+    history = []
+    elapsed = 0.0
+    print(f"{'turn':>5} {'raw tokens':>11} {'sent tokens':>12} {'sent bytes':>11}")
+    for turn in range(1, args.turns + 1):
+        history.append({"role": "user", "content": f"Swap {turn} ETH to USDC on April 25, 2025 at 3:00 PM PKT"})
+        history.append({"role": "assistant", "content": "Which wallet should be used? Would you like to proceed?"})
+        history.append({"role": "user", "content": "yes"})
+        started = time.perf_counter()
+        compacted, stats = compact_conversation(history)
+        elapsed += time.perf_counter() - started
+        history.append({"role": "assistant", "content": f"```json\n{reply}\n```"})
+        if turn % args.report_every == 0 or turn == 1:
+            raw = sum(estimate_tokens(message["content"]) for message in history)
+            print(f"{turn:>5} {raw:>11} {stats['tokens_out']:>12} {stats['bytes_out']:>11}")
+
+    saved = context_metrics["bytes_in"] - context_metrics["bytes_out"]
+    print(f"bytes saved: {saved} ({saved / max(context_metrics['bytes_in'], 1):.1%}), "
+          f"tokens saved: {context_metrics['tokens_in'] - context_metrics['tokens_out']}")
+    print(f"compaction cost: {elapsed / args.turns * 1e6:.0f} us/turn")
+
+if __name__ == "__main__":
+    main()
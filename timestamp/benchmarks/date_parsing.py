@@ -0,0 +1,68 @@
+"""
+Tiered date parser vs dateutil on a corpus of user_time strings in the shapes the LLM emits.
+
+Reports the fraction of strings each tier handles, parse rate for the tiered parser and
+for dateutil alone, and any strings where the two disagree.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/date_parsing.py --rounds 20
+    python benchmarks/date_parsing.py --dayfirst
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dateutil import parser
+
+from refiner.dateformats import parse_datetime, parse_datetime_fast
+
+CORPUS = [
+    "April 25, 2025 3:00 PM", "April 25, 2025 3:00 PM PKT", "April 25 2025 3 PM", "Apr 25, 2025 at 15:30",
+    "May 1, 2025 9:00 AM EST", "June 3, 2025, 10:15 AM", "Dec 31 2025 11:59 PM UTC", "January 2, 2026",
+    "25 April 2025 3:00 PM", "25 Apr 2025 15:00 CET", "3 March 2025, 08:00",
+    "25/04/2025 15:00 PKT", "04/05/2025 10:00", "12/11/2025 9:30 PM", "1-2-2026 07:45", "31.12.2025 23:00",
+    "2025-04-25", "2025-04-25T15:00:00", "2025-04-25T15:00:00Z", "2025-04-25 15:00:00+05:00", "2025-04-25 15:00 UTC",
+    "2025/04/25 09:30", "2025/04/25 9:30 PM IST",
+    # Shapes left to dateutil
+    "Friday, April 25, 2025 at 3 PM", "25th April 2025 3pm", "3pm April 25 2025", "Sept 5, 2025 10:00",
+]
+
+def timed(parse, corpus, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in corpus:
+            parse(text)
+    return len(corpus) * rounds / (time.perf_counter() - started)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Tiered date parser benchmark")
+    arg_parser.add_argument("--rounds", type=int, default=20)
+    arg_parser.add_argument("--dayfirst", action="store_true")
+    args = arg_parser.parse_args()
+    warnings.simplefilter("ignore")
+    
+    tiers = Counter(parse_datetime_fast(text, args.dayfirst)[1] or "dateutil" for text in CORPUS)
+    for tier in ("iso", "layout", "dateutil"):
+        print(f"{tier:<10} {tiers[tier]:3d}/{len(CORPUS)} ({tiers[tier] / len(CORPUS):.0%})")
+    
+    mismatches = []
+    for text in CORPUS:
+        expected = parser.parse(text, dayfirst=args.dayfirst)
+        actual = parse_datetime(text, args.dayfirst)
+        if (expected.replace(tzinfo=None), expected.utcoffset()) != (actual.replace(tzinfo=None), actual.utcoffset()):
+            mismatches.append((text, expected, actual))
+    for text, expected, actual in mismatches:
+        print(f"mismatch: {text!r} dateutil={expected} tiered={actual}")
+    
+    tiered = timed(lambda text: parse_datetime(text, args.dayfirst), CORPUS, args.rounds)
+    baseline = timed(lambda text: parser.parse(text, dayfirst=args.dayfirst), CORPUS, args.rounds)
+    print(f"tiered:    {tiered:10.0f} parses/s")
+    print(f"dateutil:  {baseline:10.0f} parses/s  ({tiered / baseline:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Cold-start budget check for the headless core.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for each
+module and fails if its cumulative import time exceeds the budget.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/import_time.py
+"""
+import os
+import re
+import subprocess
+import sys
+
+# Cumulative import time budgets in milliseconds
+IMPORT_BUDGETS_MS = {
+    "refiner": 5,
+    "refiner.timeparse": 150,
+    "refiner.cascade": 150,
+    "refiner.llm": 300,
+}
+
+# Modules that must not be pulled in by importing the timestamp code
+HEAVY_MODULES = ["streamlit", "timezonefinder", "geopy", "numpy", "requests"]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure_import(module):
+    """
+    Return (cumulative import time in ms, set of modules imported) for one module.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    imported = set()
+    cumulative_us = 0
+    for line in proc.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|(\s*)(\S+)", line)
+        if not match:
+            continue
+        imported.add(match.group(3))
+        if match.group(3) == module:
+            cumulative_us = int(match.group(1))
+    return cumulative_us / 1000, imported
+
+def main():
+    failed = False
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        elapsed, imported = measure_import(module)
+        status = "ok" if elapsed <= budget else "OVER BUDGET"
+        failed |= elapsed > budget
+        print(f"{module:<20} {elapsed:8.1f} ms  (budget {budget} ms)  {status}")
+        if module in ("refiner.timeparse", "refiner.cascade"):
+            heavy = [name for name in HEAVY_MODULES if name in imported]
+            if heavy:
+                failed = True
+                print(f"  imports heavy modules at startup: {', '.join(heavy)}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+JSON extraction and schema validation on large and malformed LLM replies.
+
+Compares the original greedy regex + json.loads with the string-aware scanner.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/json_extraction.py --operations 200
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from refiner.jsonstream import extract_json_object
+from refiner.schema import validate_result
+from stub_llm_server import DEFAULT_REPLY
+
+def greedy_regex(content):
+    match = re.search(r"{.*}", content, re.DOTALL)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group())
+    except json.JSONDecodeError:
+        return None
+
+def scanner(content):
+    try:
+        found = extract_json_object(content)
+    except json.JSONDecodeError:
+        return None
+    return found[0] if found else None
+
+def build_cases(operations):
+    result = json.loads(DEFAULT_REPLY)
+    result["cascade_schema"] = result["cascade_schema"] * operations
+    body = json.dumps(result, indent=2)
+    return {
+        "clean": body,
+        "fenced + prose": f"Here is your plan:\n```json\n{body}\n```\nWould you like to proceed?",
+        "trailing braces": f"{body}\nNote: amounts use {{token}} placeholders.",
+        "truncated": body[: len(body) // 2],
+        "prose only": "Which wallet address should the swap use? " * 200,
+    }
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="JSON extraction benchmark")
+    arg_parser.add_argument("--operations", type=int, default=200)
+    arg_parser.add_argument("--number", type=int, default=50)
+    args = arg_parser.parse_args()
+
+    print(f"{'case':<16} {'size':>8} {'regex ms':>9} {'ok':>3} {'scanner ms':>11} {'ok':>3}")
+    for name, content in build_cases(args.operations).items():
+        regex_ms = timeit.timeit(lambda: greedy_regex(content), number=args.number) / args.number * 1000
+        scanner_ms = timeit.timeit(lambda: scanner(content), number=args.number) / args.number * 1000
+        print(f"{name:<16} {len(content):>8} {regex_ms:>9.3f} {'y' if greedy_regex(content) else 'n':>3} "
+              f"{scanner_ms:>11.3f} {'y' if scanner(content) else 'n':>3}")
+
+    result = json.loads(build_cases(args.operations)["clean"])
+    validate_ms = timeit.timeit(lambda: validate_result(result), number=args.number) / args.number * 1000
+    print(f"schema validation of {args.operations} operations: {validate_ms:.3f} ms, "
+          f"{len(validate_result(result))} error(s)")
+
+if __name__ == "__main__":
+    main()
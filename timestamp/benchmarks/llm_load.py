@@ -0,0 +1,72 @@
+"""
+Load benchmark for the pooled Groq client against the local stub server.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/llm_load.py --requests 500 --concurrency 32 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from refiner.client import LLMClient
+from refiner.llm import refine_with_llm_conversation_async
+from refiner.response_cache import ResponseCache
+from stub_llm_server import start_stub_server
+
+def percentile(sorted_values, fraction):
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+async def run_load(client, total, concurrency):
+    # Every request repeats the same prompt, so bypass the response cache to measure the client
+    cache = ResponseCache(ttl=0)
+    latencies = []
+    failures = 0
+    convo = [{"role": "user", "content": "Swap 1 ETH to USDC on April 25, 2025 at 3:00 PM PKT"}]
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async def worker():
+        nonlocal failures
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            result, _ = await refine_with_llm_conversation_async(convo, client=client, cache=cache)
+            latencies.append(time.perf_counter() - started)
+            failures += result is None
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, failures, time.perf_counter() - started
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Pooled LLM client load benchmark")
+    arg_parser.add_argument("--requests", type=int, default=500)
+    arg_parser.add_argument("--concurrency", type=int, default=32)
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="stub seconds per response")
+    arg_parser.add_argument("--error-rate", type=float, default=0.05, help="stub fraction of 429/503")
+    args = arg_parser.parse_args()
+
+    server, url = start_stub_server(latency=args.latency, error_rate=args.error_rate)
+    client = LLMClient(url=url, api_key="stub", backoff_base=0.01, pool_size=args.concurrency,
+                       max_concurrency=args.concurrency)
+    try:
+        latencies, failures, elapsed = asyncio.run(run_load(client, args.requests, args.concurrency))
+    finally:
+        client.close()
+        server.shutdown()
+
+    latencies.sort()
+    print(f"requests:    {args.requests} (concurrency {args.concurrency}, failures {failures})")
+    print(f"throughput:  {args.requests / elapsed:.1f} req/s")
+    print(f"latency p50: {percentile(latencies, 0.50) * 1000:.1f} ms")
+    print(f"latency p99: {percentile(latencies, 0.99) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Streaming benchmark: time to first token, first finished operation and full reply.
+
+Compares stream_refine_with_llm_conversation with the blocking call against the
+local SSE stub, using a reply with several cascade_schema operations.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/llm_stream.py --operations 5 --token-delay 0.005
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from refiner.client import LLMClient
+from refiner.llm import refine_with_llm_conversation, stream_refine_with_llm_conversation
+from refiner.response_cache import ResponseCache
+from stub_llm_server import DEFAULT_REPLY, start_stub_server
+
+def build_reply(operations):
+    template = json.loads(DEFAULT_REPLY)
+    template["cascade_schema"] = template["cascade_schema"] * operations
+    return json.dumps(template, indent=4)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Streaming LLM reply benchmark")
+    arg_parser.add_argument("--operations", type=int, default=5)
+    arg_parser.add_argument("--token-delay", type=float, default=0.005)
+    arg_parser.add_argument("--runs", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    server, url = start_stub_server(reply=build_reply(args.operations), token_delay=args.token_delay)
+    client = LLMClient(url=url, api_key="stub")
+    # Each run repeats the same prompt, so bypass the response cache to time the stub replies
+    cache = ResponseCache(ttl=0)
+    convo = [{"role": "user", "content": "Swap 1 ETH to USDC on April 25, 2025 at 3:00 PM PKT"}]
+    try:
+        for run in range(args.runs):
+            marks = {}
+            started = time.perf_counter()
+
+            def on_item(index, item):
+                marks.setdefault("first_operation", time.perf_counter() - started)
+
+            def on_text(text):
+                marks.setdefault("first_token", time.perf_counter() - started)
+
+            result, _ = stream_refine_with_llm_conversation(convo, on_text=on_text, on_item=on_item, client=client,
+                                                             cache=cache)
+            streamed_total = time.perf_counter() - started
+
+            started = time.perf_counter()
+            refine_with_llm_conversation(convo, client=client, cache=cache)
+            blocking_total = time.perf_counter() - started
+
+            print(f"run {run + 1}: operations {len(result['cascade_schema'])}, "
+                  f"first operation {marks.get('first_operation', float('nan')) * 1000:.0f} ms, "
+                  f"stream total {streamed_total * 1000:.0f} ms, "
+                  f"blocking total {blocking_total * 1000:.0f} ms")
+    finally:
+        client.close()
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
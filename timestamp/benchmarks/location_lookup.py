@@ -0,0 +1,94 @@
+"""
+Location -> timezone latency: offline gazetteer, location cache hits and the geocoder path.
+
+Nominatim is only called with --live (it allows one request per second, so keep
+--live-samples small); otherwise the geocoder miss is a fake with --geocoder-latency
+seconds of delay in front of the real TimezoneFinder.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/location_lookup.py
+    python benchmarks/location_lookup.py --live --live-samples 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import timeit
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from refiner.timezones import (
+    LocationTimezoneCache,
+    get_geolocator,
+    get_timezone_finder,
+    resolve_offline_timezone,
+)
+
+GAZETTEER_PLACES = ["Islamabad", "Lahore, Pakistan", "New York", "London", "Tokyo", "São Paulo", "I-9/3, Islamabad"]
+# (query, lat, lng) for the fake geocoder: places the gazetteer does not know
+GEOCODED_PLACES = [
+    ("Gilgit", 35.9208, 74.3089),
+    ("Hobart", -42.8821, 147.3272),
+    ("Boulder, Colorado", 40.015, -105.2705),
+    ("Tromsø", 69.6492, 18.9553),
+    ("Cusco", -13.532, -71.9675),
+]
+
+Location = namedtuple("Location", ["latitude", "longitude"])
+
+class FakeGeocoder:
+    def __init__(self, latency):
+        self.latency = latency
+        self.places = {query: Location(lat, lng) for query, lat, lng in GEOCODED_PLACES}
+
+    def geocode(self, query, timeout=10):
+        time.sleep(self.latency)
+        return self.places.get(query)
+
+def per_call_us(func, items, number):
+    return timeit.timeit(lambda: [func(item) for item in items], number=number) / (number * len(items)) * 1e6
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Location timezone lookup benchmark")
+    arg_parser.add_argument("--number", type=int, default=2000)
+    arg_parser.add_argument("--geocoder-latency", type=float, default=0.25,
+                            help="seconds the fake geocoder waits, roughly a Nominatim round trip")
+    arg_parser.add_argument("--live", action="store_true", help="time real Nominatim requests")
+    arg_parser.add_argument("--live-samples", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    finder = get_timezone_finder()
+    queries = [query for query, _, _ in GEOCODED_PLACES]
+    print(f"{'path':<34} {'per lookup':>14}")
+    print(f"{'gazetteer':<34} {per_call_us(resolve_offline_timezone, GAZETTEER_PLACES, args.number):>11.2f} us")
+
+    db_path = os.path.join(tempfile.mkdtemp(), "tz_cache.sqlite3")
+    cache = LocationTimezoneCache(FakeGeocoder(args.geocoder_latency), finder, db_path=db_path)
+    started = time.perf_counter()
+    for query in queries:
+        cache.lookup(query)
+    miss = (time.perf_counter() - started) / len(queries) * 1e6
+    print(f"{'cache hit (memory LRU)':<34} {per_call_us(cache.lookup, queries, args.number):>11.2f} us")
+    # A second cache on the same file starts with an empty LRU, so lookups come from SQLite
+    disk_cache = LocationTimezoneCache(FakeGeocoder(args.geocoder_latency), finder, db_path=db_path, maxsize=0)
+    print(f"{'cache hit (SQLite)':<34} {per_call_us(disk_cache.lookup, queries, args.number // 10):>11.2f} us")
+    print(f"{'miss, fake geocoder + finder':<34} {miss:>11.0f} us  ({args.geocoder_latency * 1000:.0f} ms simulated)")
+
+    if args.live:
+        live = LocationTimezoneCache(get_geolocator(), finder, db_path=None)
+        samples = []
+        for query in queries[:args.live_samples]:
+            started = time.perf_counter()
+            tz_name = live.lookup(query)
+            samples.append(time.perf_counter() - started)
+            print(f"  Nominatim {query!r}: {tz_name} in {samples[-1] * 1000:.0f} ms")
+            time.sleep(1)
+        if live.stats["errors"] == len(samples):
+            print("  every Nominatim request failed (network unavailable?)")
+        else:
+            print(f"{'miss, Nominatim + finder':<34} {sum(samples) / len(samples) * 1e6:>11.0f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Cost of the metrics layer on the timestamp hot path, disabled vs enabled.
+
+Runs cascade normalization over offline-resolvable locations (no network) with
+REFINER_METRICS off and on, then prints one turn's stage breakdown and a sample of
+the Prometheus output.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/metrics_overhead.py --operations 2000
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from refiner import metrics
+from refiner.cascade import normalize_cascade_schema
+
+TIMES = ["April 25, 2025 3:00 PM", "25 02 2025 5:00 PM PKT", "2025-03-09 02:30", "", "next blue moon"]
+LOCATIONS = ["Islamabad", "New York", "London", "Tokyo", "Unknown"]
+
+def build_result(operations):
+    return {"cascade_schema": [
+        {
+            "time": {"user_time": TIMES[n % len(TIMES)]},
+            "description": f"Swap {n} ETH to USDC",
+            "location": LOCATIONS[n % len(LOCATIONS)],
+        }
+        for n in range(operations)
+    ]}
+
+def timed_run(operations, enabled):
+    metrics.enable_metrics(enabled)
+    result = build_result(operations)
+    started = time.perf_counter()
+    with metrics.trace_turn():
+        for item in result["cascade_schema"]:
+            normalize_cascade_schema({"cascade_schema": [item]})
+    return time.perf_counter() - started
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Metrics overhead benchmark")
+    arg_parser.add_argument("--operations", type=int, default=2000)
+    arg_parser.add_argument("--rounds", type=int, default=5)
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    
+    timed_run(200, False)  # warm caches and imports
+    disabled = min(timed_run(args.operations, False) for _ in range(args.rounds))
+    enabled = min(timed_run(args.operations, True) for _ in range(args.rounds))
+    per_op = (enabled - disabled) / args.operations * 1e6
+    print(f"operations:        {args.operations}")
+    print(f"metrics disabled:  {disabled * 1000:.1f} ms ({disabled / args.operations * 1e6:.1f} us/op)")
+    print(f"metrics enabled:   {enabled * 1000:.1f} ms ({enabled / args.operations * 1e6:.1f} us/op)")
+    print(f"overhead enabled:  {per_op:.1f} us/op")
+    
+    trace = metrics.recent_traces[-1]
+    print("\nstage breakdown of the last run:")
+    for name, seconds, calls in trace.breakdown():
+        print(f"  {name:<18} {seconds * 1000:8.1f} ms  {calls:6d} calls")
+    print(f"  counters: {trace.counters}")
+    print("\nprometheus sample:")
+    print("\n".join(line for line in metrics.render_prometheus().splitlines() if "_bucket" not in line))
+
+if __name__ == "__main__":
+    main()
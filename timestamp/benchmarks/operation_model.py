@@ -0,0 +1,75 @@
+"""
+Memory and serialization cost of the typed operation model versus nested dicts.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/operation_model.py --operations 100000
+"""
+import argparse
+import copy
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from refiner.model import CascadeResult
+from stub_llm_server import DEFAULT_REPLY
+
+def sample_result(operations):
+    result = json.loads(DEFAULT_REPLY)
+    operation = result["cascade_schema"][0]
+    operation["control_flow"] = [{
+        "type": "COMPOSIT",
+        "logicalOperator": "AND",
+        "conditions": [{"field": "price", "operator": "GREATER", "value": "3000", "unit": "USD"}],
+        "opera": {"intent": "REQUEST", "action": "WRITE",
+                  "entity": {"type": "DEX", "context": {"command": "SWAP", "token": "ETH", "amount": "1"}}},
+    }]
+    operation["fallback"] = {"intent": "REQUEST", "action": "READ", "entity": {"type": "WALLET", "context": {}}}
+    result["cascade_schema"] = [dict(operation, description=f"Swap {n} ETH") for n in range(operations)]
+    return result
+
+def measure(label, build):
+    started = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - started
+    # Second build under tracemalloc, which would distort the timing
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {elapsed * 1000:>9.1f} ms {size / 2**20:>9.1f} MiB")
+    return value
+
+def timed(label, func, size=None):
+    started = time.perf_counter()
+    value = func()
+    elapsed = time.perf_counter() - started
+    extra = f" {len(value) / 2**20:>9.1f} MiB" if size else ""
+    print(f"{label:<28} {elapsed * 1000:>9.1f} ms{extra}")
+    return value
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Typed operation model benchmark")
+    arg_parser.add_argument("--operations", type=int, default=100000)
+    args = arg_parser.parse_args()
+
+    text = json.dumps(sample_result(args.operations))
+    print(f"{args.operations} operations")
+    dicts = measure("build nested dicts", lambda: json.loads(text))
+    typed = measure("build typed model", lambda: CascadeResult.from_dict(json.loads(text)))
+    timed("from_dict", lambda: CascadeResult.from_dict(dicts))
+    timed("to_dict", typed.to_dict)
+    timed("dict deepcopy (baseline)", lambda: copy.deepcopy(dicts))
+    timed("json.dumps indent=2 x2 (old)", lambda: json.dumps(dicts, indent=2) + json.dumps(dicts, indent=2), size=True)
+    timed("to_json once", typed.to_json, size=True)
+    packed = timed("to_msgpack", typed.to_msgpack, size=True)
+    timed("from_msgpack", lambda: CascadeResult.from_msgpack(packed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Record LLM and geocoder traffic into benchmarks/fixtures/replay.json for the replay suite.
+
+Entries already in the fixture are kept; only misses go to the live services.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/record_fixtures.py                 # Groq (GROQ_API_KEY) + Nominatim
+    python benchmarks/record_fixtures.py --stub          # local stub LLM instead of Groq
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from refiner.cascade import normalize_cascade_schema
+from refiner.client import LLMClient
+from refiner.llm import get_api_key, refine_with_llm_conversation
+from refiner.response_cache import ResponseCache
+from refiner.timezones import get_geolocator, get_timezone_finder, resolve_location_timezone, set_location_tz_cache
+from replay import FIXTURE_PATH, Fixture, FixtureLLMClient, fixture_location_cache
+from stub_llm_server import start_stub_server
+
+# Conversations replayed by the suite; each is recorded as one request
+CONVERSATIONS = [
+    [{"role": "user", "content": "Swap 1 ETH to USDC on April 25, 2025 at 3:00 PM PKT"}],
+    [{"role": "user", "content": "Buy 0.5 BTC tomorrow at 9 from my wallet in Gilgit"}],
+    [{"role": "user", "content": "Every Monday 10am stake 100 USDC on Aave, I'm in Hobart"}],
+    [{"role": "user", "content": "Sell my NFT before Friday if the floor price is above 2 ETH"}],
+    [
+        {"role": "user", "content": "Bridge 500 USDT to Arbitrum"},
+        {"role": "assistant", "content": "When should the bridge run, and from which wallet address?"},
+        {"role": "user", "content": "In 2 hours, from 0xabc123 - I'm in Boulder, Colorado"},
+    ],
+]
+
+# Places outside the offline gazetteer, so resolving them needs the geocoder
+LOCATIONS = ["Gilgit", "Hobart", "Boulder, Colorado", "Tromsø", "Cusco", "Sector 9 Township"]
+
+# Reply served by --stub: one operation per shape the suite exercises
+STUB_REPLY = "```json\n" + json.dumps({
+    "agenda_specs": {"attributes": "Agenda-Specs: replay"},
+    "cascade_schema": [
+        {"type": "OPERATION_MATRIX", "contingency": "CERTAIN",
+         "time": {"temporal_state": "FUTURE", "user_time": user_time, "exec_time": "Unix Standard Timestamp", "constraint": "EXACTLY"},
+         "description": description, "location": location, "control_flow": [], "fallback": {}}
+        for user_time, description, location in [
+            ("April 25, 2025 3:00 PM PKT", "Swap 1 ETH to USDC", "Islamabad"),
+            ("tomorrow at 9", "Buy 0.5 BTC", "Gilgit"),
+            ("every Monday 10am", "Stake 100 USDC on Aave", "Hobart"),
+            ("before Friday", "Sell NFT if floor price is above 2 ETH", "Boulder, Colorado"),
+            ("", "Bridge 500 USDT to Arbitrum on 2025-06-01 18:00", "Cusco"),
+        ]
+    ],
+}, indent=2) + "\n```\nWould you like to proceed?"
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Record replay fixtures")
+    arg_parser.add_argument("--stub", action="store_true", help="record the local stub LLM instead of Groq")
+    arg_parser.add_argument("--output", default=FIXTURE_PATH)
+    args = arg_parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    server = None
+    if args.stub:
+        server, url = start_stub_server(reply=STUB_REPLY)
+        live_client = LLMClient(url=url, api_key="stub")
+    else:
+        live_client = LLMClient(api_key=get_api_key)
+    fixture = Fixture(args.output)
+    client = FixtureLLMClient(fixture, live_client)
+    set_location_tz_cache(fixture_location_cache(fixture, get_geolocator(), get_timezone_finder()))
+    try:
+        for convo in CONVERSATIONS:
+            result, reply = refine_with_llm_conversation(convo, client=client, cache=ResponseCache(ttl=0))
+            if result:
+                normalize_cascade_schema(result)
+            print(f"recorded: {convo[-1]['content'][:60]!r} -> {'json' if result else reply[:40]!r}")
+        for location in LOCATIONS:
+            print(f"recorded: {location!r} -> {resolve_location_timezone(location)}")
+    finally:
+        live_client.close()
+        if server is not None:
+            server.shutdown()
+    fixture.save()
+    print(f"saved {args.output}: " + ", ".join(f"{len(entries)} {section}" for section, entries in fixture.data.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Expansion of recurring exec_time schedules: chunked NumPy expansion vs a per-occurrence loop.
+
+The baseline walks dateutil's rrule and localizes every occurrence with pytz; the
+chunked expansion converts whole arrays of wall-clock times at once. Both must agree,
+including across DST changes.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/recurrence_expansion.py --occurrences 20000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytz
+from dateutil import rrule
+
+from refiner.relative import iter_exec_times, parse_relative_time
+
+RULES = [
+    ("every day at 2:30am", "America/New_York"),
+    ("every weekday at 9am", "Europe/London"),
+    ("every other week on tuesday and thursday at 8:30", "Australia/Sydney"),
+    ("monthly on the 31st at noon", "Asia/Karachi"),
+    ("every 15 minutes", "America/Chicago"),
+]
+_RRULE_FREQ = {"MINUTELY": rrule.MINUTELY, "HOURLY": rrule.HOURLY, "DAILY": rrule.DAILY, "WEEKLY": rrule.WEEKLY, "MONTHLY": rrule.MONTHLY}
+
+def baseline(recurrence, tz, start, limit):
+    # Sub-daily rules step in UTC; the others step in local wall-clock time
+    local_start = datetime.fromtimestamp(start, tz).replace(tzinfo=None, second=0)
+    sub_daily = recurrence.freq in ("MINUTELY", "HOURLY")
+    dtstart = datetime.utcfromtimestamp(start - start % 60) if sub_daily else local_start.replace(
+        hour=local_start.hour if recurrence.hour is None else recurrence.hour,
+        minute=local_start.minute if recurrence.minute is None else recurrence.minute,
+    )
+    if recurrence.bymonthday:
+        # Start at the top of the month so this month's occurrence is not skipped
+        dtstart = dtstart.replace(day=1)
+    rule = rrule.rrule(
+        _RRULE_FREQ[recurrence.freq], dtstart=dtstart,
+        interval=recurrence.interval,
+        byweekday=recurrence.byweekday or None,
+        bymonthday=recurrence.bymonthday,
+    )
+    epochs = []
+    for occurrence in rule:
+        epoch = int(pytz.UTC.localize(occurrence).timestamp()) if sub_daily else int(tz.localize(occurrence).timestamp())
+        if epoch >= start:
+            epochs.append(epoch)
+            if len(epochs) == limit:
+                break
+    return np.array(epochs, dtype=np.int64)
+
+def chunked(recurrence, tz, start, limit):
+    chunks, total = [], 0
+    for chunk in iter_exec_times(recurrence, tz, start, chunk_size=4096):
+        chunks.append(chunk)
+        total += len(chunk)
+        if total >= limit:
+            break
+    return np.concatenate(chunks)[:limit]
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Recurrence expansion benchmark")
+    arg_parser.add_argument("--occurrences", type=int, default=20000)
+    args = arg_parser.parse_args()
+    start = int(pytz.UTC.localize(datetime(2025, 3, 1, 12, 0)).timestamp())
+
+    print(f"{'rule':<66} {'loop':>10} {'chunked':>10} {'speedup':>8}  match")
+    for text, zone in RULES:
+        tz = pytz.timezone(zone)
+        recurrence = parse_relative_time(text, tz, start).recurrence
+        started = time.perf_counter()
+        expected = baseline(recurrence, tz, start, args.occurrences)
+        loop = time.perf_counter() - started
+        started = time.perf_counter()
+        actual = chunked(recurrence, tz, start, args.occurrences)
+        fast = time.perf_counter() - started
+        match = len(expected) == len(actual) and bool((expected == actual).all())
+        print(f"{text + ' ' + zone:<66} {loop * 1000:8.1f}ms {fast * 1000:8.1f}ms {loop / fast:7.1f}x  {match}")
+
+if __name__ == "__main__":
+    main()
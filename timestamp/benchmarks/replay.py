@@ -0,0 +1,141 @@
+"""
+Record/replay of LLM and geocoder traffic, so the refiner can run deterministically offline.
+
+A fixture file holds Groq responses keyed by the request (the response cache key of the
+payload), geocoder results keyed by normalized query, and TimezoneFinder results keyed by
+coordinates. Each Fixture* wrapper answers from the fixture; given a live client it
+forwards misses to it and records the answer.
+
+    fixture = Fixture("benchmarks/fixtures/replay.json")
+    client = FixtureLLMClient(fixture)              # replay only, raises LookupError on a miss
+    client = FixtureLLMClient(fixture, LLMClient()) # record misses from the live API
+    set_location_tz_cache(fixture_location_cache(fixture))
+"""
+import json
+import os
+import sys
+import threading
+from collections import namedtuple
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from refiner.response_cache import ResponseCache
+from refiner.timezones import LocationTimezoneCache
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "replay.json")
+
+Location = namedtuple("Location", ["latitude", "longitude"])
+
+class Fixture:
+    """
+    Recorded traffic, loaded from and saved to a JSON file.
+    """
+
+    def __init__(self, path=FIXTURE_PATH):
+        self.path = path
+        self.data = {"llm": {}, "geocode": {}, "timezone_at": {}}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.data.update(json.load(f))
+        self._lock = threading.Lock()
+
+    def get(self, section, key):
+        return self.data[section].get(key)
+
+    def has(self, section, key):
+        return key in self.data[section]
+
+    def put(self, section, key, value):
+        with self._lock:
+            self.data[section][key] = value
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, sort_keys=True, ensure_ascii=False)
+            f.write("\n")
+
+def _llm_key(payload, stream):
+    return ResponseCache.key(payload) + (":stream" if stream else "")
+
+def _response(status, body):
+    # A requests.Response with its body already in memory, so json(), text and iter_lines() all work
+    res = requests.Response()
+    res.status_code = status
+    res._content = body.encode("utf-8")
+    res._content_consumed = True
+    res.encoding = "utf-8"
+    return res
+
+class FixtureLLMClient:
+    """
+    Stand-in for LLMClient that answers from a fixture and optionally records misses.
+    """
+
+    def __init__(self, fixture, live=None):
+        self.fixture = fixture
+        self.live = live
+
+    def post(self, payload, stream=False):
+        key = _llm_key(payload, stream)
+        entry = self.fixture.get("llm", key)
+        if entry is None:
+            if self.live is None:
+                raise LookupError(f"No recorded LLM response for request {key[:12]}; re-record the fixture")
+            res = self.live.post(payload, stream=stream)
+            user_messages = [m["content"] for m in payload["messages"] if m["role"] == "user"]
+            entry = {"status": res.status_code, "body": res.text, "prompt": user_messages[-1] if user_messages else ""}
+            self.fixture.put("llm", key, entry)
+        return _response(entry["status"], entry["body"])
+
+    async def apost(self, payload):
+        return self.post(payload)
+
+    def close(self):
+        pass
+
+class FixtureGeocoder:
+    """
+    geopy-style geocoder answering from a fixture; unresolvable places are recorded as null.
+    """
+
+    def __init__(self, fixture, live=None):
+        self.fixture = fixture
+        self.live = live
+
+    def geocode(self, query, timeout=10):
+        key = " ".join(query.lower().split())
+        if not self.fixture.has("geocode", key):
+            if self.live is None:
+                raise LookupError(f"No recorded geocoder result for {query!r}")
+            loc = self.live.geocode(query, timeout=timeout)
+            self.fixture.put("geocode", key, [loc.latitude, loc.longitude] if loc else None)
+        value = self.fixture.get("geocode", key)
+        return Location(*value) if value else None
+
+class FixtureFinder:
+    """
+    TimezoneFinder stand-in answering from a fixture.
+    """
+
+    def __init__(self, fixture, live=None):
+        self.fixture = fixture
+        self.live = live
+
+    def timezone_at(self, lat, lng):
+        key = f"{lat:.6f},{lng:.6f}"
+        if not self.fixture.has("timezone_at", key):
+            if self.live is None:
+                raise LookupError(f"No recorded timezone for {key}")
+            self.fixture.put("timezone_at", key, self.live.timezone_at(lat=lat, lng=lng))
+        return self.fixture.get("timezone_at", key)
+
+def fixture_location_cache(fixture, live_geocoder=None, live_finder=None):
+    """
+    A memory-only LocationTimezoneCache backed by the fixture instead of Nominatim.
+    """
+    return LocationTimezoneCache(
+        FixtureGeocoder(fixture, live_geocoder), FixtureFinder(fixture, live_finder), db_path=None
+    )
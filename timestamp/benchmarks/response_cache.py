@@ -0,0 +1,54 @@
+"""
+Response cache benchmark: hit ratio and latency saved on a workload with repeated requests.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/response_cache.py --requests 200 --distinct 40 --latency 0.1
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from refiner.client import LLMClient
+from refiner.llm import refine_with_llm_conversation
+from refiner.response_cache import ResponseCache
+from stub_llm_server import start_stub_server
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="LLM response cache benchmark")
+    arg_parser.add_argument("--requests", type=int, default=200)
+    arg_parser.add_argument("--distinct", type=int, default=40, help="distinct prompts in the workload")
+    arg_parser.add_argument("--latency", type=float, default=0.1, help="stub seconds per response")
+    args = arg_parser.parse_args()
+
+    server, url = start_stub_server(latency=args.latency)
+    client = LLMClient(url=url, api_key="stub")
+    cache = ResponseCache(db_path=None)
+    random.seed(7)
+    prompts = [f"Swap {n} ETH to USDC on April 25, 2025 at 3:00 PM PKT" for n in range(args.distinct)]
+    hit_times, miss_times = [], []
+    try:
+        for _ in range(args.requests):
+            # Users retype the same request with stray whitespace
+            prompt = random.choice(prompts) + " " * random.randint(0, 2)
+            hits_before = cache.stats["hits"]
+            started = time.perf_counter()
+            refine_with_llm_conversation([{"role": "user", "content": prompt}], client=client, cache=cache)
+            elapsed = time.perf_counter() - started
+            (hit_times if cache.stats["hits"] > hits_before else miss_times).append(elapsed)
+    finally:
+        client.close()
+        server.shutdown()
+
+    print(f"requests:      {args.requests} ({args.distinct} distinct prompts)")
+    print(f"hit ratio:     {cache.hit_ratio():.1%}")
+    print(f"mean latency:  hit {sum(hit_times) / max(len(hit_times), 1) * 1000:.2f} ms, "
+          f"miss {sum(miss_times) / max(len(miss_times), 1) * 1000:.1f} ms")
+    print(f"time saved:    {cache.stats['seconds_saved']:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Load benchmark for the headless HTTP API (refiner.service) with the LLM replaced by the local stub.
+
+Requests beyond --concurrency + --max-queue are rejected with 503; those are counted
+separately so the admission limit shows up in the numbers.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/service_load.py --requests 1000 --clients 64 --concurrency 16 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import aiohttp
+from aiohttp import web
+
+from stub_llm_server import start_stub_server
+
+def percentile(sorted_values, fraction):
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+async def run_load(app, total, clients):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/refine"
+    
+    latencies = []
+    statuses = {}
+    remaining = total
+    
+    async def worker(session):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            async with session.post(url, json={"message": "Swap 1 ETH to USDC on April 25, 2025 at 3:00 PM PKT"}) as res:
+                await res.read()
+            latencies.append(time.perf_counter() - started)
+            statuses[res.status] = statuses.get(res.status, 0) + 1
+    
+    connector = aiohttp.TCPConnector(limit=clients)
+    started = time.perf_counter()
+    try:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await asyncio.gather(*(worker(session) for _ in range(clients)))
+    finally:
+        elapsed = time.perf_counter() - started
+        await runner.cleanup()
+    return latencies, statuses, elapsed
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Headless refiner API load benchmark")
+    arg_parser.add_argument("--requests", type=int, default=1000)
+    arg_parser.add_argument("--clients", type=int, default=64, help="concurrent HTTP clients")
+    arg_parser.add_argument("--concurrency", type=int, default=16, help="service admission limit")
+    arg_parser.add_argument("--max-queue", type=int, default=64)
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="stub seconds per response")
+    args = arg_parser.parse_args()
+    
+    server, stub_url = start_stub_server(latency=args.latency)
+    # Configure the process-wide client and cache before refiner reads the environment
+    os.environ["GROQ_API_URL"] = stub_url
+    os.environ["GROQ_API_KEY"] = "stub"
+    os.environ["GROQ_POOL_SIZE"] = str(args.concurrency)
+    os.environ["GROQ_MAX_CONCURRENCY"] = str(args.concurrency)
+    os.environ["LLM_CACHE_TTL"] = "0"
+    from refiner.service import create_app
+    
+    app = create_app(concurrency=args.concurrency, max_queue=args.max_queue)
+    try:
+        latencies, statuses, elapsed = asyncio.run(run_load(app, args.requests, args.clients))
+    finally:
+        server.shutdown()
+    
+    latencies.sort()
+    ok = statuses.get(200, 0)
+    print(f"requests:    {args.requests} ({args.clients} clients, admission {args.concurrency}+{args.max_queue})")
+    print("status:      " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+    print(f"throughput:  {ok / elapsed:.1f} ok req/s")
+    print(f"latency p50: {percentile(latencies, 0.50) * 1000:.1f} ms")
+    print(f"latency p99: {percentile(latencies, 0.99) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
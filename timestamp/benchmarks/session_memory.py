@@ -0,0 +1,100 @@
+"""
+Memory and throughput of the session stores with many concurrent chat sessions.
+
+Each simulated session plays --turns turns (load the history, append a user prompt and
+an assistant reply carrying the rendered JSON result) from a pool of threads. Throughput
+is measured in one pass; memory in a second pass under tracemalloc, counting what is
+retained once all sessions are written. The baseline is the old per-session list of
+{"role", "content"} dicts.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/session_memory.py --sessions 1000 --turns 10 --threads 32
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from refiner.jsonstream import extract_json_object
+from refiner.model import CascadeResult
+from refiner.sessions import InMemorySessionStore, LRUSessionStore, SQLiteSessionStore
+from stub_llm_server import DEFAULT_REPLY
+
+RESULT_STR = CascadeResult.from_dict(extract_json_object(DEFAULT_REPLY)[0]).to_json()
+
+def build_turn(session_id, turn):
+    # Fresh strings per session, as each browser session built its own
+    user = {"role": "user", "content": f"Swap {turn + 1} ETH to USDC on April 25, 2025 at 3:00 PM PKT ({session_id})"}
+    assistant = {"role": "assistant", "content": f"```json\n{RESULT_STR}\n```\nWould you like to proceed? ({session_id})"}
+    return user, assistant
+
+def run_sessions(store, sessions, turns, threads):
+    """
+    Play every session turn by turn (load history, then append the turn) on a thread pool.
+
+    Returns:
+        tuple: (turns per second, sorted per-turn latencies in seconds)
+    """
+    latencies = []
+    lock = threading.Lock()
+
+    def play(session_id):
+        local = []
+        for turn in range(turns):
+            user, assistant = build_turn(session_id, turn)
+            started = time.perf_counter()
+            store.load(session_id)
+            store.append(session_id, user, assistant)
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(play, [f"session-{number}" for number in range(sessions)]))
+    elapsed = time.perf_counter() - started
+    return sessions * turns / elapsed, sorted(latencies)
+
+def measure(name, make_store, args):
+    rate, latencies = run_sessions(make_store(), args.sessions, args.turns, args.threads)
+    tracemalloc.start()
+    store = make_store()
+    run_sessions(store, args.sessions, args.turns, args.threads)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    p50 = latencies[len(latencies) // 2] * 1e3
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e3
+    print(f"{name:<22} {retained / 2**20:9.1f} MiB {retained / args.sessions / 1024:9.1f} KiB/session "
+          f"{rate:9.0f} turns/s  p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  sessions kept {len(store)}")
+    return store
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Session store memory benchmark")
+    arg_parser.add_argument("--sessions", type=int, default=1000)
+    arg_parser.add_argument("--turns", type=int, default=10)
+    arg_parser.add_argument("--threads", type=int, default=32)
+    arg_parser.add_argument("--max-bytes", type=int, default=256 * 1024)
+    args = arg_parser.parse_args()
+
+    user, assistant = build_turn("session-0", 0)
+    print(f"{args.sessions} sessions x {args.turns} turns, {args.threads} threads; "
+          f"assistant message {len(assistant['content'])} chars")
+    measure("unbounded dicts", InMemorySessionStore, args)
+    measure("LRU, compact", lambda: LRUSessionStore(max_bytes=args.max_bytes), args)
+    measure("LRU, 2 KiB cap", lambda: LRUSessionStore(max_bytes=2 * 1024), args)
+    measure("LRU, 500 sessions", lambda: LRUSessionStore(max_sessions=500, max_bytes=args.max_bytes), args)
+    directory = tempfile.mkdtemp()
+    paths = iter(os.path.join(directory, f"sessions-{number}.sqlite3") for number in range(2))
+    store = measure("SQLite", lambda: SQLiteSessionStore(next(paths), max_bytes=args.max_bytes), args)
+    store.close()
+    print(f"SQLite file: {os.path.getsize(os.path.join(directory, 'sessions-1.sqlite3')) / 2**20:.1f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Local stand-in for the Groq chat completions endpoint.
+
+Answers every POST with a canned completion after a configurable delay and can
+inject 429/503 responses to exercise the client's retry path. Requests with
+"stream": true get the completion as server-sent events, a few characters per
+event with a configurable delay between them.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/stub_llm_server.py --port 8765 --latency 0.05 --error-rate 0.1
+    GROQ_API_URL=http://127.0.0.1:8765/v1/chat/completions streamlit run main.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = json.dumps({
+    "agenda_specs": {"attributes": "Agenda-Specs: stub"},
+    "cascade_schema": [
+        {
+            "type": "OPERATION_MATRIX",
+            "contingency": "CERTAIN",
+            "time": {
+                "temporal_state": "FUTURE",
+                "user_time": "April 25, 2025 3:00 PM PKT",
+                "exec_time": "Unix Standard Timestamp",
+                "constraint": "EXACTLY"
+            },
+            "description": "Swap 1 ETH to USDC on April 25, 2025 at 3:00 PM PKT",
+            "control_flow": [],
+            "fallback": {}
+        }
+    ]
+})
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection pooling is measurable
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, content, chunk_size, token_delay):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        events = [
+            {"choices": [{"delta": {"content": content[i:i + chunk_size]}}]}
+            for i in range(0, len(content), chunk_size)
+        ]
+        for event in events:
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+            time.sleep(token_delay)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        time.sleep(server.latency)
+        if random.random() < server.error_rate:
+            status = random.choice([429, 503])
+            self._send(status, {"error": {"message": "stub overloaded"}}, {"retry-after": "0"})
+            return
+        if payload.get("stream"):
+            self._send_stream(server.reply, server.chunk_size, server.token_delay)
+            return
+        # A blocking completion takes as long to generate as the streamed one
+        time.sleep(server.token_delay * -(-len(server.reply) // server.chunk_size))
+        self._send(200, {"choices": [{"message": {"role": "assistant", "content": server.reply}}]})
+
+class StubLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping idle keep-alive connections is expected, not an error
+        pass
+
+def start_stub_server(port=0, latency=0.0, error_rate=0.0, reply=DEFAULT_REPLY, chunk_size=4, token_delay=0.0):
+    """
+    Start the stub on a background thread.
+
+    Returns:
+        tuple: (server, chat completions URL)
+    """
+    server = StubLLMServer(("127.0.0.1", port), StubLLMHandler)
+    server.latency = latency
+    server.error_rate = error_rate
+    server.reply = reply
+    server.chunk_size = chunk_size
+    server.token_delay = token_delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="seconds per response")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 429/503 responses")
+    arg_parser.add_argument("--token-delay", type=float, default=0.01, help="seconds between streamed events")
+    args = arg_parser.parse_args()
+    server, url = start_stub_server(args.port, args.latency, args.error_rate, token_delay=args.token_delay)
+    print(f"Stub LLM listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,201 @@
+"""
+Regression suite over the hot paths, replaying recorded LLM and geocoder traffic.
+
+Each case is timed (median of --repeat runs) and its output hashed. Timings are divided by
+a fixed pure-Python calibration workload measured in the same run, so baselines recorded
+on one machine stay comparable on another. The spread of the runs (interquartile range)
+is kept next to each median, in the baselines too. A case is a regression when its
+normalized time exceeds the baseline by more than --threshold and by more than both
+--min-delta-us and --noise-factor times the combined spread of the baseline and the
+current run, so microsecond-scale cases do not fail on timer noise; a changed output
+digest is reported separately since it means behaviour, not speed, moved.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/suite.py                    # compare against benchmarks/baselines.json
+    python benchmarks/suite.py --save             # record new baselines
+    python benchmarks/suite.py --threshold 1.5 --case cascade_end_to_end
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytz
+
+from refiner.cascade import normalize_cascade_schema
+from refiner.jsonstream import extract_json_object
+from refiner.llm import refine_with_llm_conversation
+from refiner.relative import parse_relative_time
+from refiner.response_cache import ResponseCache
+from refiner.timeparse import adjust_timestamp_to_location, extract_time_from_text
+from refiner.timezones import resolve_manual_timezone, set_location_tz_cache
+from record_fixtures import CONVERSATIONS
+from replay import Fixture, FixtureLLMClient, fixture_location_cache
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Reference clock for everything relative, so outputs are reproducible
+FIXED_NOW = datetime(2025, 4, 23, 12, 0, tzinfo=pytz.UTC).timestamp()
+
+TEXTS = [
+    "Swap 1 ETH to USDC on April 25, 2025 at 3:00 PM PKT",
+    "Buy 0.5 BTC at 14:30 tomorrow from Islamabad",
+    "Stake everything on 2025-06-01 18:00 UTC unless gas is above 40 gwei",
+    "Bridge 500 USDT to Arbitrum in 2 hours",
+    "No time mentioned here at all, just send 10 DAI to vitalik.eth",
+]
+TIMESTAMPS = [
+    "April 25, 2025 3:00 PM PKT",
+    "2025-06-01 18:00 EST",
+    "25/04/2025 15:00 IST",
+    "May 3rd 2025, half past nine in the evening GMT",
+    "3pm",
+]
+LOCATED = [
+    ("April 25, 2025 3:00 PM", "Gilgit"),
+    ("2025-06-01 18:00", "Hobart"),
+    ("June 1 2025 09:15", "Boulder, Colorado"),
+    ("2025-12-24T23:00:00", "Tromsø"),
+    ("April 25, 2025 3:00 PM", "Sector 9 Township"),
+]
+RELATIVE = [
+    "tomorrow at 9",
+    "in 2 hours",
+    "every Monday 10am",
+    "before Friday",
+    "every 2 weeks on Tuesday and Thursday at 18:30 until June 30, 2025",
+]
+
+def calibrate():
+    # Fixed interpreter-bound workload: dict/str/int churn similar to the code under test
+    total = 0
+    for i in range(20000):
+        key = str(i)
+        total += len({key: i, "x": key.upper()}) + int(key) % 7
+    return total
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def build_cases(fixture):
+    """
+    Name -> zero-argument callable returning the case's output.
+    """
+    location_cache = fixture_location_cache(fixture)
+    set_location_tz_cache(location_cache)
+    client = FixtureLLMClient(fixture)
+    replies = sorted(entry["body"] for entry in fixture.data["llm"].values())
+    contents = [json.loads(body)["choices"][0]["message"]["content"] for body in replies]
+    utc = pytz.UTC
+
+    def end_to_end():
+        outputs = []
+        for convo in CONVERSATIONS:
+            result, reply = refine_with_llm_conversation(convo, client=client, cache=ResponseCache(ttl=0))
+            outputs.append(normalize_cascade_schema(result, now=FIXED_NOW) if result else reply)
+        return outputs
+
+    return {
+        "extract_time_from_text": lambda: [extract_time_from_text(text) for text in TEXTS],
+        # Uncached, so the parse is measured rather than the lru_cache lookup
+        "resolve_manual_timezone": lambda: [resolve_manual_timezone.__wrapped__(text) for text in TIMESTAMPS],
+        "adjust_timestamp_to_location": lambda: [adjust_timestamp_to_location(ts, loc) for ts, loc in LOCATED],
+        "extract_json_object": lambda: [extract_json_object(content) for content in contents],
+        "parse_relative_time": lambda: [parse_relative_time(text, utc, FIXED_NOW) for text in RELATIVE],
+        "cascade_end_to_end": end_to_end,
+    }, location_cache
+
+def measure(func, repeat, min_time=0.2):
+    """
+    Median and interquartile range of the per-call time, in microseconds; each sample loops
+    until it lasts at least min_time.
+    """
+    number = 1
+    while timeit.timeit(func, number=number) < min_time and number < 1 << 18:
+        number *= 2
+    samples = [sample / number * 1e6 for sample in timeit.repeat(func, number=number, repeat=repeat)]
+    first, _, third = statistics.quantiles(samples, n=4)
+    return statistics.median(samples), third - first
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Replay regression suite")
+    arg_parser.add_argument("--save", action="store_true", help="write the results as the new baselines")
+    arg_parser.add_argument("--baseline", default=BASELINE_PATH)
+    arg_parser.add_argument("--threshold", type=float, default=1.25,
+                            help="normalized slowdown ratio that counts as a regression")
+    arg_parser.add_argument("--min-delta-us", type=float, default=20.0,
+                            help="normalized slowdown in microseconds below which a case is never a regression")
+    arg_parser.add_argument("--noise-factor", type=float, default=3.0,
+                            help="a slowdown must also exceed this many times the combined run-to-run spread")
+    arg_parser.add_argument("--repeat", type=int, default=31)
+    arg_parser.add_argument("--case", action="append", help="run only this case (repeatable)")
+    args = arg_parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    fixture = Fixture()
+    cases, location_cache = build_cases(fixture)
+    names = args.case or list(cases)
+    calibration, _ = measure(calibrate, args.repeat)
+    results = {}
+    for name in names:
+        output = cases[name]()
+        us, spread = measure(cases[name], args.repeat)
+        results[name] = {"us": us, "spread_us": spread, "digest": _digest(output)}
+    if location_cache.stats["errors"]:
+        print(f"warning: {location_cache.stats['errors']} geocoder lookups missed the fixture; re-record it")
+
+    if args.save:
+        baseline = {
+            "python": platform.python_version(),
+            "calibration_us": round(calibration, 1),
+            "cases": {
+                name: {"us": round(result["us"], 2), "spread_us": round(result["spread_us"], 2), "digest": result["digest"]}
+                for name, result in results.items()
+            },
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        for name, result in results.items():
+            print(f"{name:<30} {result['us']:>12.1f} us  (spread {result['spread_us']:.1f} us)")
+        print(f"saved {args.baseline} (calibration {calibration:.1f} us)")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    scale = calibration / baseline["calibration_us"]
+    print(f"calibration: {calibration:.1f} us vs {baseline['calibration_us']:.1f} us baseline (x{scale:.2f})")
+    print(f"{'case':<30} {'baseline us':>12} {'now us':>12} {'delta us':>10} {'floor us':>9} {'ratio':>7}  status")
+    failed = False
+    for name, result in results.items():
+        expected = baseline["cases"].get(name)
+        if expected is None:
+            print(f"{name:<30} {'-':>12} {result['us']:>12.1f} {'-':>10} {'-':>9} {'-':>7}  new")
+            continue
+        ratio = result["us"] / (expected["us"] * scale)
+        delta = result["us"] - expected["us"] * scale
+        # Baselines saved before spreads were recorded only get the current run's spread
+        noise = args.noise_factor * (expected.get("spread_us", 0.0) * scale + result["spread_us"])
+        floor = max(args.min_delta_us, noise)
+        if ratio > args.threshold and delta > floor:
+            status, failed = "REGRESSION", True
+        elif ratio < 1 / args.threshold and -delta > floor:
+            status = "faster"
+        else:
+            status = "ok"
+        if result["digest"] != expected["digest"]:
+            status += ", output changed"
+        print(f"{name:<30} {expected['us']:>12.1f} {result['us']:>12.1f} {delta:>+10.1f} {floor:>9.1f} {ratio:>7.2f}  {status}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
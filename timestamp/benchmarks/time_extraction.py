@@ -0,0 +1,94 @@
+"""
+Throughput of extract_time_from_text on LLM-style operation descriptions.
+
+Compares the single-pass span scanner with the original eight-search implementation,
+on the corpus as-is and with each description padded to a long paragraph. The old
+version stops at the first match of each kind but joins unrelated tokens ("14:30  Buy");
+the scanner reads the whole text to pick one adjacent date/time/zone cluster, and keeps
+up by trying only the alternatives that can start at each position.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/time_extraction.py --rounds 200
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from refiner.timeparse import extract_time_from_text
+
+CORPUS = [
+    "Book a SUV ride from I-9/3 to F-8 on April 25, 2025 at 3:00 PM PKT",
+    "Swap 1 ETH to USDC on 25/04/2025 15:00",
+    "Buy 0.5 BTC at 14:30 EST if the price drops below 60k",
+    "Stake 100 USDC on Aave on 2025-06-01 at 18:00 UTC",
+    "Send 10 DAI to vitalik.eth on Jun 3, 2025 10:15 AM",
+    "Bridge 500 USDT to Arbitrum on 3 March 2025, 08:00 CET",
+    "Sell my NFT when the floor price is above 2 ETH",
+    "Pay the DEX fee of 0.3% from wallet 0xabc123 on 12 11 2025 9:30 PM",
+    "Claim AAVE rewards every Monday; first run on May 5, 2025 9 AM GMT",
+    "Transfer 2 SOL to the cold wallet at 11:59 PM",
+    "Provide liquidity to the ETH/USDC pool on Uniswap v3 between 1800 and 2200",
+    "Repay the loan on Compound before Dec 31 2025 11:59 PM UTC to avoid liquidation",
+]
+PADDING = (
+    " The user confirmed the wallet address and asked to keep gas below 40 gwei."
+    " Slippage tolerance is 0.5% and the route should avoid bridges with an open incident."
+)
+
+# The implementation the scanner replaced: eight re.search calls, first match of each kind
+_LEGACY_DATES = [
+    r'\d{1,2}[-/\s]\d{1,2}[-/\s]\d{2,4}',
+    r'\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4}',
+    r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{2,4}',
+    r'\d{4}[-/\s]\d{1,2}[-/\s]\d{1,2}',
+    r'\d{1,2}\s+\d{1,2}\s+\d{4}',
+]
+_LEGACY_TIMES = [r'\d{1,2}:\d{2}(?::\d{2})?\s*(?:AM|PM)?', r'\d{1,2}\s*(?:AM|PM)']
+_LEGACY_ZONES = [r'\b(?:PKT|EST|IST|GMT|UTC|CST|PST|[A-Z]{3,4})\b']
+
+def legacy_extract(text):
+    if not text:
+        return ""
+    parts = []
+    for patterns in (_LEGACY_DATES, _LEGACY_TIMES, _LEGACY_ZONES):
+        for pattern in patterns:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                parts.append(match.group())
+                break
+    return " ".join(parts)
+
+def texts_per_second(extract, corpus, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in corpus:
+            extract(text)
+    return len(corpus) * rounds / (time.perf_counter() - started)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Timestamp extraction throughput")
+    arg_parser.add_argument("--rounds", type=int, default=200)
+    arg_parser.add_argument("--padding", type=int, default=10, help="padding sentences added for the long corpus")
+    arg_parser.add_argument("--show", action="store_true", help="print what each implementation extracts")
+    args = arg_parser.parse_args()
+
+    if args.show:
+        for text in CORPUS:
+            print(f"{text[:60]!r:<64} scanner={extract_time_from_text(text)!r} legacy={legacy_extract(text)!r}")
+    differing = sum(extract_time_from_text(text) != legacy_extract(text) for text in CORPUS)
+    print(f"{differing}/{len(CORPUS)} descriptions extract differently (--show to list them)")
+
+    long_corpus = [PADDING * (args.padding // 2) + text + PADDING * (args.padding // 2) for text in CORPUS]
+    for name, corpus in (("short", CORPUS), ("long", long_corpus)):
+        average = sum(len(text) for text in corpus) / len(corpus)
+        scanner = texts_per_second(extract_time_from_text, corpus, args.rounds)
+        legacy = texts_per_second(legacy_extract, corpus, args.rounds)
+        print(f"{name:<6} ({average:5.0f} chars)  scanner {scanner:9.0f} texts/s   "
+              f"legacy {legacy:9.0f} texts/s   ({scanner / legacy:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Grid-cached TimezoneFinder against raw timezone_at on clustered coordinates.
+
+Points are scattered around a few hundred synthetic "cities", the way geocoded
+locations cluster in practice. Reports per-point and bulk throughput, the cold pass
+that classifies cells, and a second process reusing the memory-mapped table.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/tz_grid.py --points 50000 --cities 300
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from timezonefinder import TimezoneFinder
+
+from refiner.tzgrid import GridTimezoneFinder
+
+def clustered_points(count, cities, spread, seed):
+    rng = np.random.default_rng(seed)
+    centers = np.column_stack([rng.uniform(-45, 65, cities), rng.uniform(-180, 180, cities)])
+    picks = centers[rng.integers(0, cities, count)]
+    lats = np.clip(picks[:, 0] + rng.normal(0, spread, count), -90, 90)
+    lngs = (picks[:, 1] + rng.normal(0, spread, count) + 180) % 360 - 180
+    return lats, lngs
+
+def per_point(lookup, lats, lngs):
+    started = time.perf_counter()
+    names = [lookup(lat, lng) for lat, lng in zip(lats.tolist(), lngs.tolist())]
+    return names, len(names) / (time.perf_counter() - started)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Timezone grid cache benchmark")
+    arg_parser.add_argument("--points", type=int, default=50000)
+    arg_parser.add_argument("--cities", type=int, default=300)
+    arg_parser.add_argument("--spread", type=float, default=0.2, help="std dev of the scatter around a city, degrees")
+    arg_parser.add_argument("--step", type=float, default=0.05)
+    arg_parser.add_argument("--seed", type=int, default=7)
+    arg_parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    finder = TimezoneFinder()
+    lats, lngs = clustered_points(args.points, args.cities, args.spread, args.seed)
+
+    if args.child:
+        # Second process: the table was classified by the parent, so this is warm from the start
+        grid = GridTimezoneFinder(finder, step=args.step, path=args.child)
+        _, rate = per_point(grid.timezone_at, lats, lngs)
+        print(f"{rate:.0f}")
+        return
+
+    path = os.path.join(tempfile.mkdtemp(), "tz_grid.u16")
+    grid = GridTimezoneFinder(finder, step=args.step, path=path)
+    expected, raw_rate = per_point(lambda lat, lng: finder.timezone_at(lng=lng, lat=lat), lats, lngs)
+    cold, cold_rate = per_point(grid.timezone_at, lats, lngs)
+    warm, warm_rate = per_point(grid.timezone_at, lats, lngs)
+    started = time.perf_counter()
+    bulk = grid.timezone_at_many(lats, lngs)
+    bulk_rate = len(bulk) / (time.perf_counter() - started)
+    grid.flush()
+    child = subprocess.run(
+        [sys.executable, __file__, "--points", str(args.points), "--cities", str(args.cities),
+         "--spread", str(args.spread), "--step", str(args.step), "--seed", str(args.seed), "--child", path],
+        capture_output=True, text=True, check=True,
+    )
+    child_rate = float(child.stdout.strip())
+
+    mismatches = sum(
+        1 for answers in (cold, warm, bulk.tolist()) for got, want in zip(answers, expected) if got != want
+    )
+    classified = np.count_nonzero(grid.table)
+    boundary = np.count_nonzero(grid.table == 0xFFFF)
+    print(f"cells classified: {classified}, single-zone: {classified - boundary}, boundary: {boundary}")
+    print(f"mismatches vs raw: {mismatches}")
+    print(f"raw timezone_at:   {raw_rate:12.0f} points/s")
+    print(f"grid, cold:        {cold_rate:12.0f} points/s  ({cold_rate / raw_rate:.1f}x)")
+    print(f"grid, warm:        {warm_rate:12.0f} points/s  ({warm_rate / raw_rate:.1f}x)")
+    print(f"timezone_at_many:  {bulk_rate:12.0f} points/s  ({bulk_rate / raw_rate:.1f}x)")
+    print(f"second process:    {child_rate:12.0f} points/s  ({child_rate / raw_rate:.1f}x, shared table)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Micro-benchmark of timezone abbreviation resolution and the vectorized local -> UTC conversion.
+
+resolve_manual_timezone is timed against the original per-call dict scan, both through its
+LRU cache and uncached (__wrapped__). _localize_epochs is timed against per-row
+tz.localize(...).timestamp() on wall-clock times spread over a year, DST changes included.
+
+Usage (from the timestamp/ directory):
+    python benchmarks/tz_resolver.py --rows 100000
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytz
+
+from refiner.timeparse import _localize_epochs
+from refiner.timezones import TIMEZONE_ABBREVIATIONS, TIMEZONE_FULL_NAMES, resolve_manual_timezone
+
+TEXTS = [
+    "April 25, 2025 3:00 PM PKT",
+    "25/04/2025 15:00 CEST",
+    "Jun 3, 2025 10:15 AM AEST",
+    "2025-06-01 18:00",
+    "Tomorrow at 9 AM Pakistan Standard Time",
+    "Buy at the best price at 14:30",
+]
+
+# The original resolver: rebuilt both tables and scanned them with substring tests on every call
+def legacy_resolve(timestamp_str):
+    if not timestamp_str:
+        return pytz.utc
+    text = timestamp_str.upper()
+    timezone_map = dict(TIMEZONE_ABBREVIATIONS)
+    for tz_abbr, tz_name in timezone_map.items():
+        if tz_abbr in text:
+            return pytz.timezone(tz_name)
+    full_names = dict(TIMEZONE_FULL_NAMES)
+    for full_name, tz_name in full_names.items():
+        if full_name in text:
+            return pytz.timezone(tz_name)
+    return pytz.utc
+
+def per_call_us(func, items, number):
+    return timeit.timeit(lambda: [func(item) for item in items], number=number) / (number * len(items)) * 1e6
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Timezone resolver micro-benchmark")
+    arg_parser.add_argument("--number", type=int, default=5000)
+    arg_parser.add_argument("--rows", type=int, default=100000)
+    arg_parser.add_argument("--zone", default="America/New_York")
+    args = arg_parser.parse_args()
+
+    print(f"{'resolve_manual_timezone':<30} {'per call':>12}")
+    print(f"{'original dict scan':<30} {per_call_us(legacy_resolve, TEXTS, args.number):>9.2f} us")
+    print(f"{'matcher, uncached':<30} {per_call_us(resolve_manual_timezone.__wrapped__, TEXTS, args.number):>9.2f} us")
+    print(f"{'matcher, LRU hit':<30} {per_call_us(resolve_manual_timezone, TEXTS, args.number):>9.2f} us")
+
+    tz = pytz.timezone(args.zone)
+    start = datetime(2024, 1, 1)
+    # A prime number of minutes so the rows land on every time of day, gaps and overlaps included
+    local_dts = [start + timedelta(minutes=(row * 317) % (366 * 24 * 60)) for row in range(args.rows)]
+    local_seconds = np.array(local_dts, dtype="datetime64[s]").astype(np.int64)
+    sample = local_dts[:min(len(local_dts), 20000)]
+    per_row = timeit.timeit(lambda: [int(tz.localize(local_dt).timestamp()) for local_dt in sample], number=1) / len(sample)
+    vectorized = timeit.timeit(lambda: _localize_epochs(local_seconds, tz), number=5) / 5 / len(local_dts)
+    _, unsettled = _localize_epochs(local_seconds, tz)
+    print(f"\nlocal -> UTC in {args.zone}, {args.rows} rows ({int(unsettled.sum())} in a DST gap or overlap)")
+    print(f"{'per-row localize':<30} {per_row * 1e6:>9.3f} us/row  {1 / per_row:>12,.0f} rows/s")
+    print(f"{'_localize_epochs':<30} {vectorized * 1e6:>9.3f} us/row  {1 / vectorized:>12,.0f} rows/s  "
+          f"({per_row / vectorized:.0f}x)")
+
+if __name__ == "__main__":
+    main()
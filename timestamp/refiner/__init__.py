@@ -0,0 +1,72 @@
+"""
+Headless core of the prompt refining chatbot.
+
+Submodules are imported on first attribute access so that, for example, a
+worker that only normalizes timestamps never imports requests, and nothing
+builds TimezoneFinder or Nominatim until a location has to be geocoded.
+"""
+import importlib
+
+_EXPORTS = {
+    "adjust_timestamp_to_location": "timeparse",
+    "extract_time_from_text": "timeparse",
+    "normalize_timestamps": "timeparse",
+    "parse_local_timestamp": "timeparse",
+    "scan_time_spans": "timeparse",
+    "resolve_manual_timezone": "timezones",
+    "resolve_location_timezone": "timezones",
+    "register_timezone_abbreviations": "timezones",
+    "LocationTimezoneCache": "timezones",
+    "TokenBucket": "timezones",
+    "set_location_tz_cache": "timezones",
+    "GridTimezoneFinder": "tzgrid",
+    "build_system_prompt": "llm",
+    "refine_with_llm_conversation": "llm",
+    "refine_with_llm_conversation_async": "llm",
+    "stream_refine_with_llm_conversation": "llm",
+    "repair_structured_output": "llm",
+    "repair_structured_output_async": "llm",
+    "validate_result": "schema",
+    "extract_json_object": "jsonstream",
+    "compact_conversation": "context",
+    "context_metrics": "context",
+    "ResponseCache": "response_cache",
+    "get_response_cache": "response_cache",
+    "CascadeResult": "model",
+    "OperationMatrix": "model",
+    "LLMClient": "client",
+    "get_llm_client": "client",
+    "normalize_cascade_schema": "cascade",
+    "normalize_operation_time": "cascade",
+    "normalize_time_blocks": "cascade",
+    "StreamingCascadeNormalizer": "cascade",
+    "SessionStore": "sessions",
+    "InMemorySessionStore": "sessions",
+    "LRUSessionStore": "sessions",
+    "SQLiteSessionStore": "sessions",
+    "get_session_store": "sessions",
+    "refine_turn": "pipeline",
+    "run_batch": "batch",
+    "create_app": "service",
+    "parse_datetime": "dateformats",
+    "parse_relative_time": "relative",
+    "iter_exec_times": "relative",
+    "upcoming_exec_times": "relative",
+    "Recurrence": "relative",
+    "enable_metrics": "metrics",
+    "render_prometheus": "metrics",
+    "trace_turn": "metrics",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
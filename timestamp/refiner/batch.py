@@ -0,0 +1,105 @@
+"""
+JSONL batch runner for the prompt refiner.
+
+Each input line is {"id": ..., "prompt": "...", "session_id": optional}. Lines that share a
+session_id are run in order as one conversation. One JSON line per input is written to
+stdout, in input order: {"id", "session_id", "result", "reply"}, or {"id", "session_id",
+"error"} for a line that is not a valid request or whose turn failed.
+
+Run from the timestamp/ directory:
+    python -m refiner.batch prompts.jsonl --concurrency 8 > results.jsonl
+    cat prompts.jsonl | python -m refiner.batch - --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from collections import deque
+
+from .pipeline import refine_turn
+from .sessions import InMemorySessionStore
+
+async def _run_line(line, store, semaphore, session_locks):
+    try:
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("expected a JSON object")
+        prompt = record.get("prompt") or record.get("message")
+        if not isinstance(prompt, str) or not prompt.strip():
+            raise ValueError("missing 'prompt'")
+    except ValueError as e:
+        return {"id": None, "session_id": None, "error": f"Invalid input line: {e}"}
+    session_id = record.get("session_id") or store.new_session_id()
+    try:
+        # Turns of one conversation must not overtake each other
+        lock = session_locks.setdefault(session_id, asyncio.Lock())
+        async with lock, semaphore:
+            response = await refine_turn(store, session_id, prompt)
+    except Exception as e:
+        # One failed turn must not abort the rest of the batch
+        logging.exception("Batch line %r failed", record.get("id"))
+        return {"id": record.get("id"), "session_id": session_id, "error": f"{type(e).__name__}: {e}"}
+    return {"id": record.get("id"), **response}
+
+async def run_batch(lines, output, concurrency=8, store=None):
+    """
+    Process JSONL lines with at most `concurrency` LLM calls in flight.
+    
+    Input is read lazily: no more than 4 * concurrency lines are held at once, so a
+    slow LLM applies backpressure to the reader instead of buffering the whole input.
+    
+    Args:
+        lines: Iterable of JSONL lines (may be a file object or sys.stdin)
+        output: Writable text stream for the result lines
+        concurrency: Maximum concurrent refine turns
+        store: SessionStore shared by the turns, defaults to an in-memory store
+        
+    Returns:
+        int: Number of lines processed
+    """
+    store = store if store is not None else InMemorySessionStore()
+    semaphore = asyncio.Semaphore(concurrency)
+    session_locks = {}
+    window = deque()
+    loop = asyncio.get_running_loop()
+    iterator = iter(lines)
+    processed = 0
+    
+    def flush_head():
+        output.write(json.dumps(window.popleft().result()) + "\n")
+    
+    while True:
+        # Reading stdin blocks, so do it on a worker thread
+        line = await loop.run_in_executor(None, next, iterator, None)
+        if line is None:
+            break
+        if not line.strip():
+            continue
+        window.append(asyncio.ensure_future(_run_line(line, store, semaphore, session_locks)))
+        processed += 1
+        while len(window) >= concurrency * 4 or (window and window[0].done()):
+            await asyncio.wait([window[0]])
+            flush_head()
+    while window:
+        await asyncio.wait([window[0]])
+        flush_head()
+    output.flush()
+    return processed
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Run JSONL prompts through the prompt refiner")
+    arg_parser.add_argument("input", nargs="?", default="-", help="JSONL file, or - for stdin")
+    arg_parser.add_argument("--concurrency", type=int, default=8)
+    args = arg_parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stderr)
+    
+    if args.input == "-":
+        processed = asyncio.run(run_batch(sys.stdin, sys.stdout, args.concurrency))
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            processed = asyncio.run(run_batch(f, sys.stdout, args.concurrency))
+    logging.warning(f"Processed {processed} prompt(s)")
+
+if __name__ == "__main__":
+    main()
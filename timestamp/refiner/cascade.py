@@ -0,0 +1,215 @@
+"""
+Post-processing of the cascade_schema operations returned by the LLM.
+"""
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from datetime import datetime, timezone
+
+from .metrics import count, stage
+from .relative import (
+    looks_relative,
+    parse_relative_time,
+    recurrence_to_rrule,
+    resolve_expression_timezone,
+    split_constraint,
+    upcoming_exec_times,
+)
+from .timeparse import adjust_timestamp_to_location, extract_time_from_text, normalize_timestamps
+
+def _apply_relative_time(time_info, user_time_str, location, now):
+    """
+    Resolve "in 2 hours" / "every Monday 10am" style user_time against now.
+    
+    Returns:
+        bool: False if user_time is not a relative expression
+    """
+    if not looks_relative(user_time_str):
+        return False
+    with stage("relative_time"):
+        try:
+            tz = resolve_expression_timezone(user_time_str, location)
+            expression = parse_relative_time(user_time_str, tz, now)
+        except (ValueError, OverflowError, TypeError, AttributeError) as e:
+            # Fall back to the absolute parser rather than failing the whole operation
+            logging.warning("Could not resolve relative time '%s': %s", user_time_str, e)
+            count("relative_time_failures")
+            return False
+        if expression is None or expression.exec_time is None:
+            return False
+        time_info["exec_time"] = expression.exec_time
+        time_info["timezone"] = expression.timezone
+        if expression.constraint and not time_info.get("constraint"):
+            time_info["constraint"] = expression.constraint
+        if expression.recurrence is not None:
+            count("recurrences")
+            time_info["recurrence"] = recurrence_to_rrule(expression.recurrence)
+            time_info["upcoming_exec_times"] = upcoming_exec_times(expression.recurrence, tz, now)
+    count("relative_times")
+    return True
+
+def normalize_operation_time(item, now=None):
+    """
+    Fill in exec_time and timezone for a single cascade_schema operation, in place.
+    
+    Relative and recurring expressions are resolved against now (a Unix timestamp,
+    defaults to the current time).
+    """
+    if not isinstance(item.get("time"), dict):
+        return item
+    
+    # Extract time information; anything but a string is treated as missing
+    user_time_str = item["time"].get("user_time", "")
+    if not isinstance(user_time_str, str):
+        user_time_str = ""
+    
+    # If user_time is empty, try to extract from description
+    if not user_time_str:
+        description = item.get("description", "")
+        user_time_str = extract_time_from_text(description if isinstance(description, str) else "")
+        logging.info("Extracted time from description: '%s'", user_time_str)
+    
+    # Process location information
+    location = item.get("location", "") or item.get("description", "Unknown")
+    if not isinstance(location, str):
+        location = "Unknown"
+    
+    # Process the timestamp
+    if user_time_str:
+        now = time.time() if now is None else now
+        if not _apply_relative_time(item["time"], user_time_str, location, now):
+            # "before April 25, 2025": the qualifier becomes the constraint, the rest is the time
+            constraint, anchor = split_constraint(user_time_str)
+            if constraint and not item["time"].get("constraint"):
+                item["time"]["constraint"] = constraint
+            ts, tz = adjust_timestamp_to_location(anchor, location)
+            item["time"]["exec_time"] = ts
+            item["time"]["timezone"] = tz
+        # Keep user_time for debugging purposes
+        item["time"]["user_time_original"] = user_time_str
+    else:
+        # No valid time found, use current time as fallback
+        logging.warning("No valid time found in user input")
+        count("time_fallbacks")
+        current_time = int(datetime.now(timezone.utc).timestamp())
+        item["time"]["exec_time"] = current_time
+        item["time"]["timezone"] = "UTC"
+        item["time"]["note"] = "No valid time found in input, using current time"
+    return item
+
+# Bulk version of normalize_operation_time for bare (user_time, location) pairs
+def normalize_time_blocks(pairs, now=None):
+    """
+    Resolve many (user_time, location) pairs the way normalize_operation_time resolves one.
+    
+    Relative and recurring expressions go through the relative-time resolver one by one;
+    the rest, with any leading "before"/"by"/"after" split off, are converted together
+    by normalize_timestamps.
+    
+    Args:
+        pairs: List of (user_time, location) string pairs
+        now: Reference Unix timestamp for relative times, defaults to the current time
+        
+    Returns:
+        list: Time blocks with exec_time and timezone, plus constraint, recurrence and
+        upcoming_exec_times where the expression sets them, in input order
+    """
+    now = time.time() if now is None else now
+    blocks = [{} for _ in pairs]
+    absolute = []
+    for position, (user_time, location) in enumerate(pairs):
+        if user_time and _apply_relative_time(blocks[position], user_time, location, now):
+            continue
+        constraint, anchor = split_constraint(user_time)
+        if constraint:
+            blocks[position]["constraint"] = constraint
+        absolute.append((position, anchor, location))
+    if absolute:
+        epochs, zones = normalize_timestamps([(anchor, location) for _, anchor, location in absolute])
+        for (position, _, _), epoch, zone in zip(absolute, epochs, zones):
+            blocks[position]["exec_time"] = int(epoch)
+            blocks[position]["timezone"] = zone
+    return blocks
+
+# One bounded pool shared by every session, so concurrent users cannot pile up threads
+CASCADE_WORKERS = int(os.getenv("CASCADE_WORKERS", "8"))
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_cascade_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=CASCADE_WORKERS, thread_name_prefix="cascade")
+    return _executor
+
+def _submit(executor, item, now):
+    # Run in a copy of the caller's context so the worker's spans land in the caller's turn trace
+    return executor.submit(copy_context().run, normalize_operation_time, item, now)
+
+def normalize_cascade_schema(result, executor=None, now=None):
+    """
+    Normalize the time block of every operation in an LLM result, in place.
+    
+    Operations are processed concurrently on the shared worker pool; lookups for the
+    same location are coalesced and geocoder requests rate limited by the location cache.
+    
+    Args:
+        result: Parsed JSON from refine_with_llm_conversation
+        executor: Executor to run on, defaults to the shared cascade pool
+        now: Reference Unix timestamp for relative times, defaults to the current time
+        
+    Returns:
+        dict: The same result, for convenience
+    """
+    items = result.get("cascade_schema") or []
+    # One reference clock for the whole result, so "in 1 hour" means the same in every operation
+    now = time.time() if now is None else now
+    with stage("cascade", operations=len(items)):
+        if len(items) == 1:
+            normalize_operation_time(items[0], now)
+        elif items:
+            executor = executor or get_cascade_executor()
+            # Wait for every operation; results are written into the items in place
+            for future in [_submit(executor, item, now) for item in items]:
+                future.result()
+    return result
+
+class StreamingCascadeNormalizer:
+    """
+    Normalize operations on worker threads while the rest of the LLM reply is still streaming.
+    
+    Pass submit as the on_item callback of stream_refine_with_llm_conversation, then call
+    finish with the parsed result once the stream has ended.
+    """
+    
+    def __init__(self, executor=None, now=None):
+        self._executor = executor or get_cascade_executor()
+        self._now = time.time() if now is None else now
+        self._futures = {}
+    
+    def submit(self, index, item):
+        self._futures[index] = _submit(self._executor, item, self._now)
+    
+    def finish(self, result):
+        """
+        Swap the already normalized operations into result and normalize any that were missed.
+        
+        Returns:
+            dict: The same result, for convenience
+        """
+        if result and "cascade_schema" in result:
+            items = result["cascade_schema"]
+            with stage("cascade", operations=len(items), streamed=len(self._futures)):
+                for index, item in enumerate(items):
+                    future = self._futures.get(index)
+                    items[index] = future.result() if future else normalize_operation_time(item, self._now)
+        return result
+    
+    def close(self):
+        for future in self._futures.values():
+            future.cancel()
@@ -0,0 +1,149 @@
+"""
+Pooled, retrying HTTP client for the Groq chat completions API.
+"""
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class LLMClient:
+    """
+    Keep-alive connection pool with timeouts and exponential backoff for chat completions.
+
+    Args:
+        url: Chat completions endpoint
+        api_key: Bearer token, or a callable returning one (read lazily per request)
+        connect_timeout: Seconds to wait for the TCP/TLS connection
+        read_timeout: Seconds to wait for the response once connected
+        max_retries: Retries after the first attempt on 429/5xx and connection errors
+        backoff_base: First backoff delay in seconds, doubled on each retry
+        backoff_max: Upper bound for a single backoff delay (also caps retry-after)
+        pool_size: Keep-alive connections kept open to the API host
+        max_concurrency: Requests allowed in flight at once through the async interface
+    """
+
+    def __init__(self, url=GROQ_API_URL, api_key=None, connect_timeout=5.0, read_timeout=60.0,
+                 max_retries=3, backoff_base=0.5, backoff_max=30.0, pool_size=16, max_concurrency=16):
+        self.url = url
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._executor = None
+
+    def _headers(self):
+        api_key = self.api_key() if callable(self.api_key) else self.api_key
+        return {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def _retry_delay(self, attempt, response=None):
+        # Honour retry-after (seconds or an HTTP date) when the server sends one
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), self.backoff_max)
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
+
+    def post(self, payload, stream=False):
+        """
+        Send a chat completion request, retrying 429/5xx responses and connection failures.
+
+        With stream=True the body is not read, so the caller can consume server-sent events;
+        retries then only cover failures before the first byte of a successful response.
+
+        Returns:
+            requests.Response: The last response received (which may still be an error status)
+
+        Raises:
+            requests.exceptions.RequestException: If every attempt failed to get a response
+        """
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                res = self.session.post(self.url, headers=self._headers(), json=payload,
+                                        timeout=self.timeout, stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if last_attempt:
+                    raise
+                delay = self._retry_delay(attempt)
+                logging.warning("Groq API request failed (%s), retrying in %.1fs", e.__class__.__name__, delay)
+                time.sleep(delay)
+                continue
+
+            logging.debug("Groq API response headers: %s", res.headers)
+            if res.status_code not in RETRY_STATUSES or last_attempt:
+                return res
+            delay = self._retry_delay(attempt, res)
+            logging.warning("Groq API returned %s, retrying in %.1fs", res.status_code, delay)
+            res.close()
+            time.sleep(delay)
+
+    async def apost(self, payload):
+        """
+        Async version of post; runs on a worker thread and shares the same connection pool.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores.setdefault(loop, asyncio.Semaphore(self.max_concurrency))
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm-client")
+        async with semaphore:
+            return await loop.run_in_executor(self._executor, self.post, payload)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.session.close()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_llm_client():
+    """
+    Return the process-wide client, configured from GROQ_* environment variables.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from .llm import get_api_key
+                _client = LLMClient(
+                    api_key=get_api_key,
+                    connect_timeout=float(os.getenv("GROQ_CONNECT_TIMEOUT", "5")),
+                    read_timeout=float(os.getenv("GROQ_READ_TIMEOUT", "60")),
+                    max_retries=int(os.getenv("GROQ_MAX_RETRIES", "3")),
+                    pool_size=int(os.getenv("GROQ_POOL_SIZE", "16")),
+                    max_concurrency=int(os.getenv("GROQ_MAX_CONCURRENCY", "16")),
+                )
+    return _client
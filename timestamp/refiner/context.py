@@ -0,0 +1,118 @@
+"""
+Conversation compaction so the prompt sent each turn stays within a token budget.
+"""
+import os
+import json
+import re
+import logging
+import threading
+from functools import lru_cache
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "4000"))
+CONTEXT_RECENT_MESSAGES = int(os.getenv("CONTEXT_RECENT_MESSAGES", "6"))
+
+_JSON_BLOCK = re.compile(r"```json\s*(\{.*\})\s*```", re.DOTALL)
+
+# Running totals across every compacted turn in the process
+context_metrics = {"turns": 0, "tokens_in": 0, "tokens_out": 0, "bytes_in": 0, "bytes_out": 0}
+_metrics_lock = threading.Lock()
+
+def estimate_tokens(text):
+    """
+    Rough token count for a message (about four characters per token for English and JSON).
+    """
+    return (len(text) + 3) // 4 + 4  # plus per-message role/formatting overhead
+
+@lru_cache(maxsize=256)
+def summarize_structured_output(content):
+    """
+    Replace an emitted JSON block with a one-line summary of its operations.
+
+    Returns:
+        str or None: The summary, or None if content is not a structured output
+    """
+    match = _JSON_BLOCK.search(content)
+    if not match:
+        return None
+    try:
+        result = json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return None
+    operations = result.get("cascade_schema")
+    if not isinstance(operations, list):
+        operations = []
+    parts = []
+    for item in operations:
+        if not isinstance(item, dict):
+            continue
+        # Model output is not schema-checked yet here, so "time" may be a bare string
+        time_info = item.get("time")
+        if not isinstance(time_info, dict):
+            time_info = {}
+        part = str(item.get("description", "operation"))
+        if time_info.get("exec_time"):
+            part += f" (exec_time {time_info['exec_time']} {time_info.get('timezone', 'UTC')})"
+        parts.append(part)
+    return f"[Earlier structured output with {len(operations)} operation(s): " + "; ".join(parts) + "]"
+
+def compact_conversation(history, token_budget=CONTEXT_TOKEN_BUDGET, keep_recent=CONTEXT_RECENT_MESSAGES):
+    """
+    Shrink a chat history before it is sent to the LLM.
+
+    Structured JSON outputs older than the latest one are replaced by short summaries,
+    the last keep_recent messages are kept as they are where possible, and the oldest
+    messages are dropped until the conversation fits token_budget. The newest message
+    is always kept.
+
+    Args:
+        history: List of {"role", "content"} messages
+        token_budget: Maximum estimated tokens for the returned messages
+        keep_recent: Number of trailing messages never summarized
+
+    Returns:
+        tuple: (compacted message list, stats dict)
+    """
+    latest_json = None
+    for index in range(len(history) - 1, -1, -1):
+        if history[index]["role"] == "assistant" and "```json" in history[index]["content"]:
+            latest_json = index
+            break
+
+    recent_start = max(len(history) - keep_recent, 0)
+    compacted = []
+    for index, message in enumerate(history):
+        content = message["content"]
+        if message["role"] == "assistant" and index != latest_json and index < recent_start:
+            content = summarize_structured_output(content) or content
+        compacted.append({"role": message["role"], "content": content})
+
+    # Sliding window: drop the oldest messages until the budget is met
+    tokens = [estimate_tokens(message["content"]) for message in compacted]
+    total = sum(tokens)
+    start = 0
+    while total > token_budget and start < len(compacted) - 1:
+        total -= tokens[start]
+        start += 1
+    # Never open the window on an assistant turn with its question cut off
+    while start < len(compacted) - 1 and compacted[start]["role"] == "assistant":
+        total -= tokens[start]
+        start += 1
+    compacted = compacted[start:]
+
+    stats = {
+        "messages_in": len(history),
+        "messages_out": len(compacted),
+        "tokens_in": sum(estimate_tokens(message["content"]) for message in history),
+        "tokens_out": total,
+        "bytes_in": sum(len(message["content"].encode()) for message in history),
+        "bytes_out": sum(len(message["content"].encode()) for message in compacted),
+    }
+    with _metrics_lock:
+        context_metrics["turns"] += 1
+        for key in ("tokens_in", "tokens_out", "bytes_in", "bytes_out"):
+            context_metrics[key] += stats[key]
+    logging.debug(
+        "Context compaction: %d -> %d messages, %d -> %d tokens",
+        stats["messages_in"], stats["messages_out"], stats["tokens_in"], stats["tokens_out"],
+    )
+    return compacted, stats
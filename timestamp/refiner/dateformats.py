@@ -0,0 +1,166 @@
+"""
+Tiered date/time parsing: ISO 8601, then a table of strict layouts, then dateutil.
+
+LLM-produced user_time strings come in a handful of shapes, so most never need
+dateutil's fuzzy parser. Each layout is compiled to an anchored regex once, and the
+layouts that can match a string are worked out once per string shape (letters -> "A",
+digit runs -> "9") and memoized.
+"""
+import os
+import re
+import string
+from datetime import datetime
+from functools import lru_cache
+
+import pytz
+from dateutil import parser
+
+from .metrics import count, stage
+from .timezones import resolve_timezone_abbreviation
+
+# Read ambiguous numeric dates such as 04/05/2025 as day/month instead of month/day
+DATE_DAYFIRST = os.getenv("DATE_DAYFIRST", "0") == "1"
+
+# Abbreviations dateutil itself reads as UTC, so they must give an aware datetime here too
+_UTC_NAMES = frozenset({"UTC", "GMT", "Z"})
+
+_TRAILING_ZONE = re.compile(r"\s+([A-Za-z]{1,5})$")
+_LETTERS = re.compile(r"[^\W\d_]+")
+_DIGITS = re.compile(r"\d+")
+_DIRECTIVE = re.compile(r"%[A-Za-z]")
+# Cheap per-call shape key; runs are only collapsed once per key, in _candidate_layouts
+_SHAPE_KEY = str.maketrans(
+    "0123456789" + string.ascii_letters, "9" * 10 + "A" * len(string.ascii_letters)
+)
+
+# strptime-style directives; %B accepts full and abbreviated English month names
+_DIRECTIVES = {
+    "%Y": r"(?P<year>\d{4})",
+    "%m": r"(?P<month>\d{1,2})",
+    "%d": r"(?P<day>\d{1,2})",
+    "%B": r"(?P<month_name>[A-Za-z]+)",
+    "%H": r"(?P<hour>\d{1,2})",
+    "%I": r"(?P<hour>\d{1,2})",
+    "%M": r"(?P<minute>\d{2})",
+    "%S": r"(?P<second>\d{2})",
+    "%p": r"(?P<ampm>[AaPp][Mm])",
+}
+_MONTH_NAMES = (
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december",
+)
+_MONTHS = {name: number for number, name in enumerate(_MONTH_NAMES, start=1)}
+_MONTHS.update({name[:3]: number for number, name in enumerate(_MONTH_NAMES, start=1)})
+_MONTHS["sept"] = 9
+
+_MONTH_FIRST_DATES = ("%m/%d/%Y", "%m-%d-%Y", "%m.%d.%Y")
+_DAY_FIRST_DATES = ("%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y")
+_DATES = ("%B %d, %Y", "%B %d %Y", "%d %B %Y", "%d %B, %Y", "%Y/%m/%d", "%Y-%m-%d")
+_TIMES = (
+    "", " %I:%M %p", " %I:%M%p", " %I %p", " %I%p", " %I:%M:%S %p",
+    " %H:%M", " %H:%M:%S", ", %I:%M %p", ", %H:%M",
+)
+
+def _shape(text):
+    return _DIGITS.sub("9", _LETTERS.sub("A", text))
+
+def _compile_layout(layout):
+    pattern = "".join(
+        _DIRECTIVES[part] if part in _DIRECTIVES else re.escape(part)
+        for part in re.split(r"(%[A-Za-z])", layout) if part
+    )
+    # %B/%p match letters, every other directive matches digits
+    shape = _shape(_DIRECTIVE.sub(lambda m: "a" if m.group() in ("%B", "%p") else "0", layout))
+    return re.compile(pattern), shape
+
+def _layouts(dayfirst):
+    numeric = _DAY_FIRST_DATES + _MONTH_FIRST_DATES if dayfirst else _MONTH_FIRST_DATES + _DAY_FIRST_DATES
+    return [_compile_layout(date + time) for date in _DATES + numeric for time in _TIMES]
+
+_LAYOUTS = {dayfirst: _layouts(dayfirst) for dayfirst in (False, True)}
+
+@lru_cache(maxsize=1024)
+def _candidate_layouts(key, dayfirst):
+    """
+    Compiled layouts whose shape matches, in preference order; empty when only dateutil can help.
+    """
+    shape = _shape(key)
+    return tuple(pattern for pattern, layout_shape in _LAYOUTS[dayfirst] if layout_shape == shape)
+
+def _build_datetime(fields):
+    # Raises ValueError for out-of-range values, like strptime
+    month = fields.get("month")
+    month = int(month) if month else _MONTHS.get(fields["month_name"].lower())
+    if month is None:
+        raise ValueError("unknown month name")
+    hour = int(fields.get("hour") or 0)
+    ampm = fields.get("ampm")
+    if ampm:
+        if not 1 <= hour <= 12:
+            raise ValueError("12-hour clock hour out of range")
+        hour = hour % 12 + (12 if ampm.lower() == "pm" else 0)
+    return datetime(
+        int(fields["year"]), month, int(fields["day"]), hour,
+        int(fields.get("minute") or 0), int(fields.get("second") or 0),
+    )
+
+def parse_datetime_fast(text, dayfirst=None):
+    """
+    Parse text with the strict tiers only.
+
+    A trailing known timezone abbreviation is ignored (the caller resolves it), except
+    UTC/GMT/Z, which give an aware UTC datetime like dateutil does.
+
+    Args:
+        text: Date/time string
+        dayfirst: Prefer day/month for ambiguous numeric dates, defaults to DATE_DAYFIRST
+
+    Returns:
+        tuple: (datetime, tier name) or (None, None) when no strict tier matched
+    """
+    dayfirst = DATE_DAYFIRST if dayfirst is None else dayfirst
+    body = text.strip()
+    try:
+        return datetime.fromisoformat(body), "iso"
+    except ValueError:
+        pass
+
+    zone = None
+    match = _TRAILING_ZONE.search(body)
+    if match:
+        token = match.group(1).upper()
+        if token in _UTC_NAMES or resolve_timezone_abbreviation(token) is not None:
+            body = body[:match.start()]
+            zone = pytz.UTC if token in _UTC_NAMES else None
+    body = " ".join(body.replace(" at ", " ").split())
+
+    for pattern in _candidate_layouts(body.translate(_SHAPE_KEY), dayfirst):
+        match = pattern.fullmatch(body)
+        if match is None:
+            continue
+        try:
+            parsed = _build_datetime(match.groupdict())
+        except ValueError:
+            continue
+        return (parsed.replace(tzinfo=zone) if zone else parsed), "layout"
+    return None, None
+
+def parse_datetime(text, dayfirst=None):
+    """
+    Parse a date/time string, trying the strict tiers before dateutil.
+
+    Args:
+        text: Date/time string
+        dayfirst: Prefer day/month for ambiguous numeric dates, defaults to DATE_DAYFIRST
+
+    Returns:
+        datetime: Naive, or aware when the string carried an offset or UTC/GMT/Z
+    """
+    dayfirst = DATE_DAYFIRST if dayfirst is None else dayfirst
+    parsed, tier = parse_datetime_fast(text, dayfirst)
+    if parsed is not None:
+        count("date_fast_path")
+        return parsed
+    count("date_dateutil")
+    with stage("dateutil"):
+        return parser.parse(text, ignoretz=False, dayfirst=dayfirst)
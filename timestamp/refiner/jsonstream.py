@@ -0,0 +1,176 @@
+"""
+JSON extraction from LLM output, both for complete replies and as they stream in.
+"""
+import re
+import json
+import logging
+
+# Everything up to the next brace that is not inside a JSON string. The unrolled
+# loops (here and inside the string) cannot backtrack catastrophically on malformed input.
+_NEXT_BRACE = re.compile(r'[^{}"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^{}"]*)*([{}])')
+
+def scan_json_objects(text):
+    """
+    Find balanced top-level JSON objects in text with a single string-aware pass.
+    
+    Braces inside JSON strings are ignored, and so are quotes in prose outside any object.
+    The scanning between braces runs inside the regex engine, so the Python loop only
+    runs once per brace.
+    
+    Returns:
+        tuple: (list of (start, end) spans, start of an unterminated object or None)
+    """
+    spans = []
+    position = 0
+    while True:
+        start = text.find("{", position)
+        if start == -1:
+            return spans, None
+        depth = 1
+        position = start + 1
+        while depth:
+            match = _NEXT_BRACE.match(text, position)
+            if match is None:
+                # Ran out of text inside an object or a string
+                return spans, start
+            depth += 1 if match.group(1) == "{" else -1
+            position = match.end()
+        spans.append((start, position))
+
+_decoder = json.JSONDecoder()
+
+def _decode_after(text, start, end, max_attempts=32):
+    # Try raw_decode at the next few "{" inside a span that failed to parse
+    position = text.find("{", start + 1, end)
+    for _ in range(max_attempts):
+        if position == -1:
+            return None
+        try:
+            value, value_end = _decoder.raw_decode(text, position)
+            if isinstance(value, dict):
+                return value, position, value_end
+        except json.JSONDecodeError:
+            pass
+        position = text.find("{", position + 1, end)
+    return None
+
+def extract_json_object(text):
+    """
+    Return the JSON object an LLM reply is carrying, ignoring prose and code fences around it.
+    
+    The first object with a cascade_schema wins, otherwise the first object that parses.
+    
+    Returns:
+        tuple or None: (parsed dict, start, end), or None if the text holds no JSON object
+        
+    Raises:
+        json.JSONDecodeError: If the text contains an object but none of them parse
+    """
+    # Fast path: the reply's first "{" opens the operation model and raw_decode parses
+    # it in C, stopping at its closing brace regardless of what follows
+    first = text.find("{")
+    if first == -1:
+        return None
+    try:
+        value, end = _decoder.raw_decode(text, first)
+        if isinstance(value, dict) and "cascade_schema" in value:
+            return value, first, end
+    except json.JSONDecodeError:
+        pass
+    
+    spans, unterminated = scan_json_objects(text)
+    found = None
+    error = None
+    for start, end in spans:
+        try:
+            value = json.loads(text[start:end])
+        except json.JSONDecodeError as e:
+            error = error or e
+            # A stray brace in prose can swallow the real object; try the next openings
+            recovered = _decode_after(text, start, end)
+            if recovered is None:
+                continue
+            value, start, end = recovered
+        if isinstance(value, dict) and "cascade_schema" in value:
+            return value, start, end
+        found = found or (value, start, end)
+    if found:
+        return found
+    if error:
+        raise error
+    if unterminated is not None:
+        # Truncated reply; report it the way json.loads would
+        json.loads(text[unterminated:])
+    return None
+
+class CascadeStreamParser:
+    """
+    Watch streamed reply text and hand out each cascade_schema operation as soon as it closes.
+
+    Call feed() with every text chunk; it returns the operations that were completed by
+    that chunk. Only the characters added since the last call are scanned.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.json_started = False
+        self.items_seen = 0
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_key = None
+        self._array_depth = None
+        self._item_start = None
+
+    def feed(self, chunk):
+        """
+        Append a chunk of reply text.
+
+        Returns:
+            list: (index, operation dict) pairs for operations completed by this chunk
+        """
+        self.text += chunk
+        completed = []
+        text = self.text
+        stack = self._stack
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    # Remember the last key seen directly inside the top-level object
+                    if len(stack) == 1:
+                        self._last_key = text[self._string_start + 1:i]
+                continue
+            if not stack and char != "{":
+                # Prose before the JSON object starts
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                self.json_started = True
+                if char == "[" and len(stack) == 1 and self._last_key == "cascade_schema":
+                    self._array_depth = len(stack) + 1
+                elif char == "{" and self._array_depth is not None and len(stack) == self._array_depth:
+                    self._item_start = i
+                stack.append(char)
+            elif char in "}]" and stack:
+                stack.pop()
+                if char == "]" and self._array_depth is not None and len(stack) == self._array_depth - 1:
+                    self._array_depth = None
+                elif char == "}" and self._item_start is not None and len(stack) == self._array_depth:
+                    try:
+                        completed.append((self.items_seen, json.loads(text[self._item_start:i + 1])))
+                    except json.JSONDecodeError as e:
+                        logging.warning(f"Skipping malformed streamed operation: {e}")
+                    self.items_seen += 1
+                    self._item_start = None
+        self._pos = len(text)
+        return completed
@@ -0,0 +1,208 @@
+"""
+Stage timers, event counters and per-turn traces for the refine pipeline.
+
+Disabled unless REFINER_METRICS=1 (or enable_metrics() is called); while disabled,
+stage() returns a shared no-op context manager and count() returns immediately.
+"""
+import os
+import time
+import uuid
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+METRICS_ENABLED = os.getenv("REFINER_METRICS", "0") == "1"
+
+# Histogram bucket upper bounds in seconds, from in-process parsing up to LLM round trips
+STAGE_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NULL_STAGE = nullcontext()
+_current_trace = ContextVar("refiner_trace", default=None)
+_lock = threading.Lock()
+_counters = {}
+_stages = {}  # stage name -> [bucket counts..., count, sum]
+
+# Most recent turn traces, newest last, for the debug panel
+recent_traces = deque(maxlen=50)
+
+def enable_metrics(enabled=True):
+    global METRICS_ENABLED
+    METRICS_ENABLED = enabled
+
+def metrics_enabled():
+    return METRICS_ENABLED
+
+def count(event, value=1):
+    """
+    Add value to the counter for event (e.g. "llm_cache_hits", "time_fallbacks").
+    """
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        _counters[event] = _counters.get(event, 0) + value
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.counters[event] = trace.counters.get(event, 0) + value
+
+def observe(name, seconds):
+    """
+    Record one duration for a stage in its histogram.
+    """
+    with _lock:
+        series = _stages.get(name)
+        if series is None:
+            series = _stages[name] = [0] * (len(STAGE_BUCKETS) + 1) + [0.0]
+        for index, bound in enumerate(STAGE_BUCKETS):
+            if seconds <= bound:
+                series[index] += 1
+                break
+        series[-2] += 1
+        series[-1] += seconds
+
+class _Stage:
+    __slots__ = ("name", "attributes", "started", "start_ns")
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.started
+        observe(self.name, duration)
+        trace = _current_trace.get()
+        if trace is not None:
+            if exc_type is not None:
+                self.attributes["error"] = exc_type.__name__
+            trace.spans.append((self.name, self.start_ns, duration, self.attributes))
+        return False
+
+def stage(name, **attributes):
+    """
+    Time a block of the pipeline:
+
+        with stage("geocode"):
+            loc = geocoder.geocode(query)
+
+    Returns:
+        A context manager; a shared no-op one while metrics are disabled
+    """
+    if not METRICS_ENABLED:
+        return _NULL_STAGE
+    return _Stage(name, attributes)
+
+class TurnTrace:
+    """
+    Spans and counters recorded while handling one conversation turn.
+
+    Spans are (name, start time in ns since the epoch, duration in seconds, attributes)
+    tuples. Work submitted to the cascade pool is included because the worker tasks run
+    in a copy of the submitting context.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        self.start_ns = time.time_ns()
+        self.duration = None
+        self.spans = []
+        self.counters = {}
+
+    def breakdown(self):
+        """
+        Total seconds and call count per stage, slowest first.
+        """
+        totals = {}
+        for name, _, duration, _ in list(self.spans):
+            total = totals.setdefault(name, [0.0, 0])
+            total[0] += duration
+            total[1] += 1
+        return sorted(((name, seconds, calls) for name, (seconds, calls) in totals.items()), key=lambda row: -row[1])
+
+    def to_otel(self):
+        """
+        The trace as OTLP/JSON span dicts, with every stage a child of the turn span.
+        """
+        root_id = uuid.uuid4().hex[:16]
+        spans = [_otel_span(self.trace_id, root_id, None, self.name, self.start_ns, self.duration or 0.0, {})]
+        for name, start_ns, duration, attributes in list(self.spans):
+            spans.append(_otel_span(self.trace_id, uuid.uuid4().hex[:16], root_id, name, start_ns, duration, attributes))
+        return spans
+
+def _otel_span(trace_id, span_id, parent_id, name, start_ns, duration, attributes):
+    span = {
+        "traceId": trace_id,
+        "spanId": span_id,
+        "name": name,
+        "startTimeUnixNano": str(start_ns),
+        "endTimeUnixNano": str(start_ns + int(duration * 1e9)),
+        "attributes": [{"key": key, "value": {"stringValue": str(value)}} for key, value in attributes.items()],
+    }
+    if parent_id:
+        span["parentSpanId"] = parent_id
+    return span
+
+@contextmanager
+def trace_turn(name="refine_turn"):
+    """
+    Collect the spans and counters of one turn into a TurnTrace.
+
+    Yields:
+        TurnTrace, or None while metrics are disabled
+    """
+    if not METRICS_ENABLED:
+        yield None
+        return
+    trace = TurnTrace(name)
+    token = _current_trace.set(trace)
+    started = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        trace.duration = time.perf_counter() - started
+        _current_trace.reset(token)
+        observe(name, trace.duration)
+        recent_traces.append(trace)
+
+def snapshot():
+    """
+    Copy of the process-wide counters and stage histograms.
+    """
+    with _lock:
+        return dict(_counters), {name: list(series) for name, series in _stages.items()}
+
+def reset_metrics():
+    with _lock:
+        _counters.clear()
+        _stages.clear()
+    recent_traces.clear()
+
+def render_prometheus():
+    """
+    Counters and stage histograms in the Prometheus text exposition format.
+    """
+    counters, stages = snapshot()
+    lines = [
+        "# HELP refiner_events_total Pipeline events (cache hits, time fallbacks, parse failures).",
+        "# TYPE refiner_events_total counter",
+    ]
+    for event, value in sorted(counters.items()):
+        lines.append(f'refiner_events_total{{event="{event}"}} {value}')
+    lines += [
+        "# HELP refiner_stage_seconds Time spent in each pipeline stage.",
+        "# TYPE refiner_stage_seconds histogram",
+    ]
+    for name, series in sorted(stages.items()):
+        cumulative = 0
+        for bound, bucket in zip(STAGE_BUCKETS, series):
+            cumulative += bucket
+            lines.append(f'refiner_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'refiner_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {series[-2]}')
+        lines.append(f'refiner_stage_seconds_count{{stage="{name}"}} {series[-2]}')
+        lines.append(f'refiner_stage_seconds_sum{{stage="{name}"}} {series[-1]:.6f}')
+    return "\n".join(lines) + "\n"
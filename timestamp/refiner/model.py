@@ -0,0 +1,219 @@
+"""
+Typed, slot-based representation of the operation model returned by the LLM.
+
+Every record keeps the JSON keys it knows as slots and any unknown keys in `extra`,
+and remembers the key order of the dict it was loaded from, so from_dict/to_dict
+round-trips whatever the model produced, explicit nulls included.
+"""
+import json
+
+class _Record:
+    """
+    Base class; subclasses list their JSON fields in _fields as (key, kind) pairs where
+    kind is None for plain values, a _Record subclass, or a one-element list for a list of it.
+    """
+    __slots__ = ("extra", "_order")
+    _fields = ()
+
+    def __init__(self, **values):
+        for key, _ in self._fields:
+            setattr(self, key, values.pop(key, None))
+        self.extra = values or None
+        self._order = None
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        values = ", ".join(f"{key}={getattr(self, key)!r}" for key, _ in self._fields if getattr(self, key) is not None)
+        return f"{type(self).__name__}({values})"
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls.__new__(cls)
+        matched = 0
+        for key, kind in cls._fields:
+            value = data.get(key)
+            if value is not None:
+                matched += 1
+                if kind is not None:
+                    value = _load(kind, value, "from_dict")
+            setattr(record, key, value)
+        # Only pay for the set difference when the dict has keys we do not model or explicit nulls
+        record.extra = ({k: v for k, v in data.items() if k not in cls._keys} or None) if len(data) > matched else None
+        record._order = cls._layout(tuple(data), len(data) > matched)
+        return record
+
+    @classmethod
+    def _layout(cls, order, irregular):
+        # None when to_dict's default layout (set fields in _fields order) reproduces the
+        # dict; otherwise the key order, interned so records shaped alike share one tuple
+        layouts = cls._layouts
+        if order in layouts:
+            layout = layouts[order]
+        else:
+            layout = None if order == tuple(key for key, _ in cls._fields if key in order) else order
+            if len(layouts) < _MAX_LAYOUTS:
+                layouts[order] = layout
+        return order if irregular and layout is None else layout
+
+    def to_dict(self):
+        """
+        Loaded records come back with their original keys in their original order, explicit
+        nulls included; fields set since go after them. Built records skip None fields.
+        """
+        data = {}
+        extra = self.extra or {}
+        if self._order is not None:
+            kinds = self._kinds
+            for key in self._order:
+                if key in kinds:
+                    value = getattr(self, key)
+                    kind = kinds[key]
+                    data[key] = _dump(kind, value, "to_dict") if value is not None and kind is not None else value
+                elif key in extra:
+                    data[key] = extra[key]
+        for key, kind in self._fields:
+            if key not in data:
+                value = getattr(self, key)
+                if value is not None:
+                    data[key] = _dump(kind, value, "to_dict") if kind is not None else value
+        for key, value in extra.items():
+            if key not in data:
+                data[key] = value
+        return data
+
+    @classmethod
+    def from_row(cls, row):
+        record = cls.__new__(cls)
+        for (key, kind), value in zip(cls._fields, row):
+            if value is not None and kind is not None:
+                value = _load(kind, value, "from_row")
+            setattr(record, key, value)
+        record.extra = row[len(cls._fields)]
+        record._order = tuple(row[len(cls._fields) + 1]) if len(row) > len(cls._fields) + 1 else None
+        return record
+
+    def to_row(self):
+        """
+        Positional form (field values in _fields order, then extra, then the original key order
+        for loaded records) used for binary serialization.
+        """
+        row = []
+        for key, kind in self._fields:
+            value = getattr(self, key)
+            row.append(_dump(kind, value, "to_row") if value is not None and kind is not None else value)
+        row.append(self.extra)
+        if self._order is not None:
+            row.append(list(self._order))
+        return row
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._keys = frozenset(key for key, _ in cls._fields)
+        cls._kinds = dict(cls._fields)
+        cls._layouts = {}
+
+# Distinct key orders remembered per record class
+_MAX_LAYOUTS = 256
+
+# Input shape each loader expects for a nested record
+_LOADER_INPUT = {"from_dict": dict, "from_row": list}
+
+def _load(kind, value, method):
+    # Values the model got wrong (e.g. a string where an object belongs) are kept as they are
+    expected = _LOADER_INPUT[method]
+    if isinstance(kind, list):
+        if not isinstance(value, list):
+            return value
+        load = getattr(kind[0], method)
+        return [load(v) if isinstance(v, expected) else v for v in value]
+    return getattr(kind, method)(value) if isinstance(value, expected) else value
+
+def _dump(kind, value, method):
+    if isinstance(kind, list):
+        if not isinstance(value, list):
+            return value
+        return [getattr(v, method)() if isinstance(v, _Record) else v for v in value]
+    return getattr(value, method)() if isinstance(value, _Record) else value
+
+class Entity(_Record):
+    __slots__ = ("type", "description", "context")
+    _fields = (("type", None), ("description", None), ("context", None))
+
+class Opera(_Record):
+    __slots__ = ("intent", "action", "entity")
+    _fields = (("intent", None), ("action", None), ("entity", Entity))
+
+class Fallback(Opera):
+    __slots__ = ()
+
+class Condition(_Record):
+    __slots__ = ("field", "operator", "value", "unit")
+    _fields = (("field", None), ("operator", None), ("value", None), ("unit", None))
+
+class ControlFlow(_Record):
+    __slots__ = ("type", "logicalOperator", "description", "conditions", "opera")
+    _fields = (
+        ("type", None), ("logicalOperator", None), ("description", None),
+        ("conditions", [Condition]), ("opera", Opera),
+    )
+
+class Time(_Record):
+    __slots__ = (
+        "temporal_state", "user_time", "exec_time", "constraint", "timezone", "user_time_original", "note",
+        "recurrence", "upcoming_exec_times",
+    )
+    _fields = (
+        ("temporal_state", None), ("user_time", None), ("exec_time", None), ("constraint", None),
+        ("timezone", None), ("user_time_original", None), ("note", None),
+        ("recurrence", None), ("upcoming_exec_times", None),
+    )
+
+class OperationMatrix(_Record):
+    __slots__ = ("type", "contingency", "time", "description", "location", "control_flow", "fallback")
+    _fields = (
+        ("type", None), ("contingency", None), ("time", Time), ("description", None),
+        ("location", None), ("control_flow", [ControlFlow]), ("fallback", Fallback),
+    )
+
+class CascadeResult(_Record):
+    """
+    A full LLM result. to_json() is computed once and reused by the UI and the chat history.
+    """
+    __slots__ = ("agenda_specs", "cascade_schema", "_json")
+    _fields = (("agenda_specs", None), ("cascade_schema", [OperationMatrix]))
+
+    def __init__(self, **values):
+        super().__init__(**values)
+        self._json = None
+
+    @classmethod
+    def from_dict(cls, data):
+        result = super().from_dict(data)
+        result._json = None
+        return result
+
+    @classmethod
+    def from_row(cls, row):
+        result = super().from_row(row)
+        result._json = None
+        return result
+
+    def to_json(self):
+        # Cached: build the result (including time normalization) before the first call
+        if self._json is None:
+            self._json = json.dumps(self.to_dict(), indent=2)
+        return self._json
+
+    def to_msgpack(self):
+        """
+        Compact binary form: positional rows instead of repeated key names.
+        """
+        import msgpack
+        return msgpack.packb(self.to_row(), use_bin_type=True)
+
+    @classmethod
+    def from_msgpack(cls, data):
+        import msgpack
+        return cls.from_row(msgpack.unpackb(data, raw=False))
@@ -0,0 +1,38 @@
+"""
+One refine turn end to end (LLM call, cascade time normalization, history update) for headless callers.
+"""
+import asyncio
+
+from .cascade import normalize_cascade_schema
+from .llm import refine_with_llm_conversation_async
+from .metrics import trace_turn
+from .model import CascadeResult
+
+async def refine_turn(store, session_id, user_input):
+    """
+    Run one user message through the refiner, keeping the conversation in store.
+    
+    Args:
+        store: SessionStore holding the conversation history
+        session_id: Conversation id
+        user_input: The user's message
+        
+    Returns:
+        dict: {"session_id", "result", "reply"} - result is the normalized JSON or None
+    """
+    user_message = {"role": "user", "content": user_input}
+    conversation = store.load(session_id) + [user_message]
+    with trace_turn():
+        result, reply = await refine_with_llm_conversation_async(conversation)
+        if result:
+            # Geocoding can block, keep it off the event loop (to_thread carries the turn trace along)
+            await asyncio.to_thread(normalize_cascade_schema, result)
+    
+    if result:
+        content = f"```json\n{CascadeResult.from_dict(result).to_json()}\n```"
+        if reply:
+            content += f"\n{reply}"
+        store.append(session_id, user_message, {"role": "assistant", "content": content})
+    elif reply:
+        store.append(session_id, user_message, {"role": "assistant", "content": reply})
+    return {"session_id": session_id, "result": result, "reply": reply}
@@ -0,0 +1,451 @@
+"""
+Relative ("in 2 hours", "tomorrow at 9", "before Friday") and recurring ("every Monday 10am PKT")
+time expressions, resolved against a reference clock.
+
+Recurrences are kept as RRULE-style rules and expanded lazily into chunks of Unix
+timestamps. Wall-clock rules (daily and longer) keep their local time across DST changes;
+sub-daily rules step in absolute time.
+"""
+import os
+import re
+import calendar
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pytz
+
+from .dateformats import parse_datetime_fast
+from .timeparse import _localize_epochs, _timezone_name, scan_time_spans
+from .timezones import resolve_location_timezone, resolve_manual_timezone
+
+# Number of upcoming exec_times stored with a recurring operation
+RECURRENCE_PREVIEW = int(os.getenv("RECURRENCE_PREVIEW", "10"))
+
+# Monthly/yearly steps in a row without the rule's day of the month after which it is taken
+# to never occur ("every year on the 31st" from April). Real gaps are at most 12 steps, or
+# 8 for February 29th.
+MAX_EMPTY_STEPS = 100
+
+# Furthest ahead any expression resolves or any rule expands; "in 99999999 weeks" is not a
+# time anyone means, and an unbounded rule stops here even when the caller keeps iterating
+HORIZON_YEARS = 100
+_HORIZON_SECONDS = HORIZON_YEARS * 366 * 86400
+_MAX_AMOUNT = {"minute": _HORIZON_SECONDS // 60, "hour": _HORIZON_SECONDS // 3600, "day": HORIZON_YEARS * 366,
+               "week": HORIZON_YEARS * 53, "month": HORIZON_YEARS * 12}
+# Largest "every N <unit>" interval accepted
+MAX_INTERVAL = 1000
+
+Recurrence = namedtuple(
+    "Recurrence", ["freq", "interval", "byweekday", "bymonthday", "hour", "minute", "count", "until"]
+)
+Recurrence.__doc__ = """
+A recurrence rule. byweekday holds 0 (Monday) - 6 (Sunday); hour/minute are local wall-clock
+time; until is a Unix timestamp. Fields left as None take their value from the start time.
+"""
+
+TimeExpression = namedtuple("TimeExpression", ["exec_time", "timezone", "constraint", "recurrence"])
+
+_WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+_WEEKDAY_NAMES = {
+    "monday": 0, "mon": 0, "tuesday": 1, "tues": 1, "tue": 1, "wednesday": 2, "wed": 2,
+    "thursday": 3, "thurs": 3, "thu": 3, "friday": 4, "fri": 4, "saturday": 5, "sat": 5,
+    "sunday": 6, "sun": 6,
+}
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "other": 2,
+}
+_NUMBER = r"(?:\d+|" + "|".join(_NUMBER_WORDS) + r")"
+_WEEKDAY_ALTERNATION = "|".join(sorted(_WEEKDAY_NAMES, key=len, reverse=True))
+_WEEKDAY = r"(?:" + _WEEKDAY_ALTERNATION + r")s?"
+_UNIT_SECONDS = {"minute": 60, "hour": 3600}
+_FREQ_ADVERBS = {"hourly": "HOURLY", "daily": "DAILY", "weekly": "WEEKLY", "monthly": "MONTHLY", "yearly": "YEARLY", "annually": "YEARLY"}
+_UNIT_FREQ = {"minute": "MINUTELY", "hour": "HOURLY", "day": "DAILY", "week": "WEEKLY", "month": "MONTHLY", "year": "YEARLY"}
+_TIME_WORDS = {"noon": (12, 0), "midnight": (0, 0), "morning": (9, 0), "evening": (18, 0)}
+
+_QUALIFIER = re.compile(
+    r"^(?:(?P<before>before|by|until|no later than|not later than)|(?P<after>after|not before|no earlier than))\s+"
+)
+_NOW = re.compile(r"^(?:right now|now|immediately|asap|as soon as possible)$")
+_IN_DURATION = re.compile(
+    r"\bin\s+(?P<n>" + _NUMBER + r")\s+(?P<unit>min(?:ute)?|h(?:ou)?r|day|week|month)s?\b"
+    r"|\b(?P<n_from>" + _NUMBER + r")\s+(?P<unit_from>min(?:ute)?|h(?:ou)?r|day|week|month)s?\s+from\s+now\b"
+)
+_DAY_WORD = re.compile(r"\b(?P<day>day after tomorrow|tomorrow|today|tonight)\b")
+_NEXT_PERIOD = re.compile(r"\bnext\s+(?P<period>week|month)\b")
+_WEEKDAY_MENTION = re.compile(r"\b(?:(?P<next>next|this|coming)\s+)?(?P<weekday>" + _WEEKDAY + r")\b")
+_TIME_OF_DAY = re.compile(
+    r"(?:\bat\s+)?\b(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*(?P<ampm>am|pm)\b"
+    r"|\bat\s+(?P<hour24>\d{1,2})(?::(?P<minute24>\d{2}))?\b"
+    r"|\b(?P<hh>\d{1,2}):(?P<mm>\d{2})\b"
+    r"|\b(?P<word>noon|midnight|morning|evening)\b"
+)
+_EVERY = re.compile(
+    r"\b(?:every|each)\s+(?:(?P<n>" + _NUMBER + r")\s+)?"
+    r"(?P<unit>min(?:ute)?|h(?:ou)?r|day|week|month|year|weekday|weekend|" + _WEEKDAY_ALTERNATION + r")s?\b"
+    r"|\b(?P<adverb>hourly|daily|weekly|monthly|yearly|annually)\b"
+)
+# A calendar date without a year ("April 25", "25 April", "4/25", "May 1st"); such strings go
+# to the absolute parser even when they also contain relative words such as "at" or "by"
+_DATE_MENTION = re.compile(
+    r"\b(?:january|february|march|april|may|june|july|august|september|october|november|december|"
+    r"jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec)\b\.?"
+    r"|(?<![\d.])\d{1,2}[/-]\d{1,2}(?![\d.])"
+)
+_MONTH_DAY = re.compile(r"\bthe\s+(?P<day>\d{1,2})(?:st|nd|rd|th)\b")
+_UNTIL = re.compile(r"\buntil\s+(?P<until>.+)$")
+# Cheap check for words that can start a relative expression, before any zone is resolved
+_RELATIVE_HINT = re.compile(
+    r"\b(?:now|immediately|asap|in|from|today|tonight|tomorrow|next|this|coming|every|each|"
+    r"hourly|daily|weekly|monthly|yearly|annually|before|by|after|until|at|noon|midnight|"
+    + _WEEKDAY_ALTERNATION + r")\b",
+    re.IGNORECASE,
+)
+_COUNT = re.compile(r"\b(?:for\s+)?(?P<count>\d+)\s+times\b|\bfor\s+(?P<n>" + _NUMBER + r")\s+(?P<unit>day|week|month)s?\b")
+
+def _number(word):
+    return int(word) if word.isdigit() else _NUMBER_WORDS[word]
+
+def _unit(word):
+    # "hr" / "min" spellings -> canonical unit names
+    return {"hr": "hour", "min": "minute"}.get(word, word)
+
+def _weekday(name):
+    # "monday", "mon" or "mondays" -> 0
+    return _WEEKDAY_NAMES[name] if name in _WEEKDAY_NAMES else _WEEKDAY_NAMES[name[:-1]]
+
+def looks_relative(text):
+    """
+    True if text may be a relative or recurring expression (a cheap pre-check for parse_relative_time).
+    """
+    return _RELATIVE_HINT.search(text) is not None
+
+def split_constraint(text):
+    """
+    Split a leading "before" / "by" / "after" qualifier off a time string.
+
+    Returns:
+        tuple: ("BEFORE" | "AFTER" | None, the rest of the string)
+    """
+    match = _QUALIFIER.match(text.lower())
+    if not match:
+        return None, text
+    return ("BEFORE" if match.group("before") else "AFTER"), text[match.end():]
+
+def _time_of_day(text):
+    match = _TIME_OF_DAY.search(text)
+    if not match:
+        return None
+    if match.group("word"):
+        return _TIME_WORDS[match.group("word")]
+    if match.group("ampm"):
+        hour, minute = int(match.group("hour")), int(match.group("minute") or 0)
+        if not 1 <= hour <= 12:
+            return None
+        return hour % 12 + (12 if match.group("ampm") == "pm" else 0), minute
+    hour = int(match.group("hour24") or match.group("hh"))
+    minute = int(match.group("minute24") or match.group("mm") or 0)
+    return (hour, minute) if hour < 24 and minute < 60 else None
+
+def _localize(tz, naive):
+    # pytz picks standard time for a wall-clock time in a DST gap, as RFC 5545 prescribes
+    return int(tz.localize(naive).timestamp())
+
+def _add_months(value, months):
+    # Same day of the month, clamped to the length of the target month
+    year, month = divmod(value.year * 12 + value.month - 1 + months, 12)
+    return value.replace(year=year, month=month + 1, day=min(value.day, calendar.monthrange(year, month + 1)[1]))
+
+def _resolve_single(text, tz, now):
+    """
+    Resolve a one-off relative expression to a Unix timestamp, or None.
+    """
+    if _NOW.match(text):
+        return int(now)
+    local_now = datetime.fromtimestamp(now, tz).replace(tzinfo=None)
+
+    match = _IN_DURATION.search(text)
+    if match:
+        amount = _number(match.group("n") or match.group("n_from"))
+        unit = _unit(match.group("unit") or match.group("unit_from"))
+        if amount > _MAX_AMOUNT[unit]:
+            return None
+        if unit in _UNIT_SECONDS:
+            # Hours and minutes are elapsed time, the same across a DST change
+            return int(now) + amount * _UNIT_SECONDS[unit]
+        # Days, weeks and months keep the wall-clock time
+        if unit == "month":
+            target = _add_months(local_now, amount)
+        else:
+            target = local_now + timedelta(days=amount * (7 if unit == "week" else 1))
+        return _localize(tz, target)
+
+    time_of_day = _time_of_day(text)
+    day = None
+    match = _DAY_WORD.search(text)
+    if match:
+        offset = {"today": 0, "tonight": 0, "tomorrow": 1, "day after tomorrow": 2}[match.group("day")]
+        day = local_now.date() + timedelta(days=offset)
+        if match.group("day") == "tonight" and time_of_day is None:
+            time_of_day = (20, 0)
+    else:
+        match = _WEEKDAY_MENTION.search(text)
+        if match:
+            weekday = _weekday(match.group("weekday"))
+            ahead = (weekday - local_now.weekday()) % 7
+            if match.group("next") == "next" and ahead == 0:
+                ahead = 7
+            day = local_now.date() + timedelta(days=ahead)
+            # Today's occurrence only counts if it is still ahead; without a time it is midnight, already gone
+            if ahead == 0 and (time_of_day or (0, 0)) <= (local_now.hour, local_now.minute):
+                day += timedelta(days=7)
+        else:
+            match = _NEXT_PERIOD.search(text)
+            if match:
+                if match.group("period") == "week":
+                    day = local_now.date() + timedelta(days=7 - local_now.weekday())
+                else:
+                    day = _add_months(local_now.date().replace(day=1), 1)
+    if day is None:
+        if time_of_day is None:
+            return None
+        # A bare time of day is the next time the clock shows it
+        day = local_now.date()
+        if time_of_day <= (local_now.hour, local_now.minute):
+            day += timedelta(days=1)
+    hour, minute = time_of_day or (0, 0)
+    return _localize(tz, datetime(day.year, day.month, day.day, hour, minute))
+
+def _until_timestamp(text, tz, now):
+    until = _resolve_single(text, tz, now)
+    if until is not None:
+        return until
+    parsed, _ = parse_datetime_fast(text)
+    if parsed is None:
+        return None
+    if parsed.tzinfo:
+        return int(parsed.timestamp())
+    if (parsed.hour, parsed.minute, parsed.second) == (0, 0, 0):
+        # A bare date includes the whole day
+        parsed = parsed.replace(hour=23, minute=59, second=59)
+    return _localize(tz, parsed)
+
+def _parse_recurrence(text, tz, now):
+    match = _EVERY.search(text)
+    if not match:
+        return None
+    # Bounds first, so "until Friday" is not read as a weekday of the rule
+    until = count = None
+    until_match = _UNTIL.search(text)
+    if until_match:
+        until = _until_timestamp(until_match.group("until"), tz, now)
+        text = text[:until_match.start()]
+    count_match = _COUNT.search(text)
+    if count_match:
+        if count_match.group("count"):
+            count = int(count_match.group("count"))
+        else:
+            days = _number(count_match.group("n")) * {"day": 1, "week": 7, "month": 30}[count_match.group("unit")]
+            until = int(now) + days * 86400
+        text = text[:count_match.start()] + text[count_match.end():]
+
+    weekdays = sorted({_weekday(mention.group("weekday")) for mention in _WEEKDAY_MENTION.finditer(text)})
+    interval = _number(match.group("n")) if match.group("n") else 1
+    if not 1 <= interval <= MAX_INTERVAL:
+        # "every 0 days" would never advance
+        return None
+    if match.group("adverb"):
+        freq = _FREQ_ADVERBS[match.group("adverb")]
+    else:
+        unit = _unit(match.group("unit"))
+        if unit == "weekday":
+            freq, weekdays = "WEEKLY", [0, 1, 2, 3, 4]
+        elif unit == "weekend":
+            freq, weekdays = "WEEKLY", [5, 6]
+        elif unit in _WEEKDAY_NAMES:
+            freq = "WEEKLY"
+        else:
+            freq = _UNIT_FREQ[unit]
+    if weekdays and freq == "DAILY":
+        freq = "WEEKLY"
+
+    month_day = _MONTH_DAY.search(text)
+    bymonthday = int(month_day.group("day")) if month_day and freq in ("MONTHLY", "YEARLY") else None
+    if bymonthday is not None and not 1 <= bymonthday <= 31:
+        # "every month on the 45th" is not a rule we can honour
+        return None
+    time_of_day = _time_of_day(text)
+    hour, minute = time_of_day if time_of_day else (None, None)
+    return Recurrence(freq, interval, tuple(weekdays), bymonthday, hour, minute, count, until)
+
+def recurrence_to_rrule(recurrence):
+    """
+    Format a Recurrence as an RFC 5545 RRULE value, e.g. "FREQ=WEEKLY;BYDAY=MO;BYHOUR=10;BYMINUTE=0".
+    """
+    parts = [f"FREQ={recurrence.freq}"]
+    if recurrence.interval != 1:
+        parts.append(f"INTERVAL={recurrence.interval}")
+    if recurrence.byweekday:
+        parts.append("BYDAY=" + ",".join(_WEEKDAYS[day] for day in recurrence.byweekday))
+    if recurrence.bymonthday:
+        parts.append(f"BYMONTHDAY={recurrence.bymonthday}")
+    if recurrence.hour is not None:
+        parts.append(f"BYHOUR={recurrence.hour};BYMINUTE={recurrence.minute}")
+    if recurrence.count:
+        parts.append(f"COUNT={recurrence.count}")
+    if recurrence.until is not None:
+        parts.append("UNTIL=" + datetime.fromtimestamp(recurrence.until, pytz.UTC).strftime("%Y%m%dT%H%M%SZ"))
+    return ";".join(parts)
+
+def _local_day_chunks(recurrence, first_day, chunk_size):
+    """
+    Yield arrays of candidate local days (days since 1970-01-01) in increasing order.
+
+    Daily and weekly rules never run out; monthly and yearly ones stop after
+    MAX_EMPTY_STEPS steps without their day of the month.
+    """
+    import numpy as np
+
+    if recurrence.freq == "DAILY":
+        step = recurrence.interval
+        start = first_day
+        while True:
+            yield start + step * np.arange(chunk_size, dtype=np.int64)
+            start += step * chunk_size
+    elif recurrence.freq == "WEEKLY":
+        # Weeks start on Monday; 1970-01-01 was a Thursday
+        offsets = np.array(recurrence.byweekday, dtype=np.int64)
+        week_start = first_day - (first_day + 3) % 7
+        weeks = max(chunk_size // len(offsets), 1)
+        while True:
+            starts = week_start + 7 * recurrence.interval * np.arange(weeks, dtype=np.int64)
+            yield (starts[:, None] + offsets[None, :]).ravel()
+            week_start += 7 * recurrence.interval * weeks
+    else:
+        # MONTHLY / YEARLY: the same day of the month, skipping months that do not have it
+        step = recurrence.interval * (12 if recurrence.freq == "YEARLY" else 1)
+        month = np.datetime64(int(first_day), "D").astype("datetime64[M]")
+        empty_steps = 0
+        while empty_steps < MAX_EMPTY_STEPS:
+            months = month + step * np.arange(chunk_size)
+            days = months.astype("datetime64[D]") + (recurrence.bymonthday - 1)
+            valid = days.astype("datetime64[M]") == months
+            found = np.flatnonzero(valid)
+            empty_steps = chunk_size - 1 - found[-1] if len(found) else empty_steps + chunk_size
+            yield days[valid].astype(np.int64)
+            month = month + step * chunk_size
+
+def iter_exec_times(recurrence, tz, start, chunk_size=512):
+    """
+    Lazily expand a recurrence into Unix timestamps at or after start.
+
+    Args:
+        recurrence: Recurrence rule
+        tz: pytz timezone the rule's wall-clock times are in
+        start: Unix timestamp of the reference clock (the rule's DTSTART)
+        chunk_size: Occurrences computed per step
+
+    Yields:
+        numpy int64 arrays of increasing timestamps; stops at the rule's count or until, if any,
+        and in any case HORIZON_YEARS after start
+    """
+    import numpy as np
+
+    if recurrence.interval < 1:
+        raise ValueError(f"Recurrence interval must be at least 1, got {recurrence.interval}")
+    remaining = recurrence.count
+    start = int(start)
+    until = start + _HORIZON_SECONDS if recurrence.until is None else min(recurrence.until, start + _HORIZON_SECONDS)
+
+    if recurrence.freq in ("MINUTELY", "HOURLY"):
+        step = recurrence.interval * (60 if recurrence.freq == "MINUTELY" else 3600)
+        first = start - start % 60
+        chunks = (first + step * (index + np.arange(chunk_size, dtype=np.int64)) for index in range(0, 1 << 62, chunk_size))
+    else:
+        local_start = datetime.fromtimestamp(start, tz).replace(tzinfo=None)
+        hour = local_start.hour if recurrence.hour is None else recurrence.hour
+        minute = local_start.minute if recurrence.minute is None else recurrence.minute
+        if recurrence.freq == "WEEKLY" and not recurrence.byweekday:
+            recurrence = recurrence._replace(byweekday=(local_start.weekday(),))
+        elif recurrence.freq in ("MONTHLY", "YEARLY") and not recurrence.bymonthday:
+            recurrence = recurrence._replace(bymonthday=local_start.day)
+        first_day = (local_start.date() - datetime(1970, 1, 1).date()).days
+        time_of_day = hour * 3600 + minute * 60
+
+        def localized(days):
+            local_seconds = days * 86400 + time_of_day
+            epochs, unsettled = _localize_epochs(local_seconds, tz)
+            for row in np.flatnonzero(unsettled):
+                epochs[row] = _localize(tz, datetime(1970, 1, 1) + timedelta(seconds=int(local_seconds[row])))
+            return epochs
+
+        chunks = (localized(days) for days in _local_day_chunks(recurrence, first_day, chunk_size))
+
+    for epochs in chunks:
+        epochs = epochs[epochs >= start]
+        if len(epochs) and epochs[-1] > until:
+            epochs = epochs[epochs <= until]
+            if len(epochs):
+                yield epochs[:remaining] if remaining is not None else epochs
+            return
+        if remaining is not None:
+            epochs = epochs[:remaining]
+            remaining -= len(epochs)
+        if len(epochs):
+            yield epochs
+        if remaining == 0:
+            return
+
+def upcoming_exec_times(recurrence, tz, start, limit=RECURRENCE_PREVIEW):
+    """
+    The first `limit` occurrences of a recurrence at or after start, as a list of Unix timestamps.
+    """
+    collected = []
+    for chunk in iter_exec_times(recurrence, tz, start, chunk_size=max(limit, 16)):
+        collected.extend(int(epoch) for epoch in chunk[:limit - len(collected)])
+        if len(collected) >= limit:
+            break
+    return collected
+
+def parse_relative_time(text, tz, now):
+    """
+    Resolve a relative or recurring time expression against a reference clock.
+
+    Strings with an explicit calendar date and no recurrence ("before April 25, 2025",
+    "April 25 at 3pm", "on 4/25 at 3pm") are left to the absolute parser.
+
+    Args:
+        text: user_time string, e.g. "tomorrow at 9" or "every Monday 10am PKT"
+        tz: pytz timezone the expression's wall-clock times are in
+        now: Reference Unix timestamp
+
+    Returns:
+        TimeExpression (exec_time, timezone name, constraint or None, Recurrence or None),
+        or None when text is not a relative expression
+    """
+    constraint, rest = split_constraint(text.strip())
+    rest = " ".join(rest.lower().split())
+    recurrence = _parse_recurrence(rest, tz, now)
+    if recurrence is not None:
+        upcoming = upcoming_exec_times(recurrence, tz, now, limit=1)
+        exec_time = upcoming[0] if upcoming else None
+        return TimeExpression(exec_time, _timezone_name(tz), constraint, recurrence)
+    if _EVERY.search(rest):
+        # A rule that was rejected ("every 0 days at 9am") is not a one-off time either
+        return None
+    if _DATE_MENTION.search(rest) or any(span.kind == "date" for span in scan_time_spans(rest)):
+        return None
+    exec_time = _resolve_single(rest, tz, now)
+    if exec_time is None:
+        return None
+    return TimeExpression(exec_time, _timezone_name(tz), constraint, None)
+
+def resolve_expression_timezone(text, location):
+    """
+    The zone a relative expression is meant in: an abbreviation in the text, else the location, else UTC.
+    """
+    manual_tz = resolve_manual_timezone(text)
+    if manual_tz != pytz.UTC:
+        return manual_tz
+    tz_name = resolve_location_timezone(location) if location and isinstance(location, str) else None
+    return pytz.timezone(tz_name) if tz_name else pytz.UTC
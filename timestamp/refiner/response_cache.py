@@ -0,0 +1,183 @@
+"""
+Cache of LLM completions keyed on the exact request that produced them.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Completions live in the user's cache directory, not next to the code
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "refiner", "llm_cache.sqlite3"
+))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+# Requests sampled hotter than this are expected to vary, so they are never cached
+LLM_CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.5"))
+
+def _normalize_message(message):
+    # Whitespace differences should not defeat the cache
+    return {"role": message["role"], "content": " ".join(message["content"].split())}
+
+class ResponseCache:
+    """
+    Store completion text by a hash of model, system prompt and normalized messages.
+
+    Entries live in an in-process LRU and, optionally, a SQLite table so they survive
+    restarts. Both layers expire entries after ttl seconds and the SQLite table is trimmed
+    to max_disk_entries, oldest first.
+
+    Args:
+        db_path: SQLite file path, or None to keep the cache in memory only
+        ttl: Seconds a cached completion stays valid (0 disables the cache)
+        maxsize: Maximum number of entries kept in the in-process LRU
+        max_disk_entries: Maximum number of rows kept in SQLite
+        max_temperature: Requests with a higher temperature, or asking for several choices, bypass the cache
+    """
+
+    def __init__(self, db_path=None, ttl=LLM_CACHE_TTL, maxsize=256, max_disk_entries=5000,
+                 max_temperature=LLM_CACHE_MAX_TEMPERATURE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.max_disk_entries = max_disk_entries
+        self.max_temperature = max_temperature
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "seconds_saved": 0.0}
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path and ttl > 0:
+            try:
+                if db_path != ":memory:":
+                    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_response ("
+                    "key TEXT PRIMARY KEY, content TEXT NOT NULL, latency REAL NOT NULL, "
+                    "created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._db.commit()
+            except (OSError, sqlite3.Error) as db_error:
+                logging.warning(f"LLM cache database unavailable, using memory only: {db_error}")
+                self._db = None
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    @staticmethod
+    def key(payload):
+        """
+        Hash the parts of a chat completion payload that determine its output.
+        """
+        messages = payload["messages"]
+        system_prompt = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+        material = {
+            "model": payload.get("model"),
+            "temperature": payload.get("temperature"),
+            "system_prompt": hashlib.sha256(system_prompt.encode()).hexdigest(),
+            "messages": [_normalize_message(message) for message in messages if message["role"] != "system"],
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+    def request_key(self, payload):
+        """
+        The key for payload, or None when the request is not deterministic enough to replay.
+        """
+        temperature = payload.get("temperature")
+        if (temperature is not None and temperature > self.max_temperature) or payload.get("n", 1) != 1:
+            return None
+        return self.key(payload)
+
+    def get(self, key):
+        """
+        Return the cached completion text for key, or None (always for a None key).
+        """
+        if not self.enabled or key is None:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[2] < now:
+                del self._memory[key]
+                entry = None
+            if entry is None and self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT content, latency, expires_at FROM llm_response WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as db_error:
+                    logging.warning(f"LLM cache read failed: {db_error}")
+                    row = None
+                if row is not None and row[2] >= now:
+                    entry = row
+                    self._set_memory(key, entry)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._memory.move_to_end(key)
+            self.stats["hits"] += 1
+            self.stats["seconds_saved"] += entry[1]
+            return entry[0]
+
+    def _set_memory(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def set(self, key, content, latency):
+        """
+        Store completion text along with how long the request took, for the latency-saved metric.
+        """
+        if not self.enabled or key is None:
+            return
+        now = time.time()
+        entry = (content, latency, now + self.ttl)
+        with self._lock:
+            self._set_memory(key, entry)
+            self.stats["stores"] += 1
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_response (key, content, latency, created_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, content, latency, now, entry[2]),
+                )
+                self._db.execute("DELETE FROM llm_response WHERE expires_at < ?", (now,))
+                self._db.execute(
+                    "DELETE FROM llm_response WHERE key NOT IN "
+                    "(SELECT key FROM llm_response ORDER BY created_at DESC LIMIT ?)",
+                    (self.max_disk_entries,),
+                )
+                self._db.commit()
+            except sqlite3.Error as db_error:
+                logging.warning(f"LLM cache write failed: {db_error}")
+
+    def hit_ratio(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_response")
+                self._db.commit()
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """
+    Return the process-wide response cache, configured from LLM_CACHE_* environment variables.
+    """
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(db_path=LLM_CACHE_PATH)
+    return _response_cache
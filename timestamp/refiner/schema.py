@@ -0,0 +1,100 @@
+"""
+Validation of LLM output against the agenda_specs/cascade_schema shape in the system prompt.
+"""
+from collections import namedtuple
+
+SchemaError = namedtuple("SchemaError", ["path", "message"])
+
+# Allowed values, as listed in build_system_prompt
+OPERATION_TYPES = frozenset({"OPERATION_MATRIX"})
+TEMPORAL_STATES = frozenset({"NOW", "FUTURE", "INDETERMINATE"})
+CONSTRAINTS = frozenset({"EXACTLY", "BEFORE", "AFTER"})
+CONTROL_FLOW_TYPES = frozenset({"COMPOSIT"})
+LOGICAL_OPERATORS = frozenset({"AND", "OR"})
+OPERATORS = frozenset({"GREATER", "LESSER", "EQUALS"})
+ACTIONS = frozenset({"WRITE", "READ"})
+ENTITY_TYPES = frozenset({"CONTRACT", "WALLET", "DEX", "NFT"})
+
+def _check_enum(errors, container, field, allowed, path):
+    value = container.get(field)
+    if value is None:
+        errors.append(SchemaError(f"{path}.{field}", "is missing"))
+    # Lists and objects are unhashable, so test the type before the set lookup
+    elif not isinstance(value, str) or value not in allowed:
+        errors.append(SchemaError(f"{path}.{field}", f"{value!r} is not one of {'|'.join(sorted(allowed))}"))
+
+def _check_object(errors, container, field, path, required=True):
+    value = container.get(field)
+    if isinstance(value, dict):
+        return value
+    if value is not None or required:
+        errors.append(SchemaError(f"{path}.{field}", "must be an object"))
+    return None
+
+def _validate_opera(errors, opera, path):
+    _check_enum(errors, opera, "action", ACTIONS, path)
+    entity = _check_object(errors, opera, "entity", path)
+    if entity is not None:
+        _check_enum(errors, entity, "type", ENTITY_TYPES, f"{path}.entity")
+
+def _validate_operation(errors, item, path):
+    _check_enum(errors, item, "type", OPERATION_TYPES, path)
+    time_info = _check_object(errors, item, "time", path)
+    if time_info is not None:
+        _check_enum(errors, time_info, "temporal_state", TEMPORAL_STATES, f"{path}.time")
+        _check_enum(errors, time_info, "constraint", CONSTRAINTS, f"{path}.time")
+
+    control_flow = item.get("control_flow", [])
+    if not isinstance(control_flow, list):
+        errors.append(SchemaError(f"{path}.control_flow", "must be a list"))
+        control_flow = []
+    for index, flow in enumerate(control_flow):
+        flow_path = f"{path}.control_flow[{index}]"
+        if not isinstance(flow, dict):
+            errors.append(SchemaError(flow_path, "must be an object"))
+            continue
+        _check_enum(errors, flow, "type", CONTROL_FLOW_TYPES, flow_path)
+        _check_enum(errors, flow, "logicalOperator", LOGICAL_OPERATORS, flow_path)
+        conditions = flow.get("conditions") or []
+        if not isinstance(conditions, list):
+            errors.append(SchemaError(f"{flow_path}.conditions", "must be a list"))
+            conditions = []
+        for condition_index, condition in enumerate(conditions):
+            condition_path = f"{flow_path}.conditions[{condition_index}]"
+            if isinstance(condition, dict):
+                _check_enum(errors, condition, "operator", OPERATORS, condition_path)
+            else:
+                errors.append(SchemaError(condition_path, "must be an object"))
+        opera = _check_object(errors, flow, "opera", flow_path, required=False)
+        if opera is not None:
+            _validate_opera(errors, opera, f"{flow_path}.opera")
+
+    fallback = _check_object(errors, item, "fallback", path, required=False)
+    if fallback:
+        _validate_opera(errors, fallback, f"{path}.fallback")
+
+def validate_result(result):
+    """
+    Check a parsed LLM result against the structure requested in the system prompt.
+
+    Args:
+        result: Parsed JSON from refine_with_llm_conversation
+
+    Returns:
+        list: SchemaError tuples (path, message); empty when the result is valid
+    """
+    errors = []
+    if not isinstance(result, dict):
+        return [SchemaError("$", "must be an object")]
+    _check_object(errors, result, "agenda_specs", "$")
+    operations = result.get("cascade_schema")
+    if not isinstance(operations, list) or not operations:
+        errors.append(SchemaError("$.cascade_schema", "must be a non-empty list"))
+        return errors
+    for index, item in enumerate(operations):
+        path = f"$.cascade_schema[{index}]"
+        if isinstance(item, dict):
+            _validate_operation(errors, item, path)
+        else:
+            errors.append(SchemaError(path, "must be an object"))
+    return errors
@@ -0,0 +1,129 @@
+"""
+Async HTTP API for the prompt refiner.
+
+    POST /refine           {"session_id": optional, "message": "..."}
+    POST /normalize-time   {"items": [{"user_time": "...", "location": "..."}, ...]}
+                           user_time may be absolute ("April 25, 2025 3:00 PM PKT"), relative
+                           ("tomorrow at 9") or recurring ("every Monday 10am"), as in /refine
+    GET  /health
+    GET  /metrics          Prometheus text format (counters are only collected with REFINER_METRICS=1)
+
+Run from the timestamp/ directory:
+    python -m refiner.service --port 8080 --concurrency 16 --max-queue 64
+"""
+import argparse
+import asyncio
+import logging
+
+from aiohttp import web
+
+from .cascade import normalize_time_blocks
+from .metrics import render_prometheus
+from .pipeline import refine_turn
+from .sessions import get_session_store
+
+class AdmissionLimiter:
+    """
+    Allow `concurrency` requests to run at once and `max_queue` more to wait; reject the rest.
+    """
+    
+    def __init__(self, concurrency, max_queue):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.max_queue = max_queue
+        self.waiting = 0
+    
+    def try_enter(self):
+        if self.semaphore.locked() and self.waiting >= self.max_queue:
+            return False
+        self.waiting += 1
+        return True
+    
+    async def __aenter__(self):
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+    
+    async def __aexit__(self, *exc_info):
+        self.semaphore.release()
+
+async def _read_json(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="Request body must be JSON")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="Request body must be a JSON object")
+    return body
+
+def _admit(request):
+    limiter = request.app["limiter"]
+    if not limiter.try_enter():
+        # Backpressure: tell clients to retry instead of queueing without bound
+        raise web.HTTPServiceUnavailable(text="Too many requests in flight", headers={"Retry-After": "1"})
+    return limiter
+
+async def handle_refine(request):
+    body = await _read_json(request)
+    message = body.get("message")
+    if not isinstance(message, str) or not message.strip():
+        raise web.HTTPBadRequest(text="'message' must be a non-empty string")
+    store = request.app["store"]
+    session_id = store.resolve_session_id(body.get("session_id"))
+    async with _admit(request):
+        response = await refine_turn(store, session_id, message)
+    return web.json_response(response)
+
+async def handle_normalize_time(request):
+    body = await _read_json(request)
+    items = body.get("items")
+    if not isinstance(items, list):
+        raise web.HTTPBadRequest(text="'items' must be a list")
+    pairs = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise web.HTTPBadRequest(text=f"items[{index}] must be an object")
+        for field in ("user_time", "location"):
+            if item.get(field) is not None and not isinstance(item[field], str):
+                raise web.HTTPBadRequest(text=f"items[{index}].{field} must be a string")
+        pairs.append((item.get("user_time") or "", item.get("location") or ""))
+    async with _admit(request):
+        blocks = await asyncio.get_running_loop().run_in_executor(None, normalize_time_blocks, pairs)
+    return web.json_response({"items": blocks})
+
+async def handle_health(request):
+    return web.json_response({"status": "ok", "sessions": len(request.app["store"])})
+
+async def handle_metrics(request):
+    return web.Response(text=render_prometheus(), content_type="text/plain", charset="utf-8")
+
+def create_app(store=None, concurrency=16, max_queue=64):
+    """
+    Build the aiohttp application.
+    
+    Args:
+        store: SessionStore for conversations, defaults to the process-wide bounded store
+        concurrency: Requests processed at once
+        max_queue: Requests allowed to wait for a slot before new ones get 503
+    """
+    app = web.Application()
+    app["store"] = store if store is not None else get_session_store()
+    app["limiter"] = AdmissionLimiter(concurrency, max_queue)
+    app.router.add_post("/refine", handle_refine)
+    app.router.add_post("/normalize-time", handle_normalize_time)
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+    return app
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Prompt refiner HTTP API")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8080)
+    arg_parser.add_argument("--concurrency", type=int, default=16)
+    arg_parser.add_argument("--max-queue", type=int, default=64)
+    args = arg_parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    web.run_app(create_app(concurrency=args.concurrency, max_queue=args.max_queue), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
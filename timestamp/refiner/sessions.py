@@ -0,0 +1,459 @@
+"""
+Conversation state keyed by conversation id, shared by the Streamlit app, the HTTP
+service and the batch runner.
+
+Bounded stores keep messages as compact (role, payload) records, with long content such
+as rendered JSON results zlib-compressed. Sessions idle for longer than SESSION_IDLE_TTL
+are evicted and each session keeps only its newest messages up to SESSION_MAX_BYTES.
+"""
+import os
+import re
+import abc
+import json
+import time
+import uuid
+import logging
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+
+# Empty keeps sessions in process memory; a path stores them in SQLite, which replicas on a shared volume can use
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "")
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", str(6 * 3600)))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024)))
+
+# Shorter messages are stored as plain text, zlib would not save anything on them
+COMPRESS_MIN_CHARS = 200
+
+# Shape of the ids new_session_id hands out
+_SESSION_ID = re.compile(r"[0-9a-f]{32}")
+
+def compact_message(message):
+    """
+    Turn a {"role", "content"} message into a (role, payload) record, where payload is the
+    content itself or, for long content such as rendered JSON results, its zlib-compressed bytes.
+    """
+    content = message["content"]
+    if len(content) >= COMPRESS_MIN_CHARS:
+        packed = zlib.compress(content.encode("utf-8"))
+        if len(packed) < len(content):
+            return (message["role"], packed)
+    return (message["role"], content)
+
+def expand_message(record):
+    """
+    Rebuild the {"role", "content"} message a compact record was made from.
+    """
+    role, payload = record
+    if isinstance(payload, bytes):
+        payload = zlib.decompress(payload).decode("utf-8")
+    return {"role": role, "content": payload}
+
+def _record_size(record):
+    return len(record[1])
+
+class SessionStore(abc.ABC):
+    """
+    Interface for conversation storage. Messages are {"role", "content"} dicts; each
+    conversation also has a small JSON-serializable state dict, such as a result
+    waiting for the user's confirmation. Idle eviction drops both together.
+    """
+
+    def new_session_id(self):
+        return uuid.uuid4().hex
+
+    def resolve_session_id(self, session_id):
+        """
+        Return session_id if it is a well-formed id of a live conversation, else a new id.
+
+        Ids come back from URLs and API clients, so anything else starts a new
+        conversation rather than adopting whatever id was sent.
+        """
+        if isinstance(session_id, str) and _SESSION_ID.fullmatch(session_id) and self.exists(session_id):
+            return session_id
+        return self.new_session_id()
+
+    @abc.abstractmethod
+    def load(self, session_id, limit=None):
+        """
+        Return the messages of a conversation, or an empty list if it does not exist.
+
+        Args:
+            session_id: Conversation id
+            limit: Return only the newest limit messages
+        """
+
+    @abc.abstractmethod
+    def append(self, session_id, *messages):
+        """
+        Add messages to a conversation, creating it if needed.
+        """
+
+    @abc.abstractmethod
+    def exists(self, session_id):
+        """
+        True if the conversation is stored and has not expired.
+        """
+
+    @abc.abstractmethod
+    def get_state(self, session_id):
+        """
+        Return a copy of the conversation's state dict, empty if it has none.
+        """
+
+    @abc.abstractmethod
+    def set_state(self, session_id, state):
+        """
+        Replace the conversation's state dict, creating the conversation if needed.
+        """
+
+    @abc.abstractmethod
+    def delete(self, session_id):
+        pass
+
+    @abc.abstractmethod
+    def __len__(self):
+        pass
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local, unbounded store; conversations are lost on restart.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def load(self, session_id, limit=None):
+        with self._lock:
+            messages = self._sessions.get(session_id, ())
+            return list(messages[-limit:] if limit else messages)
+
+    def append(self, session_id, *messages):
+        with self._lock:
+            self._sessions.setdefault(session_id, []).extend(messages)
+
+    def exists(self, session_id):
+        return session_id in self._sessions
+
+    def get_state(self, session_id):
+        with self._lock:
+            return dict(self._states.get(session_id, {}))
+
+    def set_state(self, session_id, state):
+        with self._lock:
+            self._sessions.setdefault(session_id, [])
+            self._states[session_id] = dict(state)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._states.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+class _Session:
+    __slots__ = ("records", "size", "last_access", "state")
+
+    def __init__(self, now):
+        self.records = []
+        self.size = 0
+        self.last_access = now
+        self.state = None  # JSON text, so callers never share the dict
+
+class LRUSessionStore(SessionStore):
+    """
+    Bounded process-local store of compact records.
+
+    Sessions are kept in least-recently-used order, so idle ones are evicted from the
+    front on each write without scanning the rest. State dicts do not count towards max_bytes.
+
+    Args:
+        max_sessions: Sessions kept before the least recently used one is dropped
+        idle_ttl: Seconds without a load or append after which a session is dropped
+        max_bytes: Per-session cap on stored payload size; the oldest messages go first
+    """
+
+    def __init__(self, max_sessions=SESSION_MAX_SESSIONS, idle_ttl=SESSION_IDLE_TTL, max_bytes=SESSION_MAX_BYTES):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.stats = {"evicted_idle": 0, "evicted_lru": 0, "trimmed_messages": 0}
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        cutoff = now - self.idle_ttl
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_access >= cutoff:
+                break
+            del self._sessions[session_id]
+            self.stats["evicted_idle"] += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.stats["evicted_lru"] += 1
+
+    def _touch(self, session_id, now):
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if session.last_access < now - self.idle_ttl:
+            del self._sessions[session_id]
+            self.stats["evicted_idle"] += 1
+            return None
+        session.last_access = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def load(self, session_id, limit=None):
+        with self._lock:
+            session = self._touch(session_id, time.time())
+            if session is None:
+                return []
+            records = session.records[-limit:] if limit else list(session.records)
+        return [expand_message(record) for record in records]
+
+    def append(self, session_id, *messages):
+        records = [compact_message(message) for message in messages]
+        now = time.time()
+        with self._lock:
+            session = self._touch(session_id, now)
+            if session is None:
+                session = self._sessions[session_id] = _Session(now)
+            session.records.extend(records)
+            session.size += sum(_record_size(record) for record in records)
+            # Always keep the newest message, even if it alone is over the cap
+            trim = 0
+            while session.size > self.max_bytes and trim < len(session.records) - 1:
+                session.size -= _record_size(session.records[trim])
+                trim += 1
+            if trim:
+                del session.records[:trim]
+                self.stats["trimmed_messages"] += trim
+            self._evict(now)
+
+    def exists(self, session_id):
+        with self._lock:
+            return self._touch(session_id, time.time()) is not None
+
+    def get_state(self, session_id):
+        with self._lock:
+            session = self._touch(session_id, time.time())
+            state = session.state if session is not None else None
+        return json.loads(state) if state else {}
+
+    def set_state(self, session_id, state):
+        state = json.dumps(state)
+        now = time.time()
+        with self._lock:
+            session = self._touch(session_id, now)
+            if session is None:
+                session = self._sessions[session_id] = _Session(now)
+            session.state = state
+            self._evict(now)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Store of compact records in a SQLite file, so sessions survive restarts and can be
+    shared by several app processes on the same volume.
+
+    Args:
+        db_path: SQLite file path
+        idle_ttl: Seconds without a load or append after which a session is dropped
+        max_bytes: Per-session cap on stored payload size; the oldest messages go first
+        sweep_interval: Minimum seconds between sweeps for idle sessions
+    """
+
+    def __init__(self, db_path, idle_ttl=SESSION_IDLE_TTL, max_bytes=SESSION_MAX_BYTES, sweep_interval=60.0):
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        # WAL lets readers in other processes proceed while one of them writes; with WAL,
+        # synchronous=NORMAL only risks the last few messages on power loss, not corruption
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS chat_session ("
+            "session_id TEXT PRIMARY KEY, size INTEGER NOT NULL, last_access REAL NOT NULL, state TEXT);"
+            "CREATE INDEX IF NOT EXISTS chat_session_idle ON chat_session (last_access);"
+            "CREATE TABLE IF NOT EXISTS chat_message ("
+            "session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, payload NOT NULL, "
+            "PRIMARY KEY (session_id, seq)) WITHOUT ROWID;"
+        )
+        self._db.commit()
+
+    def _touch(self, session_id, now):
+        row = self._db.execute(
+            "SELECT size, last_access FROM chat_session WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] < now - self.idle_ttl:
+            self._delete(session_id)
+            return None
+        self._db.execute("UPDATE chat_session SET last_access = ? WHERE session_id = ?", (now, session_id))
+        return row[0]
+
+    def _delete(self, session_id):
+        self._db.execute("DELETE FROM chat_message WHERE session_id = ?", (session_id,))
+        self._db.execute("DELETE FROM chat_session WHERE session_id = ?", (session_id,))
+
+    def _sweep(self, now):
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        cutoff = now - self.idle_ttl
+        self._db.execute(
+            "DELETE FROM chat_message WHERE session_id IN "
+            "(SELECT session_id FROM chat_session WHERE last_access < ?)", (cutoff,)
+        )
+        self._db.execute("DELETE FROM chat_session WHERE last_access < ?", (cutoff,))
+
+    def load(self, session_id, limit=None):
+        with self._lock:
+            try:
+                if self._touch(session_id, time.time()) is None:
+                    self._db.commit()
+                    return []
+                rows = self._db.execute(
+                    "SELECT role, payload FROM chat_message WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+                    (session_id, limit or -1),
+                ).fetchall()
+                self._db.commit()
+            except sqlite3.Error as db_error:
+                logging.warning("Session load failed: %s", db_error)
+                return []
+        return [expand_message(row) for row in reversed(rows)]
+
+    def append(self, session_id, *messages):
+        records = [compact_message(message) for message in messages]
+        now = time.time()
+        with self._lock:
+            try:
+                # Take the write lock before reading MAX(seq) and size, so appends from
+                # other processes sharing the file wait instead of reusing the same seq
+                self._db.execute("BEGIN IMMEDIATE")
+                size = self._touch(session_id, now)
+                if size is None:
+                    size = 0
+                    self._db.execute(
+                        "INSERT INTO chat_session (session_id, size, last_access) VALUES (?, 0, ?)", (session_id, now)
+                    )
+                last = self._db.execute(
+                    "SELECT MAX(seq) FROM chat_message WHERE session_id = ?", (session_id,)
+                ).fetchone()[0]
+                start = 0 if last is None else last + 1
+                self._db.executemany(
+                    "INSERT INTO chat_message (session_id, seq, role, payload) VALUES (?, ?, ?, ?)",
+                    [(session_id, start + offset, *record) for offset, record in enumerate(records)],
+                )
+                size += sum(_record_size(record) for record in records)
+                if size > self.max_bytes:
+                    size = self._trim(session_id, size)
+                self._db.execute("UPDATE chat_session SET size = ? WHERE session_id = ?", (size, session_id))
+                self._sweep(now)
+                self._db.commit()
+            except sqlite3.Error as db_error:
+                self._db.rollback()
+                logging.warning("Session append failed: %s", db_error)
+
+    def _trim(self, session_id, size):
+        # Oldest first, always keeping the newest message
+        rows = self._db.execute(
+            "SELECT seq, LENGTH(payload) FROM chat_message WHERE session_id = ? ORDER BY seq",
+            (session_id,),
+        ).fetchall()
+        cut = None
+        for seq, record_size in rows[:-1]:
+            if size <= self.max_bytes:
+                break
+            size -= record_size
+            cut = seq
+        if cut is not None:
+            self._db.execute("DELETE FROM chat_message WHERE session_id = ? AND seq <= ?", (session_id, cut))
+        return size
+
+    def exists(self, session_id):
+        with self._lock:
+            try:
+                found = self._touch(session_id, time.time()) is not None
+                self._db.commit()
+            except sqlite3.Error as db_error:
+                logging.warning("Session lookup failed: %s", db_error)
+                return False
+        return found
+
+    def get_state(self, session_id):
+        with self._lock:
+            try:
+                row = None
+                if self._touch(session_id, time.time()) is not None:
+                    row = self._db.execute(
+                        "SELECT state FROM chat_session WHERE session_id = ?", (session_id,)
+                    ).fetchone()
+                self._db.commit()
+            except sqlite3.Error as db_error:
+                logging.warning("Session state load failed: %s", db_error)
+                return {}
+        return json.loads(row[0]) if row and row[0] else {}
+
+    def set_state(self, session_id, state):
+        state = json.dumps(state)
+        now = time.time()
+        with self._lock:
+            try:
+                self._db.execute("BEGIN IMMEDIATE")
+                if self._touch(session_id, now) is None:
+                    self._db.execute(
+                        "INSERT INTO chat_session (session_id, size, last_access) VALUES (?, 0, ?)", (session_id, now)
+                    )
+                self._db.execute("UPDATE chat_session SET state = ? WHERE session_id = ?", (state, session_id))
+                self._db.commit()
+            except sqlite3.Error as db_error:
+                self._db.rollback()
+                logging.warning("Session state save failed: %s", db_error)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._delete(session_id)
+            self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM chat_session").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+_session_store = None
+_session_store_lock = threading.Lock()
+
+def get_session_store():
+    """
+    Return the process-wide session store, configured from SESSION_* environment variables.
+    """
+    global _session_store
+    if _session_store is None:
+        with _session_store_lock:
+            if _session_store is None:
+                if SESSION_DB_PATH:
+                    _session_store = SQLiteSessionStore(SESSION_DB_PATH)
+                else:
+                    _session_store = LRUSessionStore()
+    return _session_store
@@ -0,0 +1,353 @@
+"""
+Timestamp parsing, extraction from free text and conversion to Unix time.
+"""
+import re
+import logging
+from collections import namedtuple
+from datetime import datetime
+
+import pytz
+
+from .dateformats import parse_datetime
+from .metrics import count, stage
+from .timezones import (
+    TIMEZONE_ABBREVIATIONS,
+    resolve_location_timezone,
+    resolve_manual_timezone,
+    resolve_timezone_abbreviation,
+)
+
+# Parse a timestamp string into local wall-clock time plus the timezone it belongs to
+def parse_local_timestamp(timestamp_str, location, dayfirst=None):
+    """
+    Parse a timestamp string without converting it to UTC.
+    
+    Args:
+        timestamp_str: A non-empty string representation of a date/time
+        location: A string representing a location (city, country, etc.)
+        dayfirst: Read ambiguous numeric dates as day/month, defaults to DATE_DAYFIRST
+        
+    Returns:
+        tuple: (datetime, tzinfo) - a naive local datetime and the pytz zone it is in,
+        or an already aware datetime and None when the string carried its own offset
+    """
+    # Handle the specific format "DD MM YYYY H:MM AM/PM TZ"
+    # Example: "25 02 2025 5:00 PM PKT"
+    specific_format = re.match(r'(\d{1,2})\s+(\d{1,2})\s+(\d{4})\s+(\d{1,2}):(\d{2})(?::\d{2})?\s*(AM|PM)?\s*([A-Z]{3,4})?', timestamp_str, re.IGNORECASE)
+    
+    if specific_format:
+        try:
+            groups = specific_format.groups()
+            day = int(groups[0])
+            month = int(groups[1])
+            year = int(groups[2])
+            hour = int(groups[3])
+            minute = int(groups[4])
+            
+            # Adjust for AM/PM if present
+            if groups[5] and groups[5].upper() == 'PM' and hour < 12:
+                hour += 12
+            elif groups[5] and groups[5].upper() == 'AM' and hour == 12:
+                hour = 0
+            
+            # Create naive datetime
+            dt = datetime(year, month, day, hour, minute)
+            
+            # Determine timezone
+            tz = pytz.UTC
+            abbreviation_tz = resolve_timezone_abbreviation(groups[6])
+            if abbreviation_tz:  # Timezone abbreviation in the timestamp
+                tz = abbreviation_tz
+            elif location and location.lower() not in ["unknown", ""]:
+                # Try to get timezone from location
+                tz_name = resolve_location_timezone(location)
+                if tz_name:
+                    tz = pytz.timezone(tz_name)
+            return dt, tz
+            
+        except Exception as format_error:
+            logging.error(f"Custom format parsing error: {str(format_error)}")
+            # Continue with regular parsing
+    
+    # Check for manual timezone override in the timestamp string
+    manual_tz = resolve_manual_timezone(timestamp_str)
+    
+    # Strict layouts first, dateutil only for the shapes they do not cover
+    parsed_dt = parse_datetime(timestamp_str, dayfirst)
+    if parsed_dt.tzinfo:
+        return parsed_dt, None
+    
+    # Naive datetime, resolve the timezone it was meant in
+    if manual_tz != pytz.UTC:  # If we found a manual timezone
+        return parsed_dt, manual_tz
+    if location and location.lower() not in ["unknown", ""]:
+        # Get timezone from location
+        tz_name = resolve_location_timezone(location)
+        if tz_name:
+            return parsed_dt, pytz.timezone(tz_name)
+    return parsed_dt, pytz.UTC
+
+def _timezone_name(tzinfo):
+    # Handle special case for UTC timezone which doesn't have a zone attribute
+    if tzinfo == pytz.UTC or isinstance(tzinfo, pytz.UTC.__class__):
+        return "UTC"
+    return getattr(tzinfo, 'zone', "UTC")
+
+# Enhanced time processing function with custom format handling
+def adjust_timestamp_to_location(timestamp_str, location, dayfirst=None):
+    """
+    Convert a timestamp string to a Unix timestamp with correct timezone handling.
+    
+    Args:
+        timestamp_str: A string representation of a date/time
+        location: A string representing a location (city, country, etc.)
+        dayfirst: Read ambiguous numeric dates as day/month, defaults to DATE_DAYFIRST
+        
+    Returns:
+        tuple: (unix_timestamp, timezone_abbreviation)
+    """
+    try:
+        # Handle empty input
+        if not timestamp_str or timestamp_str.strip() == "":
+            logging.warning("Empty timestamp string provided")
+            count("time_fallbacks")
+            current_utc = datetime.now(pytz.UTC)
+            return int(current_utc.timestamp()), "UTC"
+        
+        logging.info("Processing timestamp: '%s' with location: '%s'", timestamp_str, location)
+        
+        with stage("adjust_timestamp"):
+            local_dt, tz = parse_local_timestamp(timestamp_str, location, dayfirst)
+        
+        # Localize and convert to UTC
+        if tz is None:
+            localized_dt = local_dt
+        elif tz == pytz.UTC:
+            localized_dt = local_dt.replace(tzinfo=pytz.UTC)
+        else:
+            localized_dt = tz.localize(local_dt)
+        utc_dt = localized_dt.astimezone(pytz.UTC)
+        unix_timestamp = int(utc_dt.timestamp())
+        tz_name = _timezone_name(localized_dt.tzinfo)
+        
+        logging.info("Final parsed datetime: %s (%s) → %s (UTC), timestamp: %d", localized_dt, tz_name, utc_dt, unix_timestamp)
+        return unix_timestamp, tz_name
+        
+    except Exception as e:
+        logging.error("Timestamp conversion error: %s", e)
+        count("timestamp_parse_failures")
+        count("time_fallbacks")
+        # Fallback to current UTC time
+        current_utc = datetime.now(pytz.UTC)
+        return int(current_utc.timestamp()), "UTC"
+
+def _localize_epochs(local_seconds, tz):
+    """
+    Convert naive local wall-clock seconds in one zone to UTC epochs with array operations.
+    
+    Returns:
+        tuple: (epochs array, boolean array of rows whose offset could not be settled)
+    """
+    import numpy as np
+    
+    transitions = getattr(tz, "_utc_transition_times", None)
+    if not transitions:
+        # Fixed-offset zone (UTC, Etc/GMT+5, ...)
+        offset = int(tz.utcoffset(datetime(2000, 1, 1)).total_seconds())
+        return local_seconds - offset, np.zeros(len(local_seconds), dtype=bool)
+    
+    transition_seconds = np.array(transitions, dtype="datetime64[s]").astype(np.int64)
+    offsets = np.array([int(info[0].total_seconds()) for info in tz._transition_info], dtype=np.int64)
+    
+    # Guess the offset from the local time, then re-read it at the resulting UTC instant
+    guess = np.searchsorted(transition_seconds, local_seconds, side="right") - 1
+    utc_guess = local_seconds - offsets[np.clip(guess, 0, None)]
+    index = np.clip(np.searchsorted(transition_seconds, utc_guess, side="right") - 1, 0, None)
+    epochs = local_seconds - offsets[index]
+    
+    # Times in a DST gap do not round-trip and times in an overlap are also valid in a
+    # neighbouring interval; both go through pytz's localize instead
+    last = len(transition_seconds) - 1
+    settled_index = np.clip(np.searchsorted(transition_seconds, epochs, side="right") - 1, 0, None)
+    following = np.minimum(index + 1, last)
+    preceding = np.maximum(index - 1, 0)
+    unsettled = (
+        (settled_index != index)
+        | ((index < last) & (local_seconds - offsets[following] >= transition_seconds[following]))
+        | ((index > 0) & (local_seconds - offsets[preceding] < transition_seconds[index]))
+    )
+    return epochs, unsettled
+
+# Bulk version of adjust_timestamp_to_location for replaying stored cascade_schema outputs
+def normalize_timestamps(items, dayfirst=None):
+    """
+    Convert many (user_time, location) pairs to Unix timestamps at once.
+    
+    Identical pairs are parsed once, each location is resolved once, and the
+    local -> UTC conversion runs per timezone over NumPy arrays.
+    
+    Args:
+        items: Iterable of (timestamp_str, location) pairs
+        dayfirst: Read ambiguous numeric dates as day/month, defaults to DATE_DAYFIRST
+        
+    Returns:
+        tuple: (numpy int64 array of unix timestamps, list of timezone names), in input order
+    """
+    import numpy as np
+    
+    unique = {}
+    inverse = []
+    for pair in items:
+        inverse.append(unique.setdefault(tuple(pair), len(unique)))
+    
+    epochs = np.zeros(len(unique), dtype=np.int64)
+    zone_names = ["UTC"] * len(unique)
+    groups = {}  # zone name -> (tzinfo, [unique index], [local seconds])
+    now = int(datetime.now(pytz.UTC).timestamp())
+    
+    for (timestamp_str, location), position in unique.items():
+        if not timestamp_str or not timestamp_str.strip():
+            count("time_fallbacks")
+            epochs[position] = now
+            continue
+        try:
+            local_dt, tz = parse_local_timestamp(timestamp_str, location, dayfirst)
+        except Exception as e:
+            logging.error("Timestamp conversion error: %s", e)
+            count("timestamp_parse_failures")
+            count("time_fallbacks")
+            epochs[position] = now
+            continue
+        if tz is None:
+            # The string carried its own offset, nothing left to resolve
+            epochs[position] = int(local_dt.timestamp())
+            zone_names[position] = _timezone_name(local_dt.tzinfo)
+            continue
+        zone_name = _timezone_name(tz)
+        zone_names[position] = zone_name
+        group = groups.setdefault(zone_name, (tz, [], []))
+        group[1].append(position)
+        group[2].append(local_dt.replace(tzinfo=None))
+    
+    for zone_name, (tz, positions, local_dts) in groups.items():
+        local_seconds = np.array(local_dts, dtype="datetime64[s]").astype(np.int64)
+        zone_epochs, unsettled = _localize_epochs(local_seconds, tz)
+        for row in np.flatnonzero(unsettled):
+            zone_epochs[row] = int(tz.localize(local_dts[row]).timestamp())
+        epochs[positions] = zone_epochs
+    
+    return epochs[np.array(inverse, dtype=np.intp)], [zone_names[position] for position in inverse]
+
+# Single-pass scanner for date, time and timezone spans
+_MONTH = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*'
+TIME_SPAN_PATTERN = re.compile(
+    # Alternatives are grouped by what they start with, a digit run or a word, so each position
+    # of a long description is only tried against the few that can start there. Month names and
+    # upper-case abbreviations are further gated on their first letters.
+    r'(?:(?=\d)(?<!\d)(?:'
+    r'(?P<date_ymd>\d{4}[-/\s]\d{1,2}[-/\s]\d{1,2}(?!\d))'  # YYYY/MM/DD
+    r'|(?P<date_dmy>\d{1,2}[-/\s]\d{1,2}[-/\s]\d{2,4}(?!\d))'  # DD/MM/YYYY or MM/DD/YYYY
+    r'|(?P<date_dmon>\d{1,2}\s+' + _MONTH + r'\s+\d{2,4}(?!\d))'  # DD Mon YYYY
+    r'|(?P<time_hm>\d{1,2}:\d{2}(?::\d{2})?(?:\s*(?:AM|PM)\b)?)'  # HH:MM:SS AM/PM or HH:MM AM/PM
+    r'|(?P<time_h>\d{1,2}\s*(?:AM|PM)\b))'  # HH AM/PM
+    r'|\b(?:(?=[adfjmnos])(?P<date_mond>' + _MONTH + r'\s+\d{1,2},?\s+\d{2,4}(?!\d))'  # Mon DD, YYYY
+    r'|(?-i:(?=[A-Z]{3,4}\b)(?:'
+    r'(?P<tz>(?:' + "|".join(name for name in TIMEZONE_ABBREVIATIONS if " " not in name) + r')\b)'  # Known timezone abbreviations
+    r'|(?P<tz_generic>[A-Z]{3,4}\b)))))',  # Any other upper-case abbreviation
+    re.IGNORECASE,
+)
+
+# Confidence that a match of each group really is the date/time/zone the user meant
+_SPAN_CONFIDENCE = {
+    "date_ymd": 0.95,
+    "date_dmy": 0.6,
+    "date_dmon": 0.9,
+    "date_mond": 0.9,
+    "time_hm": 0.9,
+    "time_h": 0.7,
+    "tz": 0.8,
+    "tz_generic": 0.3,
+}
+
+# Text allowed between two spans of the same cluster, e.g. "April 25, 2025 at 3:00 PM"
+_SPAN_GAP = re.compile(r'[\s,]*(?:(?:at|on|@|-)[\s,]*)?', re.IGNORECASE)
+
+_DIGIT = re.compile(r'\d')
+
+TimeSpan = namedtuple("TimeSpan", ["kind", "start", "end", "text", "confidence"])
+
+def scan_time_spans(text):
+    """
+    Find every date, time and timezone span in text with one pass of the combined pattern.
+
+    Args:
+        text: A string that might contain date and time information
+
+    Returns:
+        list: TimeSpan tuples (kind is "date", "time" or "tz") in order of appearance
+    """
+    if not text:
+        return []
+    spans = []
+    for match in TIME_SPAN_PATTERN.finditer(text):
+        group = match.lastgroup
+        kind = group.split("_", 1)[0]
+        if group == "tz_generic":
+            # Unknown abbreviations only count when they directly follow a time ("5 PM PKT"),
+            # otherwise every "SUV" or "ETH" in a description would look like a timezone
+            if not spans or spans[-1].kind != "time" or text[spans[-1].end:match.start()].strip():
+                continue
+        spans.append(TimeSpan(kind, match.start(), match.end(), match.group(), _SPAN_CONFIDENCE[group]))
+    return spans
+
+def select_time_cluster(spans, text):
+    """
+    Group adjacent spans and pick the cluster most likely to be a single timestamp.
+
+    Returns:
+        list: The TimeSpan tuples of the best cluster, or an empty list
+    """
+    best, best_score = [], 0.0
+    cluster = []
+
+    def close(cluster):
+        nonlocal best, best_score
+        if not any(span.kind in ("date", "time") for span in cluster):
+            return
+        score = sum(span.confidence for span in cluster)
+        if score > best_score:
+            best, best_score = cluster, score
+
+    for span in spans:
+        if cluster:
+            prev = cluster[-1]
+            gap = text[prev.end:span.start]
+            adjacent = _SPAN_GAP.fullmatch(gap) is not None
+            if not adjacent or any(member.kind == span.kind for member in cluster):
+                close(cluster)
+                cluster = []
+        cluster.append(span)
+    if cluster:
+        close(cluster)
+    return best
+
+# Extract time information from text
+def extract_time_from_text(text):
+    """
+    Extract time information from text using a single-pass span scanner.
+    
+    Args:
+        text: A string that might contain date and time information
+        
+    Returns:
+        str: Extracted time string or empty string if none found
+    """
+    # Every date and time span has a digit; zones alone are never picked
+    if not text or not _DIGIT.search(text):
+        return ""
+    
+    cluster = select_time_cluster(scan_time_spans(text), text)
+    
+    # Combine the parts as date, time, timezone
+    order = {"date": 0, "time": 1, "tz": 2}
+    return " ".join(span.text for span in sorted(cluster, key=lambda span: order[span.kind]))
@@ -0,0 +1,469 @@
+"""
+Timezone resolution: abbreviations, the offline gazetteer and the cached geocoder.
+"""
+import os
+import re
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+
+import pytz
+
+from .metrics import count, stage
+
+# Common timezone abbreviations
+TIMEZONE_ABBREVIATIONS = {
+    # Universal
+    "UTC": "UTC",
+    
+    # North America
+    "EST": "America/New_York",      # Eastern Standard Time
+    "EDT": "America/New_York",      # Eastern Daylight Time
+    "CST": "America/Chicago",       # Central Standard Time
+    "CDT": "America/Chicago",       # Central Daylight Time
+    "MST": "America/Denver",        # Mountain Standard Time
+    "MDT": "America/Denver",        # Mountain Daylight Time
+    "PST": "America/Los_Angeles",   # Pacific Standard Time
+    "PDT": "America/Los_Angeles",   # Pacific Daylight Time
+    
+    # Europe
+    "GMT": "Europe/London",         # Greenwich Mean Time
+    "BST": "Europe/London",         # British Summer Time
+    "CET": "Europe/Paris",          # Central European Time
+    "CEST": "Europe/Paris",         # Central European Summer Time
+    "EET": "Europe/Helsinki",       # Eastern European Time
+    "EEST": "Europe/Helsinki",      # Eastern European Summer Time
+    
+    # Asia
+    "IST": "Asia/Kolkata",          # Indian Standard Time
+    "PKT": "Asia/Karachi",          # Pakistan Standard Time
+    "CST ASIA": "Asia/Shanghai",    # China Standard Time (disambiguated)
+    "JST": "Asia/Tokyo",            # Japan Standard Time
+    "KST": "Asia/Seoul",            # Korea Standard Time
+    
+    # Australia & Pacific
+    "AEST": "Australia/Sydney",     # Australian Eastern Standard Time
+    "AEDT": "Australia/Sydney",     # Australian Eastern Daylight Time
+    "AWST": "Australia/Perth",      # Australian Western Standard Time
+    "NZST": "Pacific/Auckland",     # New Zealand Standard Time
+    "NZDT": "Pacific/Auckland",     # New Zealand Daylight Time
+}
+
+# Full timezone names
+TIMEZONE_FULL_NAMES = {
+    "PAKISTAN STANDARD TIME": "Asia/Karachi",
+    "EASTERN STANDARD TIME": "America/New_York",
+    "PACIFIC STANDARD TIME": "America/Los_Angeles",
+    "CENTRAL EUROPEAN TIME": "Europe/Paris",
+    "INDIA STANDARD TIME": "Asia/Kolkata",
+    "JAPAN STANDARD TIME": "Asia/Tokyo",
+}
+
+# Upper-cased name -> pre-resolved tzinfo, and the word-boundary matcher built from its keys
+_timezone_lookup = {}
+_timezone_matcher = None
+
+def register_timezone_abbreviations(table):
+    """
+    Add or override timezone abbreviations (or full names) used by resolve_manual_timezone.
+    
+    Args:
+        table: Dict mapping an abbreviation such as "WIB" to an IANA zone such as "Asia/Jakarta"
+    """
+    global _timezone_matcher
+    # Resolve every zone up front so a bad table fails here, not in the middle of a request
+    resolved = {" ".join(name.upper().split()): pytz.timezone(tz_name) for name, tz_name in table.items()}
+    _timezone_lookup.update(resolved)
+    
+    # Longest names first so "CEST" wins over "CET" and "CST ASIA" over "CST"
+    names = sorted(_timezone_lookup, key=len, reverse=True)
+    alternation = "|".join(re.escape(name).replace(r"\ ", r"\s+") for name in names)
+    _timezone_matcher = re.compile(r"\b(?:" + alternation + r")\b")
+    resolve_manual_timezone.cache_clear()
+
+def resolve_timezone_abbreviation(abbreviation):
+    """
+    Look up a single timezone abbreviation, returning None if it is unknown.
+    """
+    if not abbreviation:
+        return None
+    return _timezone_lookup.get(" ".join(abbreviation.upper().split()))
+
+# Improved timezone resolution with common abbreviations
+@lru_cache(maxsize=1024)
+def resolve_manual_timezone(timestamp_str: str):
+    """
+    Convert common timezone abbreviations to their corresponding timezone objects.
+    """
+    if not timestamp_str:
+        return pytz.utc
+    
+    # Whole-word match, so "EST" no longer matches inside "CEST" or "AEST"
+    match = _timezone_matcher.search(timestamp_str.upper())
+    if match:
+        return _timezone_lookup[" ".join(match.group().split())]
+    
+    # Default to UTC if no timezone is found
+    return pytz.utc
+
+register_timezone_abbreviations(TIMEZONE_ABBREVIATIONS)
+register_timezone_abbreviations(TIMEZONE_FULL_NAMES)
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteer.csv")
+# Geocoder results live in the user's cache directory, not next to the code
+TZ_CACHE_PATH = os.getenv("TZ_CACHE_PATH", os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "refiner", "tz_cache.sqlite3"
+))
+
+# Offline place name -> IANA timezone index built from the bundled gazetteer
+def _place_words(text):
+    # Strip accents so "São Paulo" and "Zürich" match their ASCII gazetteer entries
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return re.findall(r"[a-z]+", text.lower())
+
+def load_gazetteer(path=GAZETTEER_PATH):
+    """
+    Load the bundled gazetteer into a normalized-name -> timezone dict.
+    """
+    index = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                tz_name, names = line.split(",", 1)
+                for name in names.split("|"):
+                    key = " ".join(_place_words(name))
+                    if key:
+                        index.setdefault(key, tz_name)
+    except OSError as gazetteer_error:
+        logging.warning(f"Gazetteer unavailable, offline timezone lookup disabled: {gazetteer_error}")
+    return index
+
+GAZETTEER = load_gazetteer()
+
+# Separators between the parts of a location string such as "I-9/3, Islamabad (Pakistan)"
+_LOCATION_PARTS = re.compile(r"[,;/()]")
+
+# A run of capitalized words after a preposition in free text, e.g. "from Islamabad",
+# "to New York"; only these are looked up when the text is a description, not a location
+_PLACE_PREPOSITION = re.compile(r"\b(?:in|at|from|to)\s+", re.IGNORECASE)
+_PLACE_WORDS = re.compile(r"[^\W\d_][\w'.-]*(?:\s+[^\W\d_][\w'.-]*){0,3}")
+# Longest gazetteer name, in words
+_MAX_PLACE_WORDS = 4
+
+def _place_in_text(text):
+    for preposition in _PLACE_PREPOSITION.finditer(text):
+        following = _PLACE_WORDS.match(text, preposition.end())
+        if not following:
+            continue
+        words = []
+        for word in following.group().split():
+            if not word[0].isupper():
+                break
+            words.append(word)
+        # Longest name first, so "from New York" is not read as "New"
+        for size in range(min(len(words), _MAX_PLACE_WORDS), 0, -1):
+            tz_name = GAZETTEER.get(" ".join(_place_words(" ".join(words[:size]))))
+            if tz_name:
+                return tz_name
+    return None
+
+def resolve_offline_timezone(text):
+    """
+    Return the timezone of a location string naming a known place, without any network access.
+
+    The whole string, or one of its comma-separated parts ("Lahore, Pakistan"), is matched
+    first. In free text such as an operation description, only a capitalized name right
+    after "in", "at", "from" or "to" counts ("buy BTC from Islamabad"), so "Reading a book"
+    or "buy a turkey on Phoenix" does not resolve to a zone.
+
+    Args:
+        text: A location string
+
+    Returns:
+        str or None: IANA timezone name, or None if the location is not a known place
+    """
+    if not text or not GAZETTEER:
+        return None
+    # Whole string first, so "Hyderabad, Sindh" is not read as the Indian "Hyderabad"
+    tz_name = GAZETTEER.get(" ".join(_place_words(text)))
+    if tz_name:
+        return tz_name
+    for part in _LOCATION_PARTS.split(text):
+        tz_name = GAZETTEER.get(" ".join(_place_words(part)))
+        if tz_name:
+            return tz_name
+    return _place_in_text(text)
+
+# Sentinel for "not cached" so that a cached negative result (None) can be told apart
+_MISSING = object()
+
+# Nominatim's usage policy allows at most one request per second
+NOMINATIM_RATE_LIMIT = float(os.getenv("NOMINATIM_RATE_LIMIT", "1"))
+
+class TokenBucket:
+    """
+    Thread-safe token bucket; acquire() blocks until a token is available.
+    
+    Args:
+        rate: Tokens added per second
+        capacity: Maximum burst size
+    """
+    
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+# Location -> IANA timezone cache (in-process LRU backed by SQLite)
+class LocationTimezoneCache:
+    """
+    Cache location strings to IANA timezone names so repeat lookups skip Nominatim.
+
+    Lookups go through an in-process LRU first, then a SQLite table that is shared
+    across Streamlit sessions and restarts, and only then the geocoder. Locations the
+    geocoder could not resolve are cached too (as None) with a shorter TTL.
+
+    Args:
+        geocoder: Object with a geopy-style geocode(query, timeout=...) method
+        finder: Object with a timezone_at(lat=..., lng=...) method
+        db_path: SQLite file path, or None to keep the cache in memory only
+        maxsize: Maximum number of entries kept in the in-process LRU
+        ttl: Seconds a resolved timezone stays valid
+        negative_ttl: Seconds an unresolved location stays cached
+        rate_limiter: Object with a blocking acquire() called before every geocoder request
+    """
+
+    def __init__(self, geocoder, finder, db_path=None, maxsize=1024,
+                 ttl=30 * 24 * 3600, negative_ttl=24 * 3600, rate_limiter=None):
+        self.geocoder = geocoder
+        self.finder = finder
+        self.rate_limiter = rate_limiter
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "negative_hits": 0, "errors": 0, "coalesced": 0}
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            try:
+                if db_path != ":memory:":
+                    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS location_tz ("
+                    "location TEXT PRIMARY KEY, tz_name TEXT, expires_at REAL NOT NULL)"
+                )
+                self._db.commit()
+            except (OSError, sqlite3.Error) as db_error:
+                logging.warning(f"Timezone cache database unavailable, using memory only: {db_error}")
+                self._db = None
+
+    @staticmethod
+    def normalize(location):
+        return " ".join(location.lower().split())
+
+    def _get_memory(self, key, now):
+        entry = self._memory.get(key)
+        if entry is None:
+            return _MISSING
+        tz_name, expires_at = entry
+        if expires_at < now:
+            del self._memory[key]
+            return _MISSING
+        self._memory.move_to_end(key)
+        return tz_name
+
+    def _set_memory(self, key, tz_name, expires_at):
+        self._memory[key] = (tz_name, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _get_disk(self, key, now):
+        if self._db is None:
+            return _MISSING, None
+        try:
+            row = self._db.execute(
+                "SELECT tz_name, expires_at FROM location_tz WHERE location = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as db_error:
+            logging.warning(f"Timezone cache read failed: {db_error}")
+            return _MISSING, None
+        if row is None or row[1] < now:
+            return _MISSING, None
+        return row[0], row[1]
+
+    def _set_disk(self, key, tz_name, expires_at):
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO location_tz (location, tz_name, expires_at) VALUES (?, ?, ?)",
+                (key, tz_name, expires_at),
+            )
+            self._db.commit()
+        except sqlite3.Error as db_error:
+            logging.warning(f"Timezone cache write failed: {db_error}")
+
+    def _count_hit(self, tz_name, counter):
+        self.stats[counter] += 1
+        if tz_name is None:
+            self.stats["negative_hits"] += 1
+
+    def lookup(self, location):
+        """
+        Resolve a location string to an IANA timezone name.
+
+        Returns:
+            str or None: Timezone name, or None if the location could not be resolved
+        """
+        if not location:
+            return None
+        key = self.normalize(location)
+        now = time.time()
+
+        with self._lock:
+            tz_name = self._get_memory(key, now)
+            if tz_name is not _MISSING:
+                self._count_hit(tz_name, "hits")
+                count("location_cache_hits")
+                return tz_name
+            tz_name, expires_at = self._get_disk(key, now)
+            if tz_name is not _MISSING:
+                self._count_hit(tz_name, "disk_hits")
+                count("location_cache_hits")
+                self._set_memory(key, tz_name, expires_at)
+                return tz_name
+            # Another thread is already geocoding this location, wait for its answer
+            pending = self._inflight.get(key)
+            if pending is not None:
+                self.stats["coalesced"] += 1
+            else:
+                self.stats["misses"] += 1
+                self._inflight[key] = Future()
+        if pending is not None:
+            return pending.result()
+
+        # Geocode outside the lock so one slow lookup does not stall the others
+        tz_name = None
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            with stage("geocode"):
+                loc = self.geocoder.geocode(location, timeout=10)
+            if loc:
+                with stage("timezone_finder"):
+                    tz_name = self.finder.timezone_at(lat=loc.latitude, lng=loc.longitude)
+        except Exception as loc_error:
+            # Transient failures (network, rate limits) are not cached
+            with self._lock:
+                self.stats["errors"] += 1
+                self._inflight.pop(key).set_result(None)
+            count("geocode_errors")
+            logging.warning("Location resolution failed: %s", loc_error)
+            return None
+
+        expires_at = now + (self.ttl if tz_name else self.negative_ttl)
+        with self._lock:
+            self._set_memory(key, tz_name, expires_at)
+            self._set_disk(key, tz_name, expires_at)
+            self._inflight.pop(key).set_result(tz_name)
+        return tz_name
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM location_tz")
+                self._db.commit()
+
+# TimezoneFinder loads its polygon data and Nominatim sets up a session, so both
+# are only built the first time a location actually has to be geocoded
+_tf = None
+_geolocator = None
+_location_tz_cache = None
+_init_lock = threading.Lock()
+
+def get_timezone_finder():
+    global _tf
+    if _tf is None:
+        with _init_lock:
+            if _tf is None:
+                from timezonefinder import TimezoneFinder
+                _tf = TimezoneFinder()
+    return _tf
+
+def get_geolocator():
+    global _geolocator
+    if _geolocator is None:
+        with _init_lock:
+            if _geolocator is None:
+                from geopy.geocoders import Nominatim
+                _geolocator = Nominatim(user_agent="prompt-refiner-chat")
+    return _geolocator
+
+class _LazyFinder:
+    # Defers TimezoneFinder construction (and the grid cache in front of it) until the cache misses
+    def timezone_at(self, lat, lng):
+        from .tzgrid import get_grid_finder
+        return get_grid_finder().timezone_at(lat=lat, lng=lng)
+
+class _LazyGeocoder:
+    # Defers Nominatim construction until the cache misses
+    def geocode(self, query, timeout=10):
+        return get_geolocator().geocode(query, timeout=timeout)
+
+# Shared by every caller in the process, including all Streamlit sessions
+def get_location_tz_cache():
+    global _location_tz_cache
+    if _location_tz_cache is None:
+        with _init_lock:
+            if _location_tz_cache is None:
+                _location_tz_cache = LocationTimezoneCache(
+                    _LazyGeocoder(), _LazyFinder(), db_path=TZ_CACHE_PATH,
+                    rate_limiter=TokenBucket(NOMINATIM_RATE_LIMIT),
+                )
+    return _location_tz_cache
+
+def set_location_tz_cache(cache):
+    """
+    Replace the shared location cache, e.g. with one built around a fake geocoder.
+    """
+    global _location_tz_cache
+    _location_tz_cache = cache
+
+def resolve_location_timezone(location):
+    """
+    Resolve a location to a timezone name, trying the offline gazetteer before the geocoder cache.
+    """
+    if not location or location.lower() in ["unknown", ""]:
+        return None
+    tz_name = resolve_offline_timezone(location)
+    if tz_name:
+        count("gazetteer_hits")
+        return tz_name
+    return get_location_tz_cache().lookup(location)
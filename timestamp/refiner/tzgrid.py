@@ -0,0 +1,226 @@
+"""
+Coordinate grid cache in front of TimezoneFinder.
+
+Coordinates are quantized to TZ_GRID_STEP degree cells. The first lookup in a cell
+checks whether the whole cell lies in one zone, using TimezoneFinder's own H3 shortcut
+index: every shortcut hexagon overlapping the cell must hold a single zone, and the
+same one. Such cells are answered from the table from then on; cells touching a zone
+boundary are marked as such and always go to the point-in-polygon check.
+
+The table is one uint16 per cell (0 = not classified yet, 0xFFFF = boundary, otherwise
+zone index + 1). With TZ_GRID_PATH set (by default a file in the user's cache directory)
+it is a memory-mapped file, so every worker process on the host shares the cells any of
+them has classified.
+"""
+import os
+import json
+import hashlib
+import math
+import logging
+import threading
+
+import numpy as np
+
+from .metrics import count
+
+try:
+    import h3
+    from timezonefinder.configs import SHORTCUT_H3_RES
+except ImportError:
+    # timezonefinder releases before the H3 shortcut index; every cell counts as a boundary cell
+    h3 = None
+    SHORTCUT_H3_RES = None
+
+TZ_GRID_STEP = float(os.getenv("TZ_GRID_STEP", "0.05"))
+# The sparse table is ~52 MB at the default step, so it lives in the cache directory, not the package
+TZ_GRID_PATH = os.getenv("TZ_GRID_PATH", os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "refiner", "tz_grid.u16"
+))
+
+UNCLASSIFIED = 0
+BOUNDARY = 0xFFFF
+
+_MAGIC = b"TZGRID1\n"
+_HEADER_SIZE = 256
+
+class GridTimezoneFinder:
+    """
+    TimezoneFinder wrapper answering points in single-zone grid cells from a table.
+
+    Args:
+        finder: timezonefinder.TimezoneFinder
+        step: Cell size in degrees
+        path: File for a memory-mapped table shared across processes, or None to keep it in memory
+    """
+
+    def __init__(self, finder, step=TZ_GRID_STEP, path=None):
+        self.finder = finder
+        self.step = step
+        self.rows = math.ceil(180 / step - 1e-9)
+        self.cols = math.ceil(360 / step - 1e-9)
+        self.zone_names = list(finder.timezone_names)
+        self._zone_codes = {name: code for code, name in enumerate(self.zone_names, start=1)}
+        # code -> name, with None for the unclassified/boundary codes
+        self._names_by_code = np.array([None] + self.zone_names, dtype=object)
+        table = self._open_table(path)
+        self._mapping = table if isinstance(table, np.memmap) else None
+        # Plain ndarray view: indexing a memmap goes through its Python-level subclass hooks
+        self.table = table.view(np.ndarray)
+
+    def _header(self):
+        header = {
+            "step": self.step,
+            "shape": [self.rows, self.cols],
+            "data_version": str(getattr(self.finder, "data_version", "")),
+            # Zone codes are list positions, so a table built from other zone data is never reused
+            "zones": hashlib.sha256("\n".join(self.zone_names).encode()).hexdigest(),
+        }
+        return _MAGIC + json.dumps(header, sort_keys=True, separators=(",", ":")).encode()
+
+    def _open_table(self, path):
+        if path:
+            try:
+                return self._map_file(path)
+            except (OSError, ValueError) as map_error:
+                logging.warning("Timezone grid file unavailable, using memory only: %s", map_error)
+        # Untouched zero pages are never materialized, so the full-size table is cheap
+        return np.zeros((self.rows, self.cols), dtype=np.uint16)
+
+    def _map_file(self, path):
+        header = self._header()
+        size = _HEADER_SIZE + self.rows * self.cols * 2
+        current = None
+        if os.path.exists(path) and os.path.getsize(path) == size:
+            with open(path, "rb") as f:
+                current = f.read(len(header))
+        if current != header:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # Build the new file beside the old one and swap it in, so processes that
+            # already mapped the old table keep a consistent (if unshared) view
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                f.truncate(size)
+            os.replace(tmp_path, path)
+        return np.memmap(path, dtype=np.uint16, mode="r+", offset=_HEADER_SIZE, shape=(self.rows, self.cols))
+
+    def _classify(self, row, col):
+        """
+        Zone code for a cell lying wholly in one zone, else BOUNDARY.
+        """
+        if SHORTCUT_H3_RES is None:
+            return BOUNDARY
+        south = row * self.step - 90
+        west = col * self.step - 180
+        north = min(south + self.step, 90.0)
+        east = min(west + self.step, 180.0)
+        corners = [(south, west), (south, east), (north, east), (north, west)]
+        hexagons = set(h3.h3shape_to_cells_experimental(h3.LatLngPoly(corners), SHORTCUT_H3_RES, contain="overlap"))
+        hexagons.update(h3.latlng_to_cell(lat, lng, SHORTCUT_H3_RES) for lat, lng in corners)
+        zone = None
+        for hexagon in hexagons:
+            lat, lng = h3.cell_to_latlng(hexagon)
+            name = self.finder.unique_timezone_at(lng=lng, lat=lat)
+            if name is None or (zone is not None and name != zone):
+                return BOUNDARY
+            zone = name
+        return self._zone_codes.get(zone, BOUNDARY)
+
+    def timezone_at(self, lat, lng):
+        """
+        Timezone name at a point, or None where TimezoneFinder has none.
+        """
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            # Let TimezoneFinder raise its usual error
+            return self.finder.timezone_at(lng=lng, lat=lat)
+        # Inlined cell lookup; this path runs once per geocoded location
+        row = int((lat + 90) / self.step)
+        col = int((lng + 180) / self.step)
+        if row == self.rows:
+            row -= 1
+        if col == self.cols:
+            col -= 1
+        code = self.table.item(row, col)
+        if code == UNCLASSIFIED:
+            code = self._classify(row, col)
+            self.table[row, col] = code
+        if code != BOUNDARY:
+            count("tz_grid_hits")
+            return self.zone_names[code - 1]
+        count("tz_grid_boundary")
+        return self.finder.timezone_at(lng=lng, lat=lat)
+
+    def timezone_at_many(self, lats, lngs):
+        """
+        Timezone names for arrays of points.
+
+        Each unclassified cell is classified once, and points in boundary cells are
+        deduplicated before the point-in-polygon check.
+
+        Args:
+            lats: Latitudes, array-like
+            lngs: Longitudes, array-like of the same length
+
+        Returns:
+            numpy object array of timezone names (None where there is no zone), in input order
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        if lats.shape != lngs.shape:
+            raise ValueError("lats and lngs must have the same shape")
+        if ((lats < -90) | (lats > 90) | (lngs < -180) | (lngs > 180) | np.isnan(lats) | np.isnan(lngs)).any():
+            raise ValueError("coordinates out of range")
+        rows = np.minimum(((lats + 90) / self.step).astype(np.int64), self.rows - 1)
+        cols = np.minimum(((lngs + 180) / self.step).astype(np.int64), self.cols - 1)
+        codes = self.table[rows, cols]
+
+        pending = codes == UNCLASSIFIED
+        if pending.any():
+            for cell in np.unique(rows[pending] * self.cols + cols[pending]):
+                row, col = divmod(int(cell), self.cols)
+                self.table[row, col] = self._classify(row, col)
+            codes = self.table[rows, cols]
+
+        boundary = codes == BOUNDARY
+        names = self._names_by_code[np.where(boundary, 0, codes)]
+        if boundary.any():
+            points, inverse = np.unique(np.stack([lats[boundary], lngs[boundary]], axis=-1), axis=0, return_inverse=True)
+            resolved = np.array(
+                [self.finder.timezone_at(lng=float(lng), lat=float(lat)) for lat, lng in points], dtype=object
+            )
+            names[boundary] = resolved[inverse.reshape(-1)]
+        count("tz_grid_hits", int(codes.size - boundary.sum()))
+        count("tz_grid_boundary", int(boundary.sum()))
+        return names
+
+    def flush(self):
+        """
+        Write classified cells of a file-backed table to disk (the OS does so eventually anyway).
+        """
+        if self._mapping is not None:
+            self._mapping.flush()
+
+    def classified_fraction(self):
+        """
+        Share of cells classified so far, and the share of those lying wholly in one zone.
+        """
+        classified = np.count_nonzero(self.table)
+        boundary = np.count_nonzero(self.table == BOUNDARY)
+        return classified / self.table.size, (classified - boundary) / classified if classified else 0.0
+
+_grid_finder = None
+_init_lock = threading.Lock()
+
+# Shared by every caller in the process and built around the module-level TimezoneFinder;
+# TZ_GRID_STEP=0 turns the grid off and returns the plain finder
+def get_grid_finder():
+    global _grid_finder
+    if _grid_finder is None:
+        with _init_lock:
+            if _grid_finder is None:
+                from .timezones import get_timezone_finder
+                if TZ_GRID_STEP <= 0:
+                    _grid_finder = get_timezone_finder()
+                else:
+                    _grid_finder = GridTimezoneFinder(get_timezone_finder(), path=TZ_GRID_PATH or None)
+    return _grid_finder
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the refiner package the same way the benchmarks do, from the timestamp/ directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,33 @@
+import asyncio
+import io
+import json
+
+from refiner import batch
+
+async def _fake_refine_turn(store, session_id, prompt):
+    if prompt == "boom":
+        raise RuntimeError("LLM down")
+    return {"session_id": session_id, "result": None, "reply": prompt.upper()}
+
+def _run(lines, monkeypatch):
+    monkeypatch.setattr(batch, "refine_turn", _fake_refine_turn)
+    output = io.StringIO()
+    processed = asyncio.run(batch.run_batch(lines, output, concurrency=2))
+    return processed, [json.loads(line) for line in output.getvalue().splitlines()]
+
+def test_bad_lines_and_failed_turns_become_error_records(monkeypatch):
+    lines = [
+        '{"id": 1, "prompt": "hi", "session_id": "s"}\n',
+        "[1, 2]\n",
+        '"x"\n',
+        "{not json\n",
+        '{"id": 5}\n',
+        '{"id": 6, "prompt": "boom", "session_id": "s"}\n',
+        '{"id": 7, "prompt": "bye", "session_id": "s"}\n',
+    ]
+    processed, records = _run(lines, monkeypatch)
+    assert processed == len(lines) == len(records)
+    assert records[0] == {"id": 1, "session_id": "s", "result": None, "reply": "HI"}
+    assert [record["error"].startswith("Invalid input line") for record in records[1:5]] == [True] * 4
+    assert records[5] == {"id": 6, "session_id": "s", "error": "RuntimeError: LLM down"}
+    assert records[6]["reply"] == "BYE"
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from aiohttp import web
+
+from refiner.client import LLMClient
+
+OK = {"choices": [{"message": {"content": "hi"}}]}
+
+class _StubServer:
+    """
+    Chat completions endpoint on a background event loop that answers with scripted
+    (status, headers) pairs, repeating the last one, and records when each request arrived.
+    """
+
+    def __init__(self):
+        self.script = [(200, {})]
+        self.arrivals = []
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    async def _handle(self, request):
+        await request.json()
+        self.arrivals.append(time.monotonic())
+        status, headers = self.script[min(len(self.arrivals), len(self.script)) - 1]
+        if status == 200:
+            return web.json_response(OK, headers=headers)
+        return web.json_response({"error": {"message": f"status {status}"}}, status=status, headers=headers)
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_post("/chat/completions", self._handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        return self.runner.addresses[0][1]
+
+    def start(self):
+        self.thread.start()
+        port = asyncio.run_coroutine_threadsafe(self._start(), self.loop).result(5)
+        self.url = f"http://127.0.0.1:{port}/chat/completions"
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+@pytest.fixture
+def server():
+    stub = _StubServer()
+    stub.start()
+    yield stub
+    stub.stop()
+
+def _client(server, **kwargs):
+    return LLMClient(url=server.url, api_key="test", **kwargs)
+
+def test_429_waits_for_retry_after(server):
+    server.script = [(429, {"Retry-After": "0.3"}), (200, {})]
+    # A backoff this long would only be visible if Retry-After were ignored
+    res = _client(server, backoff_base=5.0).post({"messages": []})
+    assert res.status_code == 200 and res.json() == OK
+    assert len(server.arrivals) == 2
+    assert 0.25 <= server.arrivals[1] - server.arrivals[0] < 2.5
+
+def test_5xx_retries_until_exhausted(server):
+    server.script = [(503, {})]
+    res = _client(server, max_retries=2, backoff_base=0.01).post({"messages": []})
+    assert res.status_code == 503
+    assert len(server.arrivals) == 3
+
+@pytest.mark.parametrize("status", [400, 401, 404])
+def test_non_retryable_4xx_is_returned_at_once(server, status):
+    server.script = [(status, {}), (200, {})]
+    res = _client(server, backoff_base=0.01).post({"messages": []})
+    assert res.status_code == status
+    assert len(server.arrivals) == 1
+
+def test_apost_retries_like_post(server):
+    server.script = [(502, {}), (500, {}), (200, {})]
+    client = _client(server, backoff_base=0.01)
+    try:
+        res = asyncio.run(client.apost({"messages": []}))
+    finally:
+        client.close()
+    assert res.status_code == 200
+    assert len(server.arrivals) == 3
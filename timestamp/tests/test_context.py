@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from refiner.context import summarize_structured_output
+
+def _block(result):
+    return "```json\n" + json.dumps(result) + "\n```\nWould you like to proceed?"
+
+def test_summary_lists_operations():
+    content = _block({"cascade_schema": [
+        {"description": "Swap 1 ETH to USDC", "time": {"exec_time": 1745575200, "timezone": "Asia/Karachi"}},
+        {"description": "Stake the USDC", "time": {"exec_time": 0}},
+    ]})
+    assert summarize_structured_output(content) == (
+        "[Earlier structured output with 2 operation(s): "
+        "Swap 1 ETH to USDC (exec_time 1745575200 Asia/Karachi); Stake the USDC]"
+    )
+
+@pytest.mark.parametrize("time_value", ["April 25, 2025 3:00 PM", 1745575200, ["tomorrow"], None])
+def test_time_that_is_not_an_object_is_ignored(time_value):
+    content = _block({"cascade_schema": [{"description": "Swap", "time": time_value}]})
+    assert summarize_structured_output(content) == "[Earlier structured output with 1 operation(s): Swap]"
+
+@pytest.mark.parametrize("schema", ["Swap ETH", {"description": "Swap"}, 5, None])
+def test_cascade_schema_that_is_not_a_list_is_ignored(schema):
+    content = _block({"cascade_schema": schema})
+    assert summarize_structured_output(content) == "[Earlier structured output with 0 operation(s): ]"
+
+def test_plain_text_is_not_summarized():
+    assert summarize_structured_output("Would you like to proceed?") is None
+    assert summarize_structured_output("```json\n{not json}\n```") is None
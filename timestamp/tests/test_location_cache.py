@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from refiner import timezones
+from refiner.timezones import LocationTimezoneCache, TokenBucket
+
+KARACHI = SimpleNamespace(latitude=24.86, longitude=67.01)
+
+class _Geocoder:
+    def __init__(self, *answers, gate=None):
+        self.answers = list(answers)
+        self.queries = []
+        self.gate = gate
+        self.entered = threading.Event()
+
+    def geocode(self, query, timeout=10):
+        self.queries.append(query)
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        answer = self.answers[min(len(self.queries), len(self.answers)) - 1]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+class _Finder:
+    def timezone_at(self, lat, lng):
+        return "Asia/Karachi"
+
+class _Limiter:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(timezones, "time", SimpleNamespace(time=lambda: now[0], monotonic=time.monotonic, sleep=time.sleep))
+    return now
+
+def test_unresolved_location_is_cached_for_the_negative_ttl(clock):
+    geocoder = _Geocoder(None, KARACHI)
+    cache = LocationTimezoneCache(geocoder, _Finder(), ttl=1000, negative_ttl=10)
+    assert cache.lookup("Nowhere") is None
+    assert cache.lookup("  nowhere ") is None
+    assert len(geocoder.queries) == 1 and cache.stats["negative_hits"] == 1
+    clock[0] += 11
+    assert cache.lookup("Nowhere") == "Asia/Karachi"
+    clock[0] += 500
+    assert cache.lookup("Nowhere") == "Asia/Karachi"
+    assert len(geocoder.queries) == 2
+
+def test_geocoder_errors_are_not_cached(clock):
+    geocoder = _Geocoder(TimeoutError("slow"), KARACHI)
+    cache = LocationTimezoneCache(geocoder, _Finder())
+    assert cache.lookup("Karachi") is None
+    assert cache.stats["errors"] == 1
+    assert cache.lookup("Karachi") == "Asia/Karachi"
+    assert len(geocoder.queries) == 2
+
+def test_concurrent_lookups_of_one_location_share_one_request():
+    gate = threading.Event()
+    geocoder = _Geocoder(KARACHI, gate=gate)
+    limiter = _Limiter()
+    cache = LocationTimezoneCache(geocoder, _Finder(), rate_limiter=limiter)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.lookup("Karachi"))) for _ in range(5)]
+    threads[0].start()
+    assert geocoder.entered.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.stats["coalesced"] < 4 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["Asia/Karachi"] * 5
+    assert len(geocoder.queries) == 1 and limiter.acquired == 1
+    assert cache.stats["coalesced"] == 4
+
+def test_results_persist_on_disk_in_a_created_directory(tmp_path):
+    db_path = os.path.join(tmp_path, "cache", "refiner", "tz_cache.sqlite3")
+    geocoder = _Geocoder(KARACHI)
+    assert LocationTimezoneCache(geocoder, _Finder(), db_path=db_path).lookup("Karachi") == "Asia/Karachi"
+    reopened = LocationTimezoneCache(geocoder, _Finder(), db_path=db_path)
+    assert reopened.lookup("Karachi") == "Asia/Karachi"
+    assert len(geocoder.queries) == 1 and reopened.stats["disk_hits"] == 1
+
+def test_token_bucket_allows_a_burst_then_paces_requests():
+    bucket = TokenBucket(rate=50, capacity=2)
+    started = time.monotonic()
+    bucket.acquire()
+    bucket.acquire()
+    assert time.monotonic() - started < 0.05
+    for _ in range(5):
+        bucket.acquire()
+    # Five more tokens at 50 per second take about 0.1 s
+    assert time.monotonic() - started >= 0.09
@@ -0,0 +1,44 @@
+import pytest
+
+from refiner.model import CascadeResult, Time
+
+RESULT = {
+    "cascade_schema": [
+        {
+            "type": "operation",
+            "priority": 1,
+            "time": {"user_time": "in 2 hours", "exec_time": None, "timezone": None, "temporal_state": "future"},
+            "location": None,
+            "description": "Buy 0.5 BTC",
+            "control_flow": [
+                {"conditions": [{"value": 60000, "field": "price", "operator": "<", "unit": None}], "type": "if"},
+                "not an object",
+            ],
+            "fallback": None,
+        },
+    ],
+    "notes": [],
+    "agenda_specs": None,
+}
+
+def test_dict_round_trip_keeps_nulls_and_key_order():
+    data = CascadeResult.from_dict(RESULT).to_dict()
+    assert data == RESULT
+    assert list(data) == list(RESULT)
+    assert list(data["cascade_schema"][0]) == list(RESULT["cascade_schema"][0])
+    assert list(data["cascade_schema"][0]["time"]) == list(RESULT["cascade_schema"][0]["time"])
+
+def test_msgpack_round_trip_keeps_nulls_and_key_order():
+    pytest.importorskip("msgpack")
+    data = CascadeResult.from_msgpack(CascadeResult.from_dict(RESULT).to_msgpack()).to_dict()
+    assert data == RESULT
+    assert list(data["cascade_schema"][0]) == list(RESULT["cascade_schema"][0])
+
+def test_fields_set_after_loading_follow_the_original_keys():
+    time = Time.from_dict({"user_time": "in 2 hours", "note": None})
+    time.exec_time = 1745575200
+    assert time.to_dict() == {"user_time": "in 2 hours", "note": None, "exec_time": 1745575200}
+    assert list(time.to_dict()) == ["user_time", "note", "exec_time"]
+
+def test_built_records_skip_unset_fields():
+    assert Time(user_time="tomorrow", source="llm").to_dict() == {"user_time": "tomorrow", "source": "llm"}
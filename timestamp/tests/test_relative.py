@@ -0,0 +1,121 @@
+from datetime import datetime
+
+import pytest
+import pytz
+
+from refiner.cascade import normalize_operation_time
+from refiner.relative import (
+    Recurrence,
+    iter_exec_times,
+    parse_relative_time,
+    upcoming_exec_times,
+)
+
+KARACHI = pytz.timezone("Asia/Karachi")
+
+def _now(*args):
+    return int(KARACHI.localize(datetime(*args)).timestamp())
+
+def _local(epoch):
+    return datetime.fromtimestamp(epoch, KARACHI).replace(tzinfo=None)
+
+def test_day_of_month_that_never_occurs_has_no_occurrences():
+    # April has no 31st, and a yearly rule started in April only ever lands in April
+    expression = parse_relative_time("every year on the 31st", KARACHI, _now(2026, 4, 10, 12))
+    assert expression.recurrence.bymonthday == 31
+    assert expression.exec_time is None
+
+@pytest.mark.parametrize("freq, interval, start, chunk_size", [
+    ("YEARLY", 1, (2026, 4, 10), 512),
+    ("YEARLY", 1, (2026, 4, 10), 1),
+    ("MONTHLY", 12, (2026, 6, 1), 16),
+    ("MONTHLY", 24, (2026, 9, 1), 1),
+])
+def test_expansion_of_a_day_that_never_occurs_terminates(freq, interval, start, chunk_size):
+    recurrence = Recurrence(freq, interval, (), 31, 9, 0, None, None)
+    assert list(iter_exec_times(recurrence, KARACHI, _now(*start), chunk_size=chunk_size)) == []
+    assert upcoming_exec_times(recurrence, KARACHI, _now(*start)) == []
+
+def test_months_without_the_day_are_skipped_not_ended():
+    # Every other month from February: February, April and June have no 31st, August does
+    recurrence = Recurrence("MONTHLY", 2, (), 31, 9, 0, None, None)
+    upcoming = upcoming_exec_times(recurrence, KARACHI, _now(2026, 2, 1), limit=3)
+    assert [_local(epoch).date().isoformat() for epoch in upcoming] == ["2026-08-31", "2026-10-31", "2026-12-31"]
+
+def test_february_29th_waits_for_a_leap_year():
+    recurrence = Recurrence("YEARLY", 1, (), 29, 9, 0, None, None)
+    upcoming = upcoming_exec_times(recurrence, KARACHI, _now(2025, 2, 1), limit=3)
+    assert [_local(epoch).date().isoformat() for epoch in upcoming] == ["2028-02-29", "2032-02-29", "2036-02-29"]
+
+def test_month_end_rule_skips_short_months():
+    expression = parse_relative_time("every month on the 31st at 9am", KARACHI, _now(2026, 4, 10, 12))
+    upcoming = upcoming_exec_times(expression.recurrence, KARACHI, _now(2026, 4, 10, 12), limit=4)
+    assert [_local(epoch).date().isoformat() for epoch in upcoming] == [
+        "2026-05-31", "2026-07-31", "2026-08-31", "2026-10-31",
+    ]
+
+@pytest.mark.parametrize("text", ["every month on the 45th", "every month on the 0th", "every year on the 32nd"])
+def test_day_of_month_out_of_range_is_rejected(text):
+    assert parse_relative_time(text, KARACHI, _now(2026, 4, 10, 12)) is None
+
+def test_before_weekday_asked_on_that_weekday_is_next_week():
+    now = _now(2026, 4, 10, 12)  # a Friday
+    expression = parse_relative_time("before Friday", KARACHI, now)
+    assert expression.constraint == "BEFORE"
+    assert _local(expression.exec_time) == datetime(2026, 4, 17)
+
+def test_weekday_later_today_is_today():
+    now = _now(2026, 4, 10, 12)  # a Friday
+    assert _local(parse_relative_time("Friday at 5pm", KARACHI, now).exec_time) == datetime(2026, 4, 10, 17)
+    assert _local(parse_relative_time("Friday at 9am", KARACHI, now).exec_time) == datetime(2026, 4, 17, 9)
+
+@pytest.mark.parametrize("text", ["before Friday", "Monday", "next Friday", "by Sunday at 9am", "tomorrow", "in 2 hours"])
+def test_weekday_expressions_are_never_in_the_past(text):
+    for day in range(6, 13):  # every weekday, Monday to Sunday
+        now = _now(2026, 4, day, 12)
+        assert parse_relative_time(text, KARACHI, now).exec_time > now
+
+@pytest.mark.parametrize("text", [
+    "every 0 days at 9am", "every 0 days at midnight", "every 0 weeks on monday",
+    "every 0 months on the 5th", "every 0 minutes",
+])
+def test_zero_interval_is_rejected(text):
+    assert parse_relative_time(text, KARACHI, _now(2026, 4, 10, 12)) is None
+
+def test_zero_interval_rule_is_not_expanded():
+    with pytest.raises(ValueError):
+        next(iter_exec_times(Recurrence("DAILY", 0, (), None, 9, 0, None, None), KARACHI, _now(2026, 4, 10)))
+
+def test_unbounded_rule_stops_at_the_horizon():
+    start = _now(2026, 4, 10)
+    epochs = [epoch for chunk in iter_exec_times(Recurrence("YEARLY", 1, (), None, 9, 0, None, None), KARACHI, start)
+              for epoch in chunk]
+    assert 100 <= len(epochs) <= 101
+    assert _local(epochs[-1]).year <= 2126
+
+@pytest.mark.parametrize("text", ["April 25 at 3pm", "25 April at 15:00", "on 4/25 at 3pm", "May 1st at noon"])
+def test_dates_without_a_year_are_left_to_the_absolute_parser(text):
+    assert parse_relative_time(text, KARACHI, _now(2025, 4, 20, 12)) is None
+
+@pytest.mark.parametrize("text, expected", [
+    ("April 25 at 3pm", datetime(2025, 4, 25, 15)),
+    ("25 April at 15:00", datetime(2025, 4, 25, 15)),
+])
+def test_dates_without_a_year_keep_their_date(text, expected):
+    item = normalize_operation_time({"time": {"user_time": text}, "location": "Lahore"}, now=_now(2025, 4, 20, 12))
+    assert item["time"]["timezone"] == "Asia/Karachi"
+    assert _local(item["time"]["exec_time"]).replace(year=2025) == expected
+
+@pytest.mark.parametrize("text", ["in 99999999 weeks", "in 999999 months", "in 99999999999999 minutes"])
+def test_amounts_past_the_horizon_are_not_relative(text):
+    assert parse_relative_time(text, KARACHI, _now(2026, 4, 10, 12)) is None
+
+@pytest.mark.parametrize("item", [
+    {"time": {"user_time": "in 99999999 weeks"}, "location": "Lahore"},
+    {"time": {"user_time": "in 999999 months"}, "location": "Lahore"},
+    {"time": {"user_time": "in 2 hours"}, "location": {"city": "Lahore"}},
+    {"time": {"user_time": ["in 2 hours"]}, "description": "Buy BTC"},
+    {"time": "in 2 hours"},
+])
+def test_normalize_operation_time_survives_bad_input(item):
+    normalize_operation_time(item, now=_now(2026, 4, 10, 12))
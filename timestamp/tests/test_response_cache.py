@@ -0,0 +1,83 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from refiner import response_cache
+from refiner.response_cache import ResponseCache
+
+def _payload(*contents, system="You structure tasks.", **options):
+    messages = [{"role": "system", "content": system}]
+    messages += [{"role": "user" if i % 2 == 0 else "assistant", "content": c} for i, c in enumerate(contents)]
+    return {"model": "llama-3.3-70b-versatile", "messages": messages, "temperature": 0.2, **options}
+
+def test_key_ignores_whitespace_and_is_stable():
+    key = ResponseCache.key(_payload("Swap 1 ETH  to USDC\n"))
+    assert key == ResponseCache.key(_payload(" Swap 1 ETH to USDC"))
+    assert key == ResponseCache.key(dict(reversed(list(_payload("Swap 1 ETH to USDC").items()))))
+    assert len(key) == 64 and int(key, 16) >= 0
+
+@pytest.mark.parametrize("other", [
+    _payload("Swap 2 ETH to USDC"),
+    _payload("Swap 1 ETH to USDC", "Would you like to proceed?"),
+    _payload("Swap 1 ETH to USDC", system="A newer system prompt."),
+    _payload("Swap 1 ETH to USDC", temperature=0.0),
+    dict(_payload("Swap 1 ETH to USDC"), model="llama-3.1-8b-instant"),
+])
+def test_key_changes_with_what_determines_the_reply(other):
+    assert ResponseCache.key(_payload("Swap 1 ETH to USDC")) != ResponseCache.key(other)
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(maxsize=2)
+    cache.set("a", "A", 1.0)
+    cache.set("b", "B", 1.0)
+    assert cache.get("a") == "A"
+    cache.set("c", "C", 1.0)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+    assert cache.stats["hits"] == 3 and cache.stats["seconds_saved"] == 3.0
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(response_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    cache = ResponseCache(ttl=60)
+    cache.set("a", "A", 1.0)
+    now[0] += 59
+    assert cache.get("a") == "A"
+    now[0] += 2
+    assert cache.get("a") is None
+
+def test_entries_persist_in_sqlite_in_a_created_directory(tmp_path):
+    db_path = os.path.join(tmp_path, "cache", "refiner", "llm_cache.sqlite3")
+    ResponseCache(db_path=db_path).set("a", "A", 2.5)
+    reopened = ResponseCache(db_path=db_path)
+    assert reopened.get("a") == "A"
+    assert reopened.stats["seconds_saved"] == 2.5
+
+def test_disk_is_trimmed_to_max_disk_entries(tmp_path):
+    db_path = os.path.join(tmp_path, "llm_cache.sqlite3")
+    cache = ResponseCache(db_path=db_path, max_disk_entries=2)
+    for name in "abc":
+        cache.set(name, name.upper(), 1.0)
+    reopened = ResponseCache(db_path=db_path)
+    assert [reopened.get(name) for name in "abc"] == [None, "B", "C"]
+
+@pytest.mark.parametrize("options", [{"temperature": 1.0}, {"n": 3}])
+def test_non_deterministic_requests_bypass_the_cache(options):
+    cache = ResponseCache()
+    payload = _payload("Write me a poem about gas fees", **options)
+    key = cache.request_key(payload)
+    assert key is None
+    cache.set(key, "a poem", 1.0)
+    assert cache.get(key) is None
+    assert cache.stats["stores"] == 0
+
+def test_deterministic_requests_use_the_payload_key():
+    cache = ResponseCache()
+    payload = _payload("Swap 1 ETH to USDC")
+    assert cache.request_key(payload) == ResponseCache.key(payload)
+
+def test_zero_ttl_disables_the_cache():
+    cache = ResponseCache(ttl=0)
+    cache.set("a", "A", 1.0)
+    assert cache.get("a") is None and not cache.enabled
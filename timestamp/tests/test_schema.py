@@ -0,0 +1,108 @@
+import asyncio
+import copy
+import json
+
+import pytest
+
+from refiner.llm import refine_with_llm_conversation, refine_with_llm_conversation_async
+from refiner.response_cache import ResponseCache
+from refiner.schema import validate_result
+
+VALID = {
+    "agenda_specs": {"attributes": "Agenda-Specs: swap"},
+    "cascade_schema": [{
+        "type": "OPERATION_MATRIX",
+        "time": {"temporal_state": "FUTURE", "constraint": "EXACTLY"},
+        "description": "Swap 1 ETH to USDC",
+        "control_flow": [{
+            "type": "COMPOSIT",
+            "logicalOperator": "AND",
+            "conditions": [{"operator": "GREATER"}],
+            "opera": {"action": "WRITE", "entity": {"type": "DEX"}},
+        }],
+        "fallback": {},
+    }],
+}
+
+def _with(path, value):
+    result = copy.deepcopy(VALID)
+    target = result
+    for key in path[:-1]:
+        target = target[key]
+    target[path[-1]] = value
+    return result
+
+def test_valid_result():
+    assert validate_result(VALID) == []
+
+@pytest.mark.parametrize("value", [["FUTURE"], {"state": "FUTURE"}, 3, True])
+def test_enum_with_a_non_string_value_is_an_error(value):
+    errors = validate_result(_with(["cascade_schema", 0, "time", "temporal_state"], value))
+    assert [error.path for error in errors] == ["$.cascade_schema[0].time.temporal_state"]
+
+@pytest.mark.parametrize("path", [
+    ["cascade_schema", 0, "type"],
+    ["cascade_schema", 0, "control_flow", 0, "logicalOperator"],
+    ["cascade_schema", 0, "control_flow", 0, "opera", "entity", "type"],
+])
+def test_unhashable_enum_values_do_not_raise(path):
+    errors = validate_result(_with(path, ["unexpected"]))
+    assert len(errors) == 1 and "is not one of" in errors[0].message
+
+@pytest.mark.parametrize("conditions", [5, "GREATER", {"operator": "GREATER"}])
+def test_conditions_must_be_a_list(conditions):
+    errors = validate_result(_with(["cascade_schema", 0, "control_flow", 0, "conditions"], conditions))
+    assert [error.path for error in errors] == ["$.cascade_schema[0].control_flow[0].conditions"]
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, content):
+        self._body = {"choices": [{"message": {"content": content}}]}
+
+    def json(self):
+        return self._body
+
+class _Client:
+    def __init__(self, *contents):
+        self.contents = list(contents)
+        self.calls = 0
+
+    def post(self, payload):
+        content = self.contents[min(self.calls, len(self.contents) - 1)]
+        self.calls += 1
+        return _Response(content)
+
+    async def apost(self, payload):
+        return self.post(payload)
+
+def test_invalid_reply_is_returned_not_swallowed():
+    invalid = _with(["cascade_schema", 0, "time", "constraint"], ["BEFORE"])
+    content = "```json\n" + json.dumps(invalid) + "\n```"
+    result, _ = refine_with_llm_conversation(
+        [{"role": "user", "content": "Swap 1 ETH"}], client=_Client(content), cache=ResponseCache(ttl=0), repair=False
+    )
+    assert result == invalid
+
+def _reply(result):
+    return "```json\n" + json.dumps(result) + "\n```"
+
+INVALID = _with(["cascade_schema", 0, "time", "constraint"], ["BEFORE"])
+CONVO = [{"role": "user", "content": "Swap 1 ETH"}]
+
+def test_async_reply_is_repaired():
+    client = _Client(_reply(INVALID), _reply(VALID))
+    result, _ = asyncio.run(refine_with_llm_conversation_async(CONVO, client=client, cache=ResponseCache(ttl=0), repair=True))
+    assert result == VALID and client.calls == 2
+
+def test_async_cached_reply_is_repaired():
+    cache = ResponseCache()
+    asyncio.run(refine_with_llm_conversation_async(CONVO, client=_Client(_reply(INVALID)), cache=cache, repair=False))
+    client = _Client(_reply(VALID))
+    result, _ = asyncio.run(refine_with_llm_conversation_async(CONVO, client=client, cache=cache, repair=True))
+    assert result == VALID and client.calls == 1
+
+def test_async_unrepairable_reply_is_returned():
+    client = _Client(_reply(INVALID))
+    result, _ = asyncio.run(refine_with_llm_conversation_async(CONVO, client=client, cache=ResponseCache(ttl=0), repair=True))
+    assert result == INVALID and client.calls == 2
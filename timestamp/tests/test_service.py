@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from refiner.service import create_app
+from refiner.sessions import InMemorySessionStore
+from refiner.timeparse import adjust_timestamp_to_location
+
+def _post(path, body):
+    async def call():
+        async with TestClient(TestServer(create_app(store=InMemorySessionStore()))) as client:
+            response = await client.post(path, json=body)
+            if response.content_type == "application/json":
+                return response.status, await response.json()
+            return response.status, await response.text()
+    return asyncio.run(call())
+
+@pytest.mark.parametrize("items, message", [
+    ("April 25", "'items' must be a list"),
+    ([{"user_time": "April 25, 2025 3:00 PM"}, "April 25"], "items[1] must be an object"),
+    ([{"user_time": ["April 25"]}], "items[0].user_time must be a string"),
+    ([{"user_time": "April 25, 2025", "location": {"city": "Lahore"}}], "items[0].location must be a string"),
+    ([{}, {"user_time": 1745575200}], "items[1].user_time must be a string"),
+])
+def test_normalize_time_rejects_bad_items(items, message):
+    assert _post("/normalize-time", {"items": items}) == (400, message)
+
+def test_normalize_time_absolute_relative_and_recurring():
+    status, body = _post("/normalize-time", {"items": [
+        {"user_time": "April 25, 2025 3:00 PM PKT", "location": "Lahore"},
+        {"user_time": "before April 25, 2025 3:00 PM PKT", "location": None},
+        {"user_time": "in 2 hours", "location": "Lahore"},
+        {"user_time": "every Monday 10am PKT"},
+    ]})
+    assert status == 200
+    absolute, before, relative, recurring = body["items"]
+    exec_time, tz_name = adjust_timestamp_to_location("April 25, 2025 3:00 PM PKT", "Lahore")
+    assert absolute == {"exec_time": exec_time, "timezone": tz_name}
+    assert before == {"exec_time": exec_time, "timezone": tz_name, "constraint": "BEFORE"}
+    assert relative["timezone"] == "Asia/Karachi" and "recurrence" not in relative
+    assert recurring["recurrence"].startswith("FREQ=WEEKLY")
+    assert recurring["upcoming_exec_times"][0] == recurring["exec_time"]
+
+def test_normalize_time_zero_interval_returns():
+    status, body = _post("/normalize-time", {"items": [{"user_time": "every 0 days at 9am", "location": "Lahore"}]})
+    assert status == 200
+    assert "recurrence" not in body["items"][0]
@@ -0,0 +1,102 @@
+import os
+import threading
+
+import pytest
+
+from refiner.sessions import InMemorySessionStore, LRUSessionStore, SessionStore, SQLiteSessionStore
+
+@pytest.fixture(params=["memory", "lru", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield InMemorySessionStore()
+    elif request.param == "lru":
+        yield LRUSessionStore()
+    else:
+        store = SQLiteSessionStore(os.path.join(tmp_path, "sessions.sqlite3"))
+        yield store
+        store.close()
+
+def _message(number):
+    return {"role": "user", "content": f"message {number}"}
+
+def test_session_store_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+    class Partial(SessionStore):
+        def load(self, session_id, limit=None):
+            return []
+
+    with pytest.raises(TypeError):
+        Partial()
+
+@pytest.mark.parametrize("candidate", [None, "", "admin", "../etc/passwd", "A" * 32, "0" * 31, 42])
+def test_malformed_session_id_gets_a_new_one(store, candidate):
+    session_id = store.resolve_session_id(candidate)
+    assert session_id != candidate and len(session_id) == 32
+
+def test_unknown_session_id_gets_a_new_one(store):
+    unknown = store.new_session_id()
+    assert store.resolve_session_id(unknown) != unknown
+
+def test_live_session_id_is_kept(store):
+    session_id = store.new_session_id()
+    store.append(session_id, _message(1))
+    assert store.exists(session_id)
+    assert store.resolve_session_id(session_id) == session_id
+
+def test_state_round_trip(store):
+    session_id = store.new_session_id()
+    assert store.get_state(session_id) == {}
+    state = {"awaiting_confirmation": True, "pending_result": {"cascade_schema": [{"time": {"exec_time": 1}}]}}
+    store.set_state(session_id, state)
+    state["awaiting_confirmation"] = False  # the store keeps its own copy
+    loaded = store.get_state(session_id)
+    assert loaded == {"awaiting_confirmation": True, "pending_result": {"cascade_schema": [{"time": {"exec_time": 1}}]}}
+    loaded["pending_result"] = None
+    assert store.get_state(session_id)["pending_result"] is not None
+    store.set_state(session_id, {})
+    assert store.get_state(session_id) == {}
+
+def test_state_and_messages_are_deleted_together(store):
+    session_id = store.new_session_id()
+    store.append(session_id, _message(1))
+    store.set_state(session_id, {"awaiting_confirmation": True})
+    store.delete(session_id)
+    assert store.load(session_id) == [] and store.get_state(session_id) == {}
+    assert not store.exists(session_id)
+
+def test_idle_session_drops_its_state(tmp_path):
+    for store in (LRUSessionStore(idle_ttl=-1), SQLiteSessionStore(os.path.join(tmp_path, "idle.sqlite3"), idle_ttl=-1)):
+        session_id = store.new_session_id()
+        store.set_state(session_id, {"awaiting_confirmation": True})
+        assert store.get_state(session_id) == {}
+        assert not store.exists(session_id)
+
+def test_sqlite_appends_from_several_connections_keep_every_message(tmp_path):
+    # One store per thread behaves like one app process per replica sharing the file;
+    # they race on creating each session and on the next message number within it
+    path = os.path.join(tmp_path, "shared.sqlite3")
+    stores = [SQLiteSessionStore(path) for _ in range(4)]
+    session_ids = [stores[0].new_session_id() for _ in range(20)]
+    barrier = threading.Barrier(len(stores))
+
+    def writer(store, worker):
+        for session_id in session_ids:
+            barrier.wait()
+            for number in range(3):
+                store.append(session_id, {"role": "user", "content": f"worker {worker} message {number}"})
+
+    threads = [threading.Thread(target=writer, args=(store, worker)) for worker, store in enumerate(stores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for session_id in session_ids:
+        contents = [message["content"] for message in stores[0].load(session_id)]
+        assert len(contents) == 3 * len(stores)
+        for worker in range(len(stores)):
+            own = [content for content in contents if content.startswith(f"worker {worker} ")]
+            assert own == [f"worker {worker} message {number}" for number in range(3)]
+    for store in stores:
+        store.close()
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+import pytz
+
+from refiner.timeparse import _localize_epochs, adjust_timestamp_to_location, normalize_timestamps
+
+# (zone, local wall-clock time in a DST gap, local wall-clock time repeated in an overlap)
+TRANSITIONS = [
+    ("America/New_York", datetime(2024, 3, 10, 2, 30), datetime(2024, 11, 3, 1, 30)),
+    ("Europe/Paris", datetime(2024, 3, 31, 2, 30), datetime(2024, 10, 27, 2, 30)),
+    ("Australia/Sydney", datetime(2024, 10, 6, 2, 30), datetime(2024, 4, 7, 2, 30)),
+    ("Australia/Lord_Howe", datetime(2024, 10, 6, 2, 15), datetime(2024, 4, 7, 1, 45)),  # 30-minute shift
+]
+
+def _local_seconds(local_dts):
+    return np.array(local_dts, dtype="datetime64[s]").astype(np.int64)
+
+def _expected(tz, local_dts):
+    return [int(tz.localize(local_dt).timestamp()) for local_dt in local_dts]
+
+@pytest.mark.parametrize("zone, gap, overlap", TRANSITIONS)
+def test_gap_and_overlap_times_are_flagged(zone, gap, overlap):
+    tz = pytz.timezone(zone)
+    _, unsettled = _localize_epochs(_local_seconds([gap, overlap]), tz)
+    assert unsettled.tolist() == [True, True]
+
+@pytest.mark.parametrize("zone, gap, overlap", TRANSITIONS)
+def test_settled_times_match_localize(zone, gap, overlap):
+    tz = pytz.timezone(zone)
+    # Every 15 minutes for a day around each transition
+    local_dts = [start - timedelta(hours=12) + timedelta(minutes=15 * step)
+                 for start in (gap, overlap) for step in range(96)]
+    epochs, unsettled = _localize_epochs(_local_seconds(local_dts), tz)
+    expected = _expected(tz, local_dts)
+    settled = [row for row in range(len(local_dts)) if not unsettled[row]]
+    assert [int(epochs[row]) for row in settled] == [expected[row] for row in settled]
+    # Only the hour (or half hour) around each transition needs localize
+    assert 0 < unsettled.sum() <= 8
+
+def test_fixed_offset_zone():
+    local_dts = [datetime(2024, 1, 1, 12), datetime(2024, 7, 1, 12)]
+    for zone in ("UTC", "Etc/GMT+5"):
+        tz = pytz.timezone(zone)
+        epochs, unsettled = _localize_epochs(_local_seconds(local_dts), tz)
+        assert epochs.tolist() == _expected(tz, local_dts)
+        assert not unsettled.any()
+
+def test_zone_without_dst():
+    tz = pytz.timezone("Asia/Karachi")
+    local_dts = [datetime(2024, month, 15, 9) for month in range(1, 13)]
+    epochs, unsettled = _localize_epochs(_local_seconds(local_dts), tz)
+    assert epochs.tolist() == _expected(tz, local_dts)
+    assert not unsettled.any()
+
+@pytest.mark.parametrize("user_time", [
+    "March 10, 2024 2:30 AM EST",       # gap
+    "November 3, 2024 1:30 AM EST",     # overlap
+    "November 3, 2024 3:30 AM EST",
+    "March 31, 2024 2:30 AM CET",
+    "October 27, 2024 2:30 AM CEST",
+    "October 6, 2024 2:30 AM AEST",
+    "April 7, 2024 2:30 AM AEDT",
+    "2024-03-10 02:30 EST",
+    "25 02 2025 5:00 PM PKT",
+    "2025-04-25T15:00:00+05:00",
+])
+def test_normalize_timestamps_matches_adjust_timestamp(user_time):
+    epochs, zones = normalize_timestamps([(user_time, "unknown")])
+    assert (int(epochs[0]), zones[0]) == adjust_timestamp_to_location(user_time, "unknown")
+
+def test_normalize_timestamps_keeps_input_order_and_duplicates():
+    items = [
+        ("March 10, 2024 2:30 AM EST", "unknown"),
+        ("April 25, 2025 3:00 PM PKT", "unknown"),
+        ("March 10, 2024 2:30 AM EST", "unknown"),
+        ("October 27, 2024 2:30 AM CEST", "unknown"),
+    ]
+    epochs, zones = normalize_timestamps(items)
+    assert [(int(epoch), zone) for epoch, zone in zip(epochs, zones)] == [
+        adjust_timestamp_to_location(*item) for item in items
+    ]
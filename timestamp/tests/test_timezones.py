@@ -0,0 +1,83 @@
+import pytest
+import pytz
+
+from refiner.timezones import (
+    register_timezone_abbreviations,
+    resolve_manual_timezone,
+    resolve_offline_timezone,
+    resolve_timezone_abbreviation,
+)
+
+@pytest.mark.parametrize("text, zone", [
+    ("Swap at 3 PM EST", "America/New_York"),
+    ("Swap at 3 PM CEST", "Europe/Paris"),
+    ("Swap at 3 PM CET", "Europe/Paris"),
+    ("Swap at 9 AM AEST", "Australia/Sydney"),
+    ("Swap at 9 AM AEDT", "Australia/Sydney"),
+    ("Swap at 9 AM EEST", "Europe/Helsinki"),
+    ("Swap at 9 AM CST", "America/Chicago"),
+    ("Swap at 9 AM CST Asia", "Asia/Shanghai"),
+    ("Swap at 9 AM cst   asia", "Asia/Shanghai"),
+    ("Swap at 5 pm pkt", "Asia/Karachi"),
+    ("April 25, 2025 3:00 PM Pakistan Standard Time", "Asia/Karachi"),
+])
+def test_abbreviation_resolves_to_its_own_zone(text, zone):
+    assert resolve_manual_timezone(text).zone == zone
+
+@pytest.mark.parametrize("text", [
+    "Buy at the best price",     # "EST" inside "BEST"
+    "Send it to the forest",     # "EST" at the end of a word
+    "Restake 10 ETH at 3 PM",    # "EST" inside "RESTAKE"
+    "PKTX pool at noon",
+    "",
+])
+def test_abbreviation_inside_a_word_is_ignored(text):
+    assert resolve_manual_timezone(text) is pytz.utc
+
+def test_first_abbreviation_in_the_text_wins():
+    assert resolve_manual_timezone("9 AM AEST (EST evening)").zone == "Australia/Sydney"
+    assert resolve_manual_timezone("EST, not AEST").zone == "America/New_York"
+
+def test_resolved_zones_are_shared_objects():
+    assert resolve_manual_timezone("1 PM EST") is resolve_manual_timezone("2 PM EDT")
+    assert resolve_timezone_abbreviation("est") is resolve_manual_timezone("1 PM EST")
+
+def test_unknown_abbreviation():
+    assert resolve_timezone_abbreviation("XYZ") is None
+    assert resolve_timezone_abbreviation("") is None
+    assert resolve_timezone_abbreviation(None) is None
+
+def test_registered_abbreviation_is_matched_and_clears_the_cache():
+    assert resolve_manual_timezone("10:00 WIB") is pytz.utc
+    register_timezone_abbreviations({"WIB": "Asia/Jakarta", "Western Indonesia Time": "Asia/Jakarta"})
+    assert resolve_manual_timezone("10:00 WIB").zone == "Asia/Jakarta"
+    assert resolve_manual_timezone("10:00 western  indonesia time").zone == "Asia/Jakarta"
+    # Built-in names keep working next to the new ones
+    assert resolve_manual_timezone("10:00 CEST").zone == "Europe/Paris"
+
+def test_registering_an_unknown_zone_changes_nothing():
+    with pytest.raises(pytz.UnknownTimeZoneError):
+        register_timezone_abbreviations({"MARS": "Mars/Olympus_Mons"})
+    assert resolve_manual_timezone("10:00 MARS") is pytz.utc
+
+@pytest.mark.parametrize("text, zone", [
+    ("Lahore", "Asia/Karachi"),
+    ("I-9/3, Islamabad (Pakistan)", "Asia/Karachi"),
+    ("Buy 0.5 BTC at 14:30 tomorrow from Islamabad", "Asia/Karachi"),
+    ("Send 10 DAI to the wallet in New York at 9 AM", "America/New_York"),
+    ("Fly to São Paulo on Friday", "America/Sao_Paulo"),
+    ("Meet in Turkey next week", "Asia/Istanbul"),
+])
+def test_place_names_resolve_offline(text, zone):
+    assert resolve_offline_timezone(text) == zone
+
+@pytest.mark.parametrize("text", [
+    "Reading a book",
+    "buy a turkey on Phoenix",
+    "move to phoenix",
+    "Swap 1 ETH to USDC",
+    "Book a SUV ride from I-9/3 to F-8",
+    "Pay the invoice in Reading",
+])
+def test_words_in_free_text_that_are_not_places_stay_unmatched(text):
+    assert resolve_offline_timezone(text) is None
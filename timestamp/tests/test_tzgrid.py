@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from refiner import tzgrid
+from refiner.timezones import get_timezone_finder
+from refiner.tzgrid import BOUNDARY, GridTimezoneFinder
+
+POINTS = [(33.6844, 73.0479), (40.7128, -74.006), (51.5074, -0.1278), (-33.8688, 151.2093), (35.6762, 139.6503)]
+
+@pytest.fixture(scope="module")
+def finder():
+    return get_timezone_finder()
+
+def test_answers_match_timezonefinder(finder):
+    grid = GridTimezoneFinder(finder, step=0.5)
+    for _ in range(2):  # the second pass is answered from classified cells
+        assert [grid.timezone_at(lat, lng) for lat, lng in POINTS] == [
+            finder.timezone_at(lat=lat, lng=lng) for lat, lng in POINTS
+        ]
+    assert grid.classified_fraction()[0] > 0
+
+def test_without_the_h3_shortcut_index_every_cell_is_a_boundary(finder, monkeypatch):
+    monkeypatch.setattr(tzgrid, "SHORTCUT_H3_RES", None)
+    monkeypatch.setattr(tzgrid, "h3", None)
+    grid = GridTimezoneFinder(finder, step=0.5)
+    assert [grid.timezone_at(lat, lng) for lat, lng in POINTS] == [
+        finder.timezone_at(lat=lat, lng=lng) for lat, lng in POINTS
+    ]
+    assert set(grid.table[grid.table != 0].tolist()) == {BOUNDARY}
+
+def test_table_file_directory_is_created_and_shared(finder, tmp_path):
+    path = os.path.join(tmp_path, "cache", "refiner", "tz_grid.u16")
+    grid = GridTimezoneFinder(finder, step=0.5, path=path)
+    grid.timezone_at(*POINTS[0])
+    grid.flush()
+    assert os.path.exists(path)
+    reopened = GridTimezoneFinder(finder, step=0.5, path=path)
+    assert reopened.classified_fraction() == grid.classified_fraction()